@@ -16,6 +16,10 @@ def pytest_configure(config):
     # being used
     warnings.filterwarnings("error", "", Warning, r"^(?!(|kombu|raven|sentry))")
 
+    config.addinivalue_line(
+        "markers", "benchmark: benchmarks using the `benchmark` fixture of pytest-benchmark"
+    )
+
 
 def pytest_addoption(parser):
     parser.addoption(
@@ -29,6 +33,11 @@ def pytest_runtest_setup(item):
     if item.get_closest_marker("itunes") and not item.config.getoption("--itunes"):
         pytest.skip("Test requires --itunes")
 
+    if item.get_closest_marker("benchmark") and not item.config.pluginmanager.hasplugin(
+        "benchmark"
+    ):
+        pytest.skip("Test requires pytest-benchmark")
+
 
 # XXX: The below code is vendored code from https://github.com/utgwkk/pytest-github-actions-annotate-failures
 # so that we can add support for pytest_rerunfailures
@@ -12,7 +12,7 @@ from symbolic import SymbolicError, normalize_debug_id
 from sentry import ratelimits, roles
 from sentry.api.bases.project import ProjectEndpoint, ProjectReleasePermission
 from sentry.api.exceptions import ResourceDoesNotExist
-from sentry.api.paginator import OffsetPaginator
+from sentry.api.paginator import KeysetPaginator, OffsetPaginator
 from sentry.api.serializers import serialize
 from sentry.auth.superuser import is_active_superuser
 from sentry.auth.system import is_system_auth
@@ -34,6 +34,7 @@ from sentry.tasks.assemble import (
     set_assemble_status,
 )
 from sentry.utils import json
+from sentry.utils.cursors import StringCursor
 from sentry.utils.db import atomic_transaction
 
 logger = logging.getLogger("sentry.api")
@@ -185,7 +186,8 @@ class DebugFilesEndpoint(ProjectEndpoint):
             request=request,
             queryset=queryset,
             order_by="-id",
-            paginator_cls=OffsetPaginator,
+            paginator_cls=KeysetPaginator,
+            cursor_cls=StringCursor,
             default_per_page=20,
             on_results=lambda x: serialize(x, request.user),
         )
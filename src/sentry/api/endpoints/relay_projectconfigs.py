@@ -2,15 +2,16 @@ import logging
 import random
 
 from django.conf import settings
+from django.http import HttpResponse
 from rest_framework.response import Response
-from sentry_sdk import Hub, set_tag, start_span, start_transaction
+from sentry_sdk import set_tag, start_span, start_transaction
 
 from sentry.api.authentication import RelayAuthentication
 from sentry.api.base import Endpoint
 from sentry.api.permissions import RelayPermission
-from sentry.models import Organization, OrganizationOption, Project, ProjectKey, ProjectKeyStatus
+from sentry.models import Organization, Project, ProjectKey, ProjectKeyStatus
 from sentry.relay import config, projectconfig_cache
-from sentry.utils import metrics
+from sentry.utils import json, metrics
 
 logger = logging.getLogger(__name__)
 
@@ -93,16 +94,12 @@ class RelayProjectConfigsEndpoint(Endpoint):
                     if request.relay.has_org_access(org):
                         orgs[org.id] = org
 
-        with start_span(op="relay_fetch_org_options"):
-            with metrics.timer("relay_project_configs.fetching_org_options.duration"):
-                for org_id in orgs:
-                    OrganizationOption.objects.get_all_values(org_id)
-
         metrics.timing("relay_project_configs.projects_requested", len(project_ids))
         metrics.timing("relay_project_configs.projects_fetched", len(projects))
         metrics.timing("relay_project_configs.orgs_fetched", len(orgs))
 
         configs = {}
+        requested_keys = []
         for public_key in public_keys:
             configs[public_key] = {"disabled": True}
 
@@ -120,21 +117,20 @@ class RelayProjectConfigsEndpoint(Endpoint):
 
             # Prevent organization from being fetched again in quotas.
             project.set_cached_field_value("organization", organization)
+            requested_keys.append(key)
 
-            with Hub.current.start_span(op="get_config"):
-                with metrics.timer("relay_project_configs.get_config.duration"):
-                    project_config = config.get_project_config(
-                        project,
-                        full_config=full_config_requested,
-                        project_keys=[key],
-                    )
-
-            configs[public_key] = project_config.to_dict()
+        with start_span(op="get_configs"):
+            with metrics.timer("relay_project_configs.get_configs.duration"):
+                project_configs = config.get_project_configs_bulk(
+                    [projects[key.project_id] for key in requested_keys],
+                    [[key] for key in requested_keys],
+                    full_config=full_config_requested,
+                )
 
-        if full_config_requested:
-            projectconfig_cache.set_many(configs)
+        for key, project_config in zip(requested_keys, project_configs):
+            configs[key.public_key] = project_config.to_dict()
 
-        return Response({"configs": configs}, status=200)
+        return self._respond(request, configs, full_config_requested)
 
     def _post_by_project(self, request, full_config_requested):
         project_ids = set(request.relay_request_data.get("projects") or ())
@@ -157,10 +153,6 @@ class RelayProjectConfigsEndpoint(Endpoint):
             else:
                 orgs = {}
 
-            with metrics.timer("relay_project_configs.fetching_org_options.duration"):
-                for org_id in orgs.keys():
-                    OrganizationOption.objects.get_all_values(org_id)
-
         with start_span(op="relay_fetch_keys"):
             project_keys = {}
             for key in ProjectKey.objects.filter(project_id__in=project_ids):
@@ -171,6 +163,7 @@ class RelayProjectConfigsEndpoint(Endpoint):
         metrics.timing("relay_project_configs.orgs_fetched", len(orgs))
 
         configs = {}
+        requested_projects = []
         for project_id in project_ids:
             configs[str(project_id)] = {"disabled": True}
 
@@ -184,18 +177,57 @@ class RelayProjectConfigsEndpoint(Endpoint):
 
             # Prevent organization from being fetched again in quotas.
             project.set_cached_field_value("organization", organization)
-
-            with start_span(op="get_config"):
-                with metrics.timer("relay_project_configs.get_config.duration"):
-                    project_config = config.get_project_config(
-                        project,
-                        full_config=full_config_requested,
-                        project_keys=project_keys.get(project.id) or [],
-                    )
-
-            configs[str(project_id)] = project_config.to_dict()
+            requested_projects.append(project)
+
+        with start_span(op="get_configs"):
+            with metrics.timer("relay_project_configs.get_configs.duration"):
+                project_configs = config.get_project_configs_bulk(
+                    requested_projects,
+                    [project_keys.get(project.id) or [] for project in requested_projects],
+                    full_config=full_config_requested,
+                )
+
+        for project, project_config in zip(requested_projects, project_configs):
+            configs[str(project.id)] = project_config.to_dict()
+
+        return self._respond(request, configs, full_config_requested)
+
+    def _respond(self, request, configs, full_config_requested):
+        """
+        Serializes every config once and splices the serialized configs into
+        both the project config cache (for full configs) and the response.
+
+        Relays may send the digests of the configs they have already fetched
+        as ``digests``. Configs whose digest did not change are then listed
+        in ``unchanged`` instead of being sent again, and the digests of all
+        configs that are sent are returned in ``digests``.
+        """
+        serialized = {}
+        digests = {}
+        with start_span(op="relay_serialize_configs"):
+            for key, cfg in configs.items():
+                serialized[key], digests[key] = config.serialize_project_config(cfg)
 
         if full_config_requested:
-            projectconfig_cache.set_many(configs)
-
-        return Response({"configs": configs}, status=200)
+            projectconfig_cache.set_many_serialized(serialized)
+
+        extra = {}
+        known_digests = request.relay_request_data.get("digests")
+        if isinstance(known_digests, dict):
+            unchanged = [key for key, digest in digests.items() if known_digests.get(key) == digest]
+            for key in unchanged:
+                del serialized[key]
+                del digests[key]
+
+            metrics.timing("relay_project_configs.configs_unchanged", len(unchanged))
+            extra = {"unchanged": unchanged, "digests": digests}
+
+        configs_body = ",".join(f"{json.dumps(key)}:{cfg}" for key, cfg in serialized.items())
+        extra_body = "".join(
+            f",{json.dumps(field)}:{json.dumps(value)}" for field, value in extra.items()
+        )
+        return HttpResponse(
+            '{"configs":{%s}%s}' % (configs_body, extra_body),
+            content_type="application/json",
+            status=200,
+        )
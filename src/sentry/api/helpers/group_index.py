@@ -21,6 +21,7 @@ from sentry.app import ratelimiter
 from sentry.constants import DEFAULT_SORT_OPTION
 from sentry.db.models.query import create_or_update
 from sentry.exceptions import InvalidSearchQuery
+from sentry.grouping import grouphash_cache
 from sentry.models import (
     TOMBSTONE_FIELDS_FROM_GROUP,
     Activity,
@@ -329,6 +330,7 @@ def handle_discard(request, group_list, projects, user):
                 GroupHash.objects.filter(group=group).update(
                     group=None, group_tombstone_id=tombstone.id
                 )
+                grouphash_cache.invalidate_on_commit(group.project_id)
 
     for project in projects:
         _delete_groups(request, project, groups_to_delete.get(project.id), delete_type="discard")
@@ -353,6 +355,7 @@ def _delete_groups(request, project, group_list, delete_type):
     transaction_id = uuid4().hex
 
     GroupHash.objects.filter(project_id=project.id, group__id__in=group_ids).delete()
+    grouphash_cache.invalidate_on_commit(project.id)
     # We remove `GroupInbox` rows here so that they don't end up influencing queries for
     # `Group` instances that are pending deletion
     GroupInbox.objects.filter(project_id=project.id, group__id__in=group_ids).delete()
@@ -1,16 +1,20 @@
 import bisect
 import functools
 import math
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import connections
+from django.db.models import Q
 from django.db.models.functions import Lower
 from django.db.models.sql.datastructures import EmptyResultSet
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
+from sentry.utils import json
 from sentry.utils.compat import map, zip
-from sentry.utils.cursors import Cursor, CursorResult, build_cursor
+from sentry.utils.cursors import Cursor, CursorResult, StringCursor, build_cursor
 
 quote_name = connections["default"].ops.quote_name
 
@@ -23,6 +27,23 @@ class BadPaginationError(Exception):
     pass
 
 
+def count_hits(queryset, max_hits):
+    if not max_hits:
+        return 0
+    hits_query = queryset.values()[:max_hits].query
+    # clear out any select fields (include select_related) and pull just the id
+    hits_query.clear_select_clause()
+    hits_query.add_fields(["id"])
+    hits_query.clear_ordering(force_empty=True)
+    try:
+        h_sql, h_params = hits_query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    cursor = connections[queryset.db].cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM ({h_sql}) as t", h_params)
+    return cursor.fetchone()[0]
+
+
 class BasePaginator:
     def __init__(
         self, queryset, order_by=None, max_limit=MAX_LIMIT, on_results=None, post_query_filter=None
@@ -179,20 +200,7 @@ class BasePaginator:
         return cursor
 
     def count_hits(self, max_hits):
-        if not max_hits:
-            return 0
-        hits_query = self.queryset.values()[:max_hits].query
-        # clear out any select fields (include select_related) and pull just the id
-        hits_query.clear_select_clause()
-        hits_query.add_fields(["id"])
-        hits_query.clear_ordering(force_empty=True)
-        try:
-            h_sql, h_params = hits_query.sql_with_params()
-        except EmptyResultSet:
-            return 0
-        cursor = connections[self.queryset.db].cursor()
-        cursor.execute(f"SELECT COUNT(*) FROM ({h_sql}) as t", h_params)
-        return cursor.fetchone()[0]
+        return count_hits(self.queryset, max_hits)
 
 
 class Paginator(BasePaginator):
@@ -351,6 +359,160 @@ class MergingOffsetPaginator(OffsetPaginator):
         return CursorResult(results=results, next=next_cursor, prev=prev_cursor)
 
 
+def estimate_count(queryset):
+    """
+    Returns the number of rows of a queryset as estimated by the Postgres
+    query planner, which does not need to visit the rows.
+    """
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    cursor = connections[queryset.db].cursor()
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset by the values of its ordering columns (also known as
+    keyset or seek pagination) instead of by offset. The cursor of the next
+    page holds the ordering values of the last row of the current page, and
+    the next page is queried with ``WHERE (a, b) > (x, y)``, so the cost of a
+    page does not depend on how deep it is.
+
+    ``order_by`` is a list of model fields (prefixed with ``-`` for descending
+    order) that must not contain ``NULL`` values. ``id`` is appended as a
+    tiebreaker unless the ordering already contains a unique field.
+
+    Cursors are opaque strings and have to be parsed with ``StringCursor``.
+
+    Counting hits is capped at ``max_hits`` rows. With ``estimate_hits``,
+    larger results report the estimate of the query planner instead.
+    """
+
+    def __init__(
+        self,
+        queryset,
+        order_by,
+        max_limit=MAX_LIMIT,
+        on_results=None,
+        estimate_hits=False,
+        unique_fields=("id", "pk"),
+    ):
+        if isinstance(order_by, str):
+            order_by = [order_by]
+        order_by = list(order_by)
+        if not any(field.lstrip("-") in unique_fields for field in order_by):
+            order_by.append("-id" if order_by[-1].startswith("-") else "id")
+
+        self.order_by = order_by
+        # [(field, descending)]
+        self.keys = [(field.lstrip("-"), field.startswith("-")) for field in order_by]
+        self.queryset = queryset
+        self.max_limit = max_limit
+        self.on_results = on_results
+        self.estimate_hits = estimate_hits
+
+    def get_item_key(self, item):
+        values = []
+        for field, _ in self.keys:
+            value = getattr(item, field)
+            if isinstance(value, datetime):
+                value = {"dt": value.isoformat()}
+            values.append(value)
+        return urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+    def value_from_cursor(self, cursor):
+        try:
+            value = cursor.value + "=" * (-len(cursor.value) % 4)
+            values = json.loads(urlsafe_b64decode(value.encode("ascii")))
+        except (TypeError, ValueError, UnicodeError):
+            raise BadPaginationError("Invalid cursor")
+
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            raise BadPaginationError("Invalid cursor")
+
+        return [
+            parse_datetime(value["dt"]) if isinstance(value, dict) else value for value in values
+        ]
+
+    def build_queryset(self, values, is_prev):
+        # Previous pages are queried in reverse order and reversed afterwards.
+        if is_prev:
+            order_by = [field if desc else f"-{field}" for field, desc in self.keys]
+        else:
+            order_by = self.order_by
+        queryset = self.queryset.order_by(*order_by)
+
+        if values is None:
+            return queryset
+
+        # (a, b) > (x, y) expands to a > x OR (a = x AND b > y), with the
+        # comparison flipped for descending columns.
+        condition = Q()
+        for idx, (field, desc) in enumerate(self.keys):
+            lookup = "lt" if desc != is_prev else "gt"
+            equal = {key: values[i] for i, (key, _) in enumerate(self.keys[:idx])}
+            condition |= Q(**equal, **{f"{field}__{lookup}": values[idx]})
+        return queryset.filter(condition)
+
+    def count_hits(self, max_hits):
+        """
+        Returns the number of hits and the limit they were capped at, which
+        is ``None`` if the number was estimated.
+        """
+        hits = count_hits(self.queryset, max_hits)
+        if max_hits and hits >= max_hits and self.estimate_hits:
+            return max(estimate_count(self.queryset), hits), None
+        return hits, max_hits
+
+    def get_result(self, limit=100, cursor=None, count_hits=False, known_hits=None, max_hits=None):
+        limit = min(limit, self.max_limit)
+
+        values = self.value_from_cursor(cursor) if cursor is not None and cursor.value else None
+        is_prev = bool(cursor and cursor.is_prev and values is not None)
+
+        if max_hits is None:
+            max_hits = MAX_HITS_LIMIT
+        if count_hits:
+            hits, max_hits = self.count_hits(max_hits)
+        else:
+            hits = known_hits
+
+        results = list(self.build_queryset(values, is_prev)[: limit + 1])
+        has_more = len(results) > limit
+        results = results[:limit]
+        if is_prev:
+            results.reverse()
+
+        if results:
+            next_value = self.get_item_key(results[-1])
+            prev_value = self.get_item_key(results[0])
+        else:
+            # Going past the end (or the start) keeps the cursor in place.
+            next_value = prev_value = cursor.value if values is not None else ""
+
+        next_cursor = StringCursor(next_value, 0, False, has_more if not is_prev else True)
+        prev_cursor = StringCursor(
+            prev_value, 0, True, has_more if is_prev else values is not None and bool(results)
+        )
+
+        if self.on_results:
+            results = self.on_results(results)
+
+        return CursorResult(
+            results=results,
+            next=next_cursor,
+            prev=prev_cursor,
+            hits=hits,
+            max_hits=max_hits if count_hits else None,
+        )
+
+
 def reverse_bisect_left(a, x, lo=0, hi=None):
     """\
     Similar to ``bisect.bisect_left``, but expects the data in the array ``a``
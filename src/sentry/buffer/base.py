@@ -1,9 +1,13 @@
 import logging
+from collections import defaultdict
 
 from django.db.models import F
+from django.db.models.expressions import Combinable
 
+from sentry.db.models.query import update_many
 from sentry.signals import buffer_incr_complete
 from sentry.tasks.process_buffer import process_incr
+from sentry.utils import metrics
 from sentry.utils.services import Service
 
 
@@ -52,6 +56,14 @@ class Buffer(Service, metaclass=BufferMount):
         return []
 
     def process(self, model, columns, filters, extra=None, signal_only=None):
+        created = self._apply_incr(model, columns, filters, extra, signal_only)
+        self._send_incr_complete(model, columns, filters, extra, created)
+
+    def _apply_incr(self, model, columns, filters, extra=None, signal_only=None):
+        """
+        Write a single increment to the database, without sending
+        ``buffer_incr_complete``. Returns whether the row was created.
+        """
         from sentry.event_manager import ScoreClause
         from sentry.models import Group
 
@@ -74,6 +86,9 @@ class Buffer(Service, metaclass=BufferMount):
 
             _, created = model.objects.create_or_update(values=update_kwargs, **filters)
 
+        return created
+
+    def _send_incr_complete(self, model, columns, filters, extra, created):
         buffer_incr_complete.send_robust(
             model=model,
             columns=columns,
@@ -82,3 +97,92 @@ class Buffer(Service, metaclass=BufferMount):
             created=created,
             sender=model,
         )
+
+    def process_batch(self, model, batch):
+        """
+        Apply many buffered increments for `model` at once. `batch` is a list
+        of ``(columns, filters, extra, signal_only)`` tuples, as they would be
+        passed to ``process``.
+
+        Increments that target a row by its primary key are applied with one
+        ``UPDATE ... FROM (VALUES ...)`` statement per set of updated columns.
+        Everything else, including rows that don't exist yet and need to be
+        created, is applied one by one like ``process`` does.
+        """
+        for columns, filters, extra, created in self._apply_batch(model, batch):
+            self._send_incr_complete(model, columns, filters, extra, created)
+
+    def _apply_batch(self, model, batch):
+        """
+        Write a batch of increments to the database, without sending
+        ``buffer_incr_complete``. Returns the applied increments as
+        ``(columns, filters, extra, created)`` tuples, so that callers can
+        send the signal once the writes are committed.
+        """
+        from sentry.models import Group
+
+        completed = []
+        pending = defaultdict(dict)
+        for columns, filters, extra, signal_only in batch:
+            pk = filters.get("id", filters.get("pk")) if len(filters) == 1 else None
+            values = dict(extra or {})
+            if model is Group and "last_seen" in values and "times_seen" in columns:
+                # recomputed in SQL, see ``_get_bulk_expressions``
+                values.pop("score", None)
+
+            bulk_updatable = (
+                not signal_only
+                and isinstance(pk, int)
+                and not (model is Group and "score" in values)
+                and not any(isinstance(v, Combinable) for v in values.values())
+                and not set(columns) & set(values)
+            )
+
+            signature = (tuple(sorted(columns)), tuple(sorted(values)))
+            if not bulk_updatable or pk in pending[signature]:
+                created = self._apply_incr(model, columns, filters, extra, signal_only)
+                completed.append((columns, filters, extra, created))
+                continue
+
+            values.update(columns)
+            pending[signature][pk] = (values, (columns, filters, extra))
+
+        for (column_names, value_names), items in pending.items():
+            rows = {
+                pk: {name: values[name] for name in column_names + value_names}
+                for pk, (values, _) in items.items()
+            }
+            with metrics.timer("buffer.process-batch.update", tags={"model": model.__name__}):
+                updated = update_many(
+                    model,
+                    rows,
+                    increments=column_names,
+                    expressions=self._get_bulk_expressions(model, column_names, value_names),
+                )
+            metrics.incr(
+                "buffer.process-batch.rows",
+                amount=len(updated),
+                skip_internal=True,
+                tags={"model": model.__name__},
+            )
+
+            for pk, (_, (columns, filters, extra)) in items.items():
+                created = False
+                if pk not in updated:
+                    # the row does not exist yet, let ``create_or_update`` create it
+                    created = self._apply_incr(model, columns, filters, extra)
+                completed.append((columns, filters, extra, created))
+
+        return completed
+
+    def _get_bulk_expressions(self, model, column_names, value_names):
+        from sentry.models import Group
+
+        # Same as ``ScoreClause.as_sql`` when both ``times_seen`` and
+        # ``last_seen`` are known, see ``process``.
+        if model is Group and "times_seen" in column_names and "last_seen" in value_names:
+            return {
+                "score": 'log(t."times_seen" + v."times_seen") * 600 '
+                '+ trunc(extract(epoch from v."last_seen"))'
+            }
+        return None
@@ -1,12 +1,19 @@
+import atexit
+import calendar
 import pickle
 import threading
+import weakref
+from collections import defaultdict
 from datetime import datetime
 from time import time
 
-from django.db import models
+import msgpack
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.db import models, router, transaction
 from django.utils import timezone
 from django.utils.encoding import force_bytes, force_text
 
+from sentry import options
 from sentry.buffer import Buffer
 from sentry.exceptions import InvalidConfiguration
 from sentry.tasks.process_buffer import process_incr, process_pending
@@ -19,6 +26,19 @@ from sentry.utils.redis import get_cluster_from_options
 _local_buffers = None
 _local_buffers_lock = threading.Lock()
 
+# Buffers holding coalesced increments, which only live in memory and are
+# written before the process goes away.
+_coalescing_buffers = weakref.WeakSet()
+_coalescing_buffers_lock = threading.Lock()
+_coalescing_hooks_registered = False
+
+# Values written by the compact codec are msgpack payloads prefixed with a byte
+# that is never used by msgpack itself, which keeps them distinguishable from
+# the JSON (``{``/``[``) and pickle encodings.
+COMPACT_CODEC_PREFIX = b"\xc1"
+_EXT_DATETIME = 1
+_EXT_SCORE_CLAUSE = 2
+
 
 class PendingBuffer:
     def __init__(self, size):
@@ -47,16 +67,94 @@ class PendingBuffer:
         return rv
 
 
+class PendingIncr:
+    """
+    Increments for a single buffer key that have been coalesced in-process
+    and not yet written to Redis.
+    """
+
+    __slots__ = ("model", "filters", "columns", "extra", "signal_only", "count")
+
+    def __init__(self, model, filters):
+        self.model = model
+        self.filters = filters
+        self.columns = {}
+        self.extra = {}
+        self.signal_only = None
+        self.count = 0
+
+    def merge(self, columns, extra=None, signal_only=None):
+        for column, amount in columns.items():
+            self.columns[column] = self.columns.get(column, 0) + amount
+        if extra:
+            # last write wins, same as ``hset`` in Redis
+            self.extra.update(extra)
+        if signal_only is True:
+            self.signal_only = True
+        self.count += 1
+
+    def merge_pending(self, other):
+        """
+        Merge in increments that were coalesced before the ones of this
+        instance.
+        """
+        for column, amount in other.columns.items():
+            self.columns[column] = self.columns.get(column, 0) + amount
+        self.extra = {**other.extra, **self.extra}
+        if other.signal_only is True:
+            self.signal_only = True
+        self.count += other.count
+
+
 class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(
+        self,
+        pending_partitions=1,
+        incr_batch_size=2,
+        coalesce_window=None,
+        coalesce_max_keys=1000,
+        max_incr_batch_size=None,
+        incr_batch_target_tasks=100,
+        bulk_process=False,
+        **options,
+    ):
+        """
+        :param coalesce_window: When set, ``incr`` does not write to Redis
+            immediately but aggregates increments for the same key in-process
+            for up to this many seconds, and then writes all of them with one
+            pipeline per Redis host.
+        :param coalesce_max_keys: Flush coalesced increments early once this
+            many distinct keys are pending.
+        :param max_incr_batch_size: When set, the size of the batches passed
+            to ``process_incr`` grows with the pending backlog, up to this
+            many keys (see ``_get_incr_batch_size``).
+        :param incr_batch_target_tasks: The number of ``process_incr`` tasks
+            the backlog is spread over when batch sizes are adaptive.
+        :param bulk_process: Apply batches of pending increments for the same
+            model with bulk updates (see ``Buffer.process_batch``) instead of
+            one update per key.
+        """
         self.cluster, options = get_cluster_from_options("SENTRY_BUFFER_OPTIONS", options)
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
+        self.coalesce_window = coalesce_window
+        self.coalesce_max_keys = coalesce_max_keys
+        self.max_incr_batch_size = max_incr_batch_size
+        self.incr_batch_target_tasks = incr_batch_target_tasks
+        self.bulk_process = bulk_process
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
+        assert self.max_incr_batch_size is None or self.max_incr_batch_size >= incr_batch_size
+        assert self.incr_batch_target_tasks > 0
+        assert self.coalesce_window is None or self.coalesce_window > 0
+        assert self.coalesce_max_keys > 0
+
+        self._coalesced = {}
+        self._coalesced_lock = threading.Lock()
+        self._coalesce_timer = None
 
     def validate(self):
         try:
@@ -142,6 +240,64 @@ class RedisBuffer(Buffer):
         else:
             raise TypeError(f"invalid type: {type_}")
 
+    def _dump_compact_ext(self, value):
+        from sentry.event_manager import ScoreClause
+
+        if isinstance(value, datetime):
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc)
+            data = msgpack.packb((calendar.timegm(value.timetuple()), value.microsecond))
+            return msgpack.ExtType(_EXT_DATETIME, data)
+        elif isinstance(value, ScoreClause):
+            # The score is always recomputed from `times_seen` and `last_seen`
+            # in `Buffer.process`, so there is no need to carry the group.
+            return msgpack.ExtType(_EXT_SCORE_CLAUSE, b"")
+        elif isinstance(value, models.Model):
+            return value.pk
+        raise TypeError(type(value))
+
+    def _load_compact_ext(self, code, data):
+        from sentry.event_manager import ScoreClause
+
+        if code == _EXT_DATETIME:
+            seconds, microseconds = msgpack.unpackb(data)
+            return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(
+                microsecond=microseconds
+            )
+        elif code == _EXT_SCORE_CLAUSE:
+            return ScoreClause()
+        raise TypeError(f"invalid extension type: {code}")
+
+    def _dump_compact(self, value):
+        """
+        Serialize a filter dict or an extra value into the compact binary
+        codec (msgpack with extension types for datetimes and score clauses,
+        model instances are stored as their primary key).
+        """
+        return COMPACT_CODEC_PREFIX + msgpack.packb(
+            value, default=self._dump_compact_ext, use_bin_type=True
+        )
+
+    def _load_compact(self, payload):
+        return msgpack.unpackb(
+            payload[len(COMPACT_CODEC_PREFIX) :], ext_hook=self._load_compact_ext, raw=False
+        )
+
+    def _load_field(self, payload):
+        """
+        Deserialize a filter dict or an extra value written in any of the
+        supported formats: compact, JSON (``_dump_values``/``_dump_value``)
+        or pickle.
+        """
+        if payload.startswith(COMPACT_CODEC_PREFIX):
+            return self._load_compact(payload)
+        elif payload.startswith(b"{"):
+            return self._load_values(json.loads(payload.decode("utf-8")))
+        elif payload.startswith(b"["):
+            return self._load_value(json.loads(payload.decode("utf-8")))
+        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+        return pickle.loads(payload)
+
     def incr(self, model, columns, filters, extra=None, signal_only=None):
         """
         Increment the key by doing the following:
@@ -151,47 +307,144 @@ class RedisBuffer(Buffer):
             - Perform a set (last write wins) on extra
             - Perform a set on signal_only (only if True)
         - Add hashmap key to pending flushes
-        """
 
-        # TODO(dcramer): longer term we'd rather not have to serialize values
-        # here (unless it's to JSON)
+        If coalescing is enabled, the increment is aggregated in-process and
+        written on the next flush instead (see ``flush_coalesced``).
+        """
         key = self._make_key(model, filters)
+
+        if self.coalesce_window is not None:
+            self._coalesce_incr(key, model, columns, filters, extra, signal_only)
+        else:
+            # We can't use conn.map() due to wanting to support multiple pending
+            # keys (one per Redis partition)
+            conn = self.cluster.get_local_client_for_key(key)
+
+            pipe = conn.pipeline()
+            self._write_incr(pipe, key, model, columns, filters, extra, signal_only)
+            pipe.execute()
+
+        metrics.incr(
+            "buffer.incr",
+            skip_internal=True,
+            tags={"module": model.__module__, "model": model.__name__},
+        )
+
+    def _write_incr(self, pipe, key, model, columns, filters, extra=None, signal_only=None):
         pending_key = self._make_pending_key_from_key(key)
-        # We can't use conn.map() due to wanting to support multiple pending
-        # keys (one per Redis partition)
-        conn = self.cluster.get_local_client_for_key(key)
 
-        pipe = conn.pipeline()
+        # The compact codec can only be written once all workers processing
+        # the buffer are able to read it (this is to ensure a zero downtime
+        # deploy), until then we keep writing pickle.
+        if options.get("buffer.write-compact-codec"):
+            dump = self._dump_compact
+        else:
+            dump = pickle.dumps
+
         pipe.hsetnx(key, "m", f"{model.__module__}.{model.__name__}")
-        # TODO(dcramer): once this goes live in production, we can kill the pickle path
-        # (this is to ensure a zero downtime deploy where we can transition event processing)
-        pipe.hsetnx(key, "f", pickle.dumps(filters))
-        # pipe.hsetnx(key, 'f', json.dumps(self._dump_values(filters)))
+        pipe.hsetnx(key, "f", dump(filters))
         for column, amount in columns.items():
             pipe.hincrby(key, "i+" + column, amount)
 
         if extra:
-            # Group tries to serialize 'score', so we'd need some kind of processing
-            # hook here
-            # e.g. "update score if last_seen or times_seen is changed"
             for column, value in extra.items():
-                # TODO(dcramer): once this goes live in production, we can kill the pickle path
-                # (this is to ensure a zero downtime deploy where we can transition event processing)
-                pipe.hset(key, "e+" + column, pickle.dumps(value))
-                # pipe.hset(key, 'e+' + column, json.dumps(self._dump_value(value)))
+                pipe.hset(key, "e+" + column, dump(value))
 
         if signal_only is True:
             pipe.hset(key, "s", "1")
 
         pipe.expire(key, self.key_expire)
         pipe.zadd(pending_key, {key: time()})
-        pipe.execute()
 
-        metrics.incr(
-            "buffer.incr",
-            skip_internal=True,
-            tags={"module": model.__module__, "model": model.__name__},
-        )
+    def _coalesce_incr(self, key, model, columns, filters, extra=None, signal_only=None):
+        with self._coalesced_lock:
+            pending = self._coalesced.get(key)
+            if pending is None:
+                pending = self._coalesced[key] = PendingIncr(model, filters)
+            pending.merge(columns, extra, signal_only)
+
+            should_flush = len(self._coalesced) >= self.coalesce_max_keys
+            if not should_flush:
+                self._start_coalesce_timer()
+
+        if should_flush:
+            self.flush_coalesced(reason="size")
+
+    def _start_coalesce_timer(self):
+        # Make sure increments are written even if no further calls to
+        # ``incr`` happen within the window. Must be called with the lock held.
+        if self._coalesce_timer is None:
+            self._coalesce_timer = threading.Timer(self.coalesce_window, self.flush_coalesced)
+            self._coalesce_timer.daemon = True
+            self._coalesce_timer.start()
+            _register_coalescing_buffer(self)
+
+    def flush_coalesced(self, reason="window"):
+        """
+        Write all increments coalesced in-process to Redis, using a single
+        pipeline per Redis host.
+
+        Increments that fail to be written are merged back and retried with
+        the next flush, as long as no more than ``coalesce_max_keys`` keys
+        are pending. Beyond that they are dropped.
+        """
+        with self._coalesced_lock:
+            pending, self._coalesced = self._coalesced, {}
+            if self._coalesce_timer is not None:
+                self._coalesce_timer.cancel()
+                self._coalesce_timer = None
+
+        if not pending:
+            return
+
+        router = self.cluster.get_router()
+        keys_by_host = defaultdict(list)
+        for key in pending:
+            keys_by_host[router.get_host_for_key(key)].append(key)
+
+        with metrics.timer("buffer.coalesce.flush-latency", tags={"reason": reason}):
+            for host, keys in keys_by_host.items():
+                # The pending set lives on the same host as the hashes it
+                # references (see ``process_pending``), hence one local
+                # pipeline per host rather than ``cluster.map()``.
+                try:
+                    with self.cluster.get_local_client(host).pipeline(transaction=False) as pipe:
+                        for key in keys:
+                            incr = pending[key]
+                            self._write_incr(
+                                pipe,
+                                key,
+                                incr.model,
+                                incr.columns,
+                                incr.filters,
+                                incr.extra,
+                                incr.signal_only,
+                            )
+                        pipe.execute()
+                except Exception:
+                    self.logger.exception("buffer.coalesce.flush-failed")
+                    self._handle_failed_flush({key: pending[key] for key in keys})
+
+        calls = sum(incr.count for incr in pending.values())
+        metrics.incr("buffer.coalesce.calls", amount=calls, skip_internal=True)
+        metrics.incr("buffer.coalesce.keys", amount=len(pending), skip_internal=True)
+        metrics.timing("buffer.coalesce.ratio", calls / len(pending), tags={"reason": reason})
+        metrics.timing("buffer.coalesce.hosts", len(keys_by_host))
+
+    def _handle_failed_flush(self, failed):
+        with self._coalesced_lock:
+            if len(self._coalesced.keys() | failed.keys()) > self.coalesce_max_keys:
+                metrics.incr("buffer.coalesce.dropped", amount=len(failed), skip_internal=True)
+                return
+
+            for key, incr in failed.items():
+                current = self._coalesced.get(key)
+                if current is None:
+                    self._coalesced[key] = incr
+                else:
+                    current.merge_pending(incr)
+            self._start_coalesce_timer()
+        metrics.incr("buffer.coalesce.requeued", amount=len(failed), skip_internal=True)
 
     def process_pending(self, partition=None):
         if partition is None and self.pending_partitions > 1:
@@ -210,18 +463,24 @@ class RedisBuffer(Buffer):
         if not client.set(lock_key, "1", nx=True, ex=60):
             return
 
-        pending_buffer = PendingBuffer(self.incr_batch_size)
-
         try:
             keycount = 0
+            oldest = None
             with self.cluster.all() as conn:
-                results = conn.zrange(pending_key, 0, -1)
+                results = conn.zrange(pending_key, 0, -1, withscores=True)
+
+            for items in results.value.values():
+                keycount += len(items)
+                if items and (oldest is None or items[0][1] < oldest):
+                    oldest = items[0][1]
+
+            pending_buffer = PendingBuffer(self._get_incr_batch_size(keycount))
 
             with self.cluster.all() as conn:
-                for host_id, keys in results.value.items():
-                    if not keys:
+                for host_id, items in results.value.items():
+                    if not items:
                         continue
-                    keycount += len(keys)
+                    keys = [key for key, _ in items]
                     for key in keys:
                         pending_buffer.append(key.decode("utf-8"))
                         if pending_buffer.full():
@@ -233,9 +492,25 @@ class RedisBuffer(Buffer):
                 process_incr.apply_async(kwargs={"batch_keys": pending_buffer.flush()})
 
             metrics.timing("buffer.pending-size", keycount)
+            metrics.timing("buffer.incr-batch-size", pending_buffer.size)
+            if oldest is not None:
+                # how far behind the oldest pending increment is
+                metrics.timing("buffer.pending-lag", time() - oldest)
         finally:
             client.delete(lock_key)
 
+    def _get_incr_batch_size(self, backlog):
+        """
+        Size the batches passed to ``process_incr`` from the observed
+        backlog, so that it is spread over roughly
+        ``incr_batch_target_tasks`` tasks. Batches are never smaller than
+        ``incr_batch_size`` nor larger than ``max_incr_batch_size``.
+        """
+        if self.max_incr_batch_size is None:
+            return self.incr_batch_size
+        batch_size = -(-backlog // self.incr_batch_target_tasks)
+        return max(self.incr_batch_size, min(self.max_incr_batch_size, batch_size))
+
     def process(self, key=None, batch_keys=None):
         assert not (key is None and batch_keys is None)
         assert not (key is not None and batch_keys is not None)
@@ -243,9 +518,70 @@ class RedisBuffer(Buffer):
         if key is not None:
             batch_keys = [key]
 
+        if self.bulk_process and len(batch_keys) > 1:
+            self._process_batch_incr(batch_keys)
+            return
+
         for key in batch_keys:
             self._process_single_incr(key)
 
+    def _process_batch_incr(self, keys):
+        client = self.cluster.get_routing_client()
+        locked_keys = []
+        batches = defaultdict(list)
+        start = time()
+
+        try:
+            for key in keys:
+                lock_key = self._make_lock_key(key)
+                # prevent a stampede due to the way we use celery etas + duplicate
+                # tasks
+                if not client.set(lock_key, "1", nx=True, ex=10):
+                    metrics.incr("buffer.revoked", tags={"reason": "locked"}, skip_internal=False)
+                    self.logger.debug("buffer.revoked.locked", extra={"redis_key": key})
+                    continue
+                locked_keys.append(lock_key)
+
+                incr = self._load_incr(key)
+                if incr is not None:
+                    model, columns, filters, extra, signal_only = incr
+                    batches[model].append((columns, filters, extra, signal_only))
+
+            for model, batch in batches.items():
+                self._process_model_batch(model, batch)
+        finally:
+            with self.cluster.map() as conn:
+                for lock_key in locked_keys:
+                    conn.delete(lock_key)
+
+        processed = sum(len(batch) for batch in batches.values())
+        metrics.incr("buffer.processed", amount=processed, skip_internal=True)
+        metrics.timing("buffer.process-batch.duration", time() - start)
+
+    def _process_model_batch(self, model, batch):
+        # The increments have already been removed from Redis, so a failing
+        # batch must not lose all of them. The batch is applied in a
+        # transaction so that it can be retried increment by increment, and
+        # receivers are only told about it once it has been committed.
+        try:
+            with transaction.atomic(using=router.db_for_write(model)):
+                completed = self._apply_batch(model, batch)
+        except Exception:
+            self.logger.exception("buffer.process-batch.failed", extra={"model": model.__name__})
+            metrics.incr("buffer.process-batch.fallback", tags={"model": model.__name__})
+        else:
+            for columns, filters, extra, created in completed:
+                self._send_incr_complete(model, columns, filters, extra, created)
+            return
+
+        for columns, filters, extra, signal_only in batch:
+            try:
+                super().process(model, columns, filters, extra, signal_only)
+            except Exception:
+                self.logger.exception(
+                    "buffer.process.failed", extra={"model": model.__name__, "filters": filters}
+                )
+
     def _process_single_incr(self, key):
         client = self.cluster.get_routing_client()
         lock_key = self._make_lock_key(key)
@@ -256,52 +592,83 @@ class RedisBuffer(Buffer):
             self.logger.debug("buffer.revoked.locked", extra={"redis_key": key})
             return
 
-        pending_key = self._make_pending_key_from_key(key)
-
         try:
-            conn = self.cluster.get_local_client_for_key(key)
-            pipe = conn.pipeline()
-            pipe.hgetall(key)
-            pipe.zrem(pending_key, key)
-            pipe.delete(key)
-            values = pipe.execute()[0]
-
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_text(k): v for k, v in values.items()}
-
-            if not values:
-                metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
-                self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
-                return
-
-            # XXX(py3): Note that ``import_string`` explicitly wants a str in
-            # python2, so we'll decode (for python3) and then translate back to
-            # a byte string (in python2) for import_string.
-            model = import_string(str(values.pop("m").decode("utf-8")))  # NOQA
-
-            if values["f"].startswith(b"{"):
-                filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
-            else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(values.pop("f"))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"["):
-                        extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(v)
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
-            super().process(model, incr_values, filters, extra_values, signal_only)
+            incr = self._load_incr(key)
+            if incr is not None:
+                super().process(*incr)
+                metrics.incr("buffer.processed", skip_internal=True)
         finally:
             client.delete(lock_key)
+
+    def _load_incr(self, key):
+        """
+        Fetch and remove the pending increment stored at `key`. Returns a
+        ``(model, columns, filters, extra, signal_only)`` tuple, or `None` if
+        there is nothing to process. The lock for `key` must be held.
+        """
+        pending_key = self._make_pending_key_from_key(key)
+
+        conn = self.cluster.get_local_client_for_key(key)
+        pipe = conn.pipeline()
+        pipe.hgetall(key)
+        pipe.zrem(pending_key, key)
+        pipe.delete(key)
+        values = pipe.execute()[0]
+
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_text(k): v for k, v in values.items()}
+
+        if not values:
+            metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+            self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+            return None
+
+        # XXX(py3): Note that ``import_string`` explicitly wants a str in
+        # python2, so we'll decode (for python3) and then translate back to
+        # a byte string (in python2) for import_string.
+        model = import_string(str(values.pop("m").decode("utf-8")))  # NOQA
+
+        filters = self._load_field(values.pop("f"))
+
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                extra_values[k[2:]] = self._load_field(v)
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return model, incr_values, filters, extra_values, signal_only
+
+
+def _register_coalescing_buffer(buffer):
+    """
+    Make sure the coalesced increments of `buffer` are flushed when the
+    process exits. The hooks are only installed once per process, and only
+    if anything is coalesced at all.
+    """
+    global _coalescing_hooks_registered
+    with _coalescing_buffers_lock:
+        _coalescing_buffers.add(buffer)
+        if _coalescing_hooks_registered:
+            return
+        atexit.register(_flush_coalescing_buffers, reason="exit")
+        worker_shutdown.connect(_flush_coalescing_buffers_on_shutdown, weak=False)
+        worker_process_shutdown.connect(_flush_coalescing_buffers_on_shutdown, weak=False)
+        _coalescing_hooks_registered = True
+
+
+def _flush_coalescing_buffers(reason):
+    with _coalescing_buffers_lock:
+        buffers = list(_coalescing_buffers)
+    for buffer in buffers:
+        buffer.flush_coalesced(reason=reason)
+
+
+def _flush_coalescing_buffers_on_shutdown(**kwargs):
+    _flush_coalescing_buffers(reason="shutdown")
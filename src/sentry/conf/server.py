@@ -1279,6 +1279,25 @@ CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
 # CACHES backend.
 CACHE_VERSION = 1
 
+# Directory for a cache of model instances that is shared by all processes of
+# a host and sits in front of the cache used by `get_from_cache`, for models
+# whose manager enables `host_cache`. It should be on a memory-backed
+# filesystem such as /dev/shm. Disabled if None.
+SENTRY_MODEL_HOST_CACHE_PATH = None
+# Seconds entries are kept in the host cache. Changes made on other hosts are
+# visible once their entries expire.
+SENTRY_MODEL_HOST_CACHE_TTL = 10
+
+# Redis cluster (see `redis.clusters`) on which changes to project and
+# organization options are published. When set, processes keep option values
+# across requests and drop them when notified of a change. Disabled if None.
+SENTRY_OPTION_CACHE_INVALIDATION_CLUSTER = None
+
+# Seconds between refreshes of the per-process snapshot of all options (see
+# `OptionsStore.start_snapshot_refresher`). Options are read from the snapshot
+# without checking the cache or the database. Disabled if None.
+SENTRY_OPTIONS_SNAPSHOT_INTERVAL = None
+
 # Digests backend
 SENTRY_DIGESTS = "sentry.digests.backends.dummy.DummyBackend"
 SENTRY_DIGESTS_OPTIONS = {}
@@ -2,15 +2,18 @@ import codecs
 import csv
 import logging
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from hashlib import sha1
 
 import sentry_sdk
 from celery.exceptions import MaxRetriesExceededError
 from celery.task import current
 from django.core.files.base import ContentFile
-from django.db import IntegrityError, router
+from django.db import IntegrityError, connections, router
 from django.utils import timezone
 
+from sentry import options
 from sentry.models import (
     DEFAULT_BLOB_SIZE,
     MAX_FILE_SIZE,
@@ -104,6 +107,15 @@ def assemble_download(
 
             processor = get_processor(data_export, environment_id)
 
+            # Pages of discover exports are fetched concurrently, issues by
+            # tag exports are paginated by the tag store.
+            if data_export.query_type == ExportQueryType.DISCOVER:
+                concurrency = options.get("data-export.fetch-concurrency")
+            else:
+                concurrency = 1
+
+            start_time = time.monotonic()
+
             with tempfile.TemporaryFile(mode="w+b") as tf:
                 # XXX(python3):
                 #
@@ -127,27 +139,50 @@ def assemble_download(
                 # the absolute row offset from the beginning of the export
                 next_offset = offset + fragment_offset
 
-                while True:
-                    # the number of rows to export in the next batch fragment
-                    fragment_row_count = min(batch_size, max(export_limit - next_offset, 1))
-
-                    rows = process_rows(processor, data_export, fragment_row_count, next_offset)
-                    writer.writerows(rows)
-
-                    fragment_offset += len(rows)
-                    next_offset = offset + fragment_offset
-
-                    if (
-                        not rows
-                        or len(rows) < batch_size
-                        # the batch may exceed MAX_BATCH_SIZE but immediately stops
-                        or tf.tell() - starting_pos >= MAX_BATCH_SIZE
-                    ):
-                        break
+                done = False
+                while not done:
+                    # the offsets and number of rows of the next batch fragments
+                    fragments = []
+                    fragment_start = next_offset
+                    while len(fragments) < max(concurrency, 1):
+                        fragment_row_count = min(batch_size, max(export_limit - fragment_start, 1))
+                        fragments.append((fragment_start, fragment_row_count))
+                        fragment_start += fragment_row_count
+                        if fragment_start >= export_limit:
+                            break
+
+                    for rows in fetch_fragments(processor, data_export, fragments):
+                        writer.writerows(rows)
+
+                        fragment_offset += len(rows)
+                        next_offset = offset + fragment_offset
+
+                        if (
+                            not rows
+                            or len(rows) < batch_size
+                            # the batch may exceed MAX_BATCH_SIZE but immediately stops
+                            or tf.tell() - starting_pos >= MAX_BATCH_SIZE
+                        ):
+                            # fragments fetched past this point are discarded
+                            done = True
+                            break
 
                 tf.seek(0)
                 new_bytes_written = store_export_chunk_as_blob(data_export, bytes_written, tf)
                 bytes_written += new_bytes_written
+
+            elapsed = time.monotonic() - start_time
+            rows_per_second = fragment_offset / elapsed if elapsed > 0 else 0
+            metrics.timing("dataexport.rows_per_second", rows_per_second, sample_rate=1.0)
+            logger.info(
+                "dataexport.progress",
+                extra={
+                    "data_export_id": data_export_id,
+                    "offset": next_offset,
+                    "bytes_written": bytes_written,
+                    "rows_per_second": rows_per_second,
+                },
+            )
         except ExportError as error:
             if error.recoverable and export_retries > 0:
                 assemble_download.apply_async(
@@ -228,6 +263,27 @@ def get_processor(data_export, environment_id):
         raise
 
 
+def fetch_fragments(processor, data_export, fragments):
+    """
+    Returns the rows of all ``(offset, batch_size)`` fragments in order,
+    fetching them concurrently if there is more than one.
+    """
+    if len(fragments) == 1:
+        offset, batch_size = fragments[0]
+        return [process_rows(processor, data_export, batch_size, offset)]
+
+    def fetch(fragment):
+        offset, batch_size = fragment
+        try:
+            return process_rows(processor, data_export, batch_size, offset)
+        finally:
+            # Worker threads have their own database connections.
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=len(fragments)) as executor:
+        return list(executor.map(fetch, fragments))
+
+
 def process_rows(processor, data_export, batch_size, offset):
     try:
         if data_export.query_type == ExportQueryType.ISSUES_BY_TAG:
@@ -335,10 +391,17 @@ def merge_export_blobs(data_export_id, **kwargs):
                 size = 0
                 file_checksum = sha1(b"")
 
-                for export_blob in ExportedDataBlob.objects.filter(
-                    data_export=data_export
-                ).order_by("offset"):
-                    blob = FileBlob.objects.get(pk=export_blob.blob_id)
+                export_blobs = list(
+                    ExportedDataBlob.objects.filter(data_export=data_export).order_by("offset")
+                )
+                blobs = FileBlob.objects.in_bulk(
+                    {export_blob.blob_id for export_blob in export_blobs}
+                )
+
+                for export_blob in export_blobs:
+                    blob = blobs.get(export_blob.blob_id)
+                    if blob is None:
+                        raise FileBlob.DoesNotExist("FileBlob matching query does not exist.")
                     FileBlobIndex.objects.create(file=file, blob=blob, offset=size)
                     size += blob.size
                     blob_checksum = sha1(b"")
@@ -112,6 +112,13 @@ class NodeData(collections.MutableMapping):
             rv = self.wrapper(rv)
         return rv
 
+    @property
+    def is_bound(self):
+        """
+        Whether the data is available without fetching it from nodestore.
+        """
+        return self._node_data is not None
+
     def bind_data(self, data, ref=None):
         self.ref = data.pop("_ref", ref)
         ref_version = data.pop("_ref_version", None)
@@ -12,7 +12,9 @@ from django.db.models.signals import class_prepared, post_delete, post_init, pos
 
 from sentry.db.models.manager import M, make_key
 from sentry.db.models.manager.base_query_set import BaseQuerySet
+from sentry.db.models.manager.host_cache import HostCache, get_host_cache
 from sentry.db.models.query import create_or_update
+from sentry.utils import metrics
 from sentry.utils.cache import cache
 from sentry.utils.compat import zip
 from sentry.utils.hashlib import md5_text
@@ -40,6 +42,9 @@ class BaseManager(Manager, Generic[M]):  # type: ignore
         self.cache_fields = kwargs.pop("cache_fields", [])
         self.cache_ttl = kwargs.pop("cache_ttl", 60 * 5)
         self._cache_version: Optional[str] = kwargs.pop("cache_version", None)
+        #: Whether to keep cached instances in the host cache (see
+        #: `SENTRY_MODEL_HOST_CACHE_PATH`) in front of the shared cache.
+        self.host_cache = kwargs.pop("host_cache", False)
         self.__local_cache = threading.local()
         super().__init__(*args, **kwargs)
 
@@ -147,24 +152,14 @@ class BaseManager(Manager, Generic[M]):  # type: ignore
                 continue
             # store pointers
             value = self.__value_for_field(instance, key)
-            cache.set(
-                key=self.__get_lookup_cache_key(**{key: value}),
-                value=pk_val,
-                timeout=self.cache_ttl,
-                version=self.cache_version,
-            )
+            self.__cache_set(self.__get_lookup_cache_key(**{key: value}), pk_val)
 
         # Ensure we don't serialize the database into the cache
         db = instance._state.db
         instance._state.db = None
         # store actual object
         try:
-            cache.set(
-                key=self.__get_lookup_cache_key(**{pk_name: pk_val}),
-                value=instance,
-                timeout=self.cache_ttl,
-                version=self.cache_version,
-            )
+            self.__cache_set(self.__get_lookup_cache_key(**{pk_name: pk_val}), instance)
         except Exception as e:
             logger.error(e, exc_info=True)
         instance._state.db = db
@@ -177,9 +172,7 @@ class BaseManager(Manager, Generic[M]):  # type: ignore
                 value = self.__cache[instance][key]
                 current_value = self.__value_for_field(instance, key)
                 if value != current_value:
-                    cache.delete(
-                        key=self.__get_lookup_cache_key(**{key: value}), version=self.cache_version
-                    )
+                    self.__cache_delete(self.__get_lookup_cache_key(**{key: value}))
 
         self.__cache_state(instance)
 
@@ -193,17 +186,88 @@ class BaseManager(Manager, Generic[M]):  # type: ignore
                 continue
             # remove pointers
             value = self.__value_for_field(instance, key)
-            cache.delete(
-                key=self.__get_lookup_cache_key(**{key: value}), version=self.cache_version
-            )
+            self.__cache_delete(self.__get_lookup_cache_key(**{key: value}))
         # remove actual object
-        cache.delete(
-            key=self.__get_lookup_cache_key(**{pk_name: instance.pk}), version=self.cache_version
-        )
+        self.__cache_delete(self.__get_lookup_cache_key(**{pk_name: instance.pk}))
 
     def __get_lookup_cache_key(self, **kwargs: Any) -> str:
         return make_key(self.model, "modelcache", kwargs)
 
+    def __get_host_cache(self) -> Optional[HostCache]:
+        if not self.host_cache:
+            return None
+        return get_host_cache()
+
+    def __record_host_cache(self, result: str, amount: int) -> None:
+        if amount:
+            metrics.incr(
+                "db.models.host_cache",
+                amount=amount,
+                tags={"model": self.model.__name__, "result": result},
+                skip_internal=True,
+            )
+
+    def __cache_get(self, cache_key: str) -> Any:
+        """
+        Looks up a key in the host cache, then in the shared cache.
+        """
+        return self.__cache_get_many([cache_key]).get(cache_key)
+
+    def __cache_get_many(self, cache_keys: Sequence[str]) -> Mapping[str, Any]:
+        host_cache = self.__get_host_cache()
+        if host_cache is None:
+            if len(cache_keys) == 1:
+                value = cache.get(cache_keys[0], version=self.cache_version)
+                return {cache_keys[0]: value} if value is not None else {}
+            return cache.get_many(cache_keys, version=self.cache_version)
+
+        results = {}
+        missing = []
+        for cache_key in cache_keys:
+            try:
+                value = host_cache.get(cache_key, self.cache_version)
+            except OSError:
+                logger.exception("Failed to read from the host cache")
+                value = None
+            if value is None:
+                missing.append(cache_key)
+            else:
+                results[cache_key] = value
+
+        self.__record_host_cache("hit", len(results))
+        self.__record_host_cache("miss", len(missing))
+        if not missing:
+            return results
+
+        for cache_key, value in cache.get_many(missing, version=self.cache_version).items():
+            if value is None:
+                continue
+            results[cache_key] = value
+            try:
+                host_cache.set(cache_key, value, self.cache_version)
+            except OSError:
+                logger.exception("Failed to write to the host cache")
+
+        return results
+
+    def __cache_set(self, cache_key: str, value: Any) -> None:
+        cache.set(key=cache_key, value=value, timeout=self.cache_ttl, version=self.cache_version)
+        host_cache = self.__get_host_cache()
+        if host_cache is not None:
+            try:
+                host_cache.set(cache_key, value, self.cache_version)
+            except OSError:
+                logger.exception("Failed to write to the host cache")
+
+    def __cache_delete(self, cache_key: str) -> None:
+        cache.delete(key=cache_key, version=self.cache_version)
+        host_cache = self.__get_host_cache()
+        if host_cache is not None:
+            try:
+                host_cache.delete(cache_key, self.cache_version)
+            except OSError:
+                logger.exception("Failed to delete from the host cache")
+
     def __value_for_field(self, instance: M, key: str) -> Any:
         """
         Return the cacheable value for a field.
@@ -256,7 +320,7 @@ class BaseManager(Manager, Generic[M]):  # type: ignore
                 if result is not None:
                     return result
 
-            retval = cache.get(cache_key, version=self.cache_version)
+            retval = self.__cache_get(cache_key)
             if retval is None:
                 result = self.get(**kwargs)
                 # Ensure we're pushing it into the cache
@@ -338,7 +402,7 @@ class BaseManager(Manager, Generic[M]):  # type: ignore
         if not cache_lookup_cache_keys:
             return final_results
 
-        cache_results = cache.get_many(cache_lookup_cache_keys, version=self.cache_version)
+        cache_results = self.__cache_get_many(cache_lookup_cache_keys)
 
         db_lookup_cache_keys = []
         db_lookup_values = []
@@ -416,7 +480,7 @@ class BaseManager(Manager, Generic[M]):  # type: ignore
     def uncache_object(self, instance_id: int) -> None:
         pk_name = self.model._meta.pk.name
         cache_key = self.__get_lookup_cache_key(**{pk_name: instance_id})
-        cache.delete(cache_key, version=self.cache_version)
+        self.__cache_delete(cache_key)
 
     def post_save(self, instance: M, **kwargs: Any) -> None:
         """
@@ -0,0 +1,134 @@
+"""
+Cache for model instances shared by all processes of a host.
+
+``BaseManager.get_from_cache`` looks up instances in the shared (network)
+cache, so every process of a host does its own round trips for the same hot
+rows. The host cache sits in front of the shared cache and keeps one pickled
+entry per cache key as a file in a directory, which should be on a
+memory-backed filesystem such as ``/dev/shm``. Reading an entry is a local
+``open`` and ``read``.
+
+Entries expire ``ttl`` seconds after they were written (by file mtime).
+Saving or deleting an instance drops its entries on the saving host right
+away; other hosts see the change once their entries expire, so the TTL should
+be kept short, and models for which a stale read is not acceptable must not
+enable the host cache. Entries are keyed by the manager's ``cache_version``, so
+instances pickled with a different set of fields are never read.
+
+Expired entries are deleted by a background thread of one process per host
+every ``SWEEP_INTERVAL`` seconds.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+from django.conf import settings
+
+# Seconds between sweeps for expired entries.
+SWEEP_INTERVAL = 60
+
+_host_cache = None
+
+
+class HostCache:
+    def __init__(self, path: str, ttl: int):
+        self.path = path
+        self.ttl = ttl
+        self._next_sweep = time.time() + SWEEP_INTERVAL
+
+    def _get_path(self, key: str, version: Any) -> str:
+        name = hashlib.sha1(f"{version}:{key}".encode()).hexdigest()
+        return os.path.join(self.path, name[:2], name)
+
+    def get(self, key: str, version: Any = None) -> Optional[Any]:
+        path = self._get_path(key, version)
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_mtime + self.ttl < time.time():
+                    return None
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            return pickle.loads(data)
+        except Exception:
+            # Written by an incompatible version of a model.
+            return None
+
+    def set(self, key: str, value: Any, version: Any = None) -> None:
+        path = self._get_path(key, version)
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so that other processes never see
+        # partially written entries.
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        if time.time() >= self._next_sweep:
+            self._start_sweep()
+
+    def delete(self, key: str, version: Any = None) -> None:
+        try:
+            os.unlink(self._get_path(key, version))
+        except FileNotFoundError:
+            pass
+
+    def _start_sweep(self) -> None:
+        """
+        Sweep in the background, unless another process of this host already
+        does so in the current interval.
+        """
+        now = time.time()
+        self._next_sweep = now + SWEEP_INTERVAL
+        # The marker of the current interval can only be created once. It
+        # is swept itself once it is older than the TTL.
+        marker = os.path.join(self.path, f".sweep-{int(now // SWEEP_INTERVAL)}")
+        try:
+            os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return
+
+        thread = threading.Thread(target=self.sweep, name="host-cache-sweep")
+        thread.daemon = True
+        thread.start()
+
+    def sweep(self) -> None:
+        """
+        Delete all expired entries.
+        """
+        cutoff = time.time() - self.ttl
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    if os.stat(path).st_mtime < cutoff:
+                        os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+
+def get_host_cache() -> Optional[HostCache]:
+    """
+    Return the host cache if ``SENTRY_MODEL_HOST_CACHE_PATH`` is configured.
+    """
+    global _host_cache
+    path = getattr(settings, "SENTRY_MODEL_HOST_CACHE_PATH", None)
+    if not path:
+        return None
+    ttl = getattr(settings, "SENTRY_MODEL_HOST_CACHE_TTL", 10)
+    if _host_cache is None or _host_cache.path != path or _host_cache.ttl != ttl:
+        _host_cache = HostCache(path, ttl)
+    return _host_cache
@@ -1,21 +1,177 @@
-from typing import Any, Dict, Union
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple, Union
 
 from celery.signals import task_postrun
+from django.conf import settings
 from django.core.signals import request_finished
 
-from sentry.db.models.manager import M
+from sentry.db.models.manager import M, Value
 from sentry.db.models.manager.base import BaseManager, _local_cache
+from sentry.utils import metrics
+from sentry.utils.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Redis channel on which option changes are published.
+INVALIDATION_CHANNEL = "option-cache-invalidation"
+
+# Seconds option values are kept per process while invalidations are
+# received. This bounds how stale values get if an invalidation is lost.
+PROCESS_CACHE_TTL = 60
+
+# Number of invalidation counters, see `OptionCacheInvalidation.generation`.
+GENERATION_SLOTS = 4096
+
+
+class OptionCacheInvalidation:
+    """
+    Process-wide cache of option values, invalidated through Redis pub/sub.
+
+    Option values are cached per request (or task) and read from the shared
+    cache again by every request. If ``SENTRY_OPTION_CACHE_INVALIDATION_CLUSTER``
+    names a Redis cluster, every change to the options of an instance is
+    published on ``INVALIDATION_CHANNEL``. A background thread in every
+    process subscribes to the channel and drops the values of the changed
+    instance, so values can be kept across requests.
+
+    The cache is only used while the subscription is active, and it is
+    cleared whenever the subscription is (re)established, since
+    invalidations may have been missed in between. Forked processes start
+    their own subscription.
+    """
+
+    def __init__(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        self._values: Dict[str, Any] = {}
+        self._cluster_name: Optional[str] = None
+        self._subscribed = False
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        # Bumped whenever values are invalidated, so that values loaded
+        # before an invalidation are not stored after it.
+        self._epoch = 0
+        self._generations = [0] * GENERATION_SLOTS
+
+    def _clear(self) -> None:
+        self._epoch += 1
+        self._values.clear()
+
+    def _invalidate(self, key: str) -> None:
+        self._generations[hash(key) % GENERATION_SLOTS] += 1
+        self._values.pop(key, None)
+
+    def _get_cluster(self, name: str) -> Any:
+        from sentry.utils.redis import redis_clusters
+
+        return redis_clusters.get(name)
+
+    def is_active(self) -> bool:
+        """
+        Returns whether the process-wide cache can be used, starting the
+        subscription if needed.
+        """
+        if self._pid != os.getpid():
+            # The subscriber thread does not survive forking, and values
+            # cached by the parent may already have been invalidated.
+            self._reset()
+
+        name = getattr(settings, "SENTRY_OPTION_CACHE_INVALIDATION_CLUSTER", None)
+        if name != self._cluster_name:
+            with self._lock:
+                if name != self._cluster_name:
+                    self._subscribed = False
+                    self._cluster_name = name
+                    self._clear()
+                    if name:
+                        thread = threading.Thread(
+                            target=self._listen, args=(name,), name="option-cache-invalidation"
+                        )
+                        thread.daemon = True
+                        thread.start()
+        return bool(name) and self._subscribed
+
+    def _listen(self, name: str) -> None:
+        while self._cluster_name == name:
+            try:
+                pubsub = self._get_cluster(name).pubsub()
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                while self._cluster_name == name:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    if message["type"] == "subscribe":
+                        self._clear()
+                        self._subscribed = True
+                    elif message["type"] == "message":
+                        self._invalidate(message["data"])
+                pubsub.close()
+            except Exception:
+                logger.exception("option-cache.invalidation.failed")
+                self._subscribed = False
+                self._clear()
+                time.sleep(1)
+
+    def get(self, key: str) -> Optional[Mapping[str, Value]]:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        expires, values = item
+        if expires < time.time():
+            return None
+        return values
+
+    def generation(self, key: str) -> Tuple[int, int]:
+        """
+        Returns a token that changes whenever the values of ``key`` are
+        invalidated. Take it before loading values and pass it to ``set``.
+        """
+        return self._epoch, self._generations[hash(key) % GENERATION_SLOTS]
+
+    def set(self, key: str, values: Mapping[str, Value], generation: Tuple[int, int]) -> None:
+        """
+        Stores values unless they were invalidated since ``generation`` was
+        taken.
+        """
+        if self.generation(key) != generation:
+            return
+        self._values[key] = (time.time() + PROCESS_CACHE_TTL, values)
+
+    def publish(self, key: str) -> None:
+        self._invalidate(key)
+        name = getattr(settings, "SENTRY_OPTION_CACHE_INVALIDATION_CLUSTER", None)
+        if not name:
+            return
+        try:
+            self._get_cluster(name).publish(INVALIDATION_CHANNEL, key)
+        except Exception:
+            logger.exception("option-cache.invalidation.publish-failed")
+
+
+invalidation = OptionCacheInvalidation()
+
+
+def _get_option_cache() -> Dict[str, Dict[str, Any]]:
+    if not hasattr(_local_cache, "option_cache"):
+        _local_cache.option_cache = {}
+
+    # Explicitly typing to satisfy mypy.
+    option_cache: Dict[str, Dict[str, Any]] = _local_cache.option_cache
+    return option_cache
 
 
 class OptionManager(BaseManager[M]):
+    #: The field of the option model that references the instance the options
+    #: belong to.
+    instance_field = ""
+
     @property
     def _option_cache(self) -> Dict[str, Dict[str, Any]]:
-        if not hasattr(_local_cache, "option_cache"):
-            _local_cache.option_cache = {}
-
-        # Explicitly typing to satisfy mypy.
-        option_cache: Dict[str, Dict[str, Any]] = _local_cache.option_cache
-        return option_cache
+        return _get_option_cache()
 
     def clear_local_cache(self, **kwargs: Any) -> None:
         self._option_cache.clear()
@@ -28,3 +184,103 @@ class OptionManager(BaseManager[M]):
     def _make_key(self, instance_id: Union[int, str]) -> str:
         assert instance_id
         return f"{self.model._meta.db_table}:{instance_id}"
+
+    def get_all_values_bulk(self, instance_ids: Iterable[int]) -> Mapping[int, Mapping[str, Value]]:
+        """
+        Returns the options of many instances, see ``get_all_values_bulk``.
+        """
+        return get_all_values_bulk({self: instance_ids})[self]
+
+    def _load_values(self, instance_ids: Iterable[int]) -> Mapping[int, Dict[str, Value]]:
+        results: Dict[int, Dict[str, Value]] = {instance_id: {} for instance_id in instance_ids}
+        field = self.instance_field
+        for option in self.filter(**{f"{field}__in": list(results)}):
+            results[getattr(option, f"{field}_id")][option.key] = option.value
+        return results
+
+    def _store_values(self, instance_id: int, values: Mapping[str, Value]) -> None:
+        """
+        Stores changed values in all caches and notifies other processes.
+        """
+        cache_key = self._make_key(instance_id)
+        cache.set(cache_key, values)
+        self._option_cache[cache_key] = values
+        invalidation.publish(cache_key)
+
+
+def get_all_values_bulk(
+    ids_by_manager: Mapping[OptionManager, Iterable[int]]
+) -> Mapping[OptionManager, Mapping[int, Mapping[str, Value]]]:
+    """
+    Returns the options of many instances of several option models, for
+    instance of projects and their organizations.
+
+    Values are looked up in the local caches first, then with a single
+    lookup in the shared cache, and the remaining instances are loaded with
+    at most one query per model. All values end up in the local caches.
+    """
+    option_cache = _get_option_cache()
+    use_process_cache = invalidation.is_active()
+
+    cache_keys = {}
+    missing = []
+    for manager, instance_ids in ids_by_manager.items():
+        for instance_id in instance_ids:
+            cache_key = manager._make_key(instance_id)
+            cache_keys[cache_key] = (manager, instance_id)
+            if cache_key in option_cache:
+                continue
+            values = invalidation.get(cache_key) if use_process_cache else None
+            if values is not None:
+                option_cache[cache_key] = values
+            else:
+                missing.append(cache_key)
+
+    if use_process_cache:
+        metrics.incr(
+            "option-cache.process",
+            amount=len(cache_keys) - len(missing),
+            tags={"result": "hit"},
+            skip_internal=True,
+        )
+        metrics.incr(
+            "option-cache.process", amount=len(missing), tags={"result": "miss"}, skip_internal=True
+        )
+
+    if missing:
+        if use_process_cache:
+            generations = {cache_key: invalidation.generation(cache_key) for cache_key in missing}
+
+        if len(missing) == 1:
+            found = {missing[0]: cache.get(missing[0])}
+        else:
+            found = cache.get_many(missing)
+
+        to_load: Dict[OptionManager, list] = {}
+        for cache_key in missing:
+            values = found.get(cache_key)
+            if values is None:
+                manager, instance_id = cache_keys[cache_key]
+                to_load.setdefault(manager, []).append(instance_id)
+            else:
+                option_cache[cache_key] = values
+                if use_process_cache:
+                    invalidation.set(cache_key, values, generations[cache_key])
+
+        to_set = {}
+        for manager, instance_ids in to_load.items():
+            for instance_id, values in manager._load_values(instance_ids).items():
+                to_set[manager._make_key(instance_id)] = values
+        if to_set:
+            cache.set_many(to_set)
+            option_cache.update(to_set)
+            if use_process_cache:
+                for cache_key, values in to_set.items():
+                    invalidation.set(cache_key, values, generations[cache_key])
+
+    rv: Dict[OptionManager, Dict[int, Mapping[str, Value]]] = {
+        manager: {} for manager in ids_by_manager
+    }
+    for cache_key, (manager, instance_id) in cache_keys.items():
+        rv[manager][instance_id] = option_cache.get(cache_key, {})
+    return rv
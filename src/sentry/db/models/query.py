@@ -1,14 +1,14 @@
 import itertools
 from functools import reduce
 
-from django.db import IntegrityError, router, transaction
+from django.db import IntegrityError, connections, router, transaction
 from django.db.models import Model, Q
 from django.db.models.expressions import CombinedExpression
 from django.db.models.signals import post_save
 
 from .utils import resolve_combined_expression
 
-__all__ = ("update", "create_or_update")
+__all__ = ("update", "create_or_update", "update_many")
 
 
 def update(self, using=None, **kwargs):
@@ -95,6 +95,83 @@ def create_or_update(model, using=None, **kwargs):
     return affected, False
 
 
+def _get_cast_type(field, connection):
+    # Auto fields report ``serial`` types which can't be used in a cast.
+    if hasattr(field, "get_related_db_type"):
+        return field.get_related_db_type(connection)
+    return field.rel_db_type(connection)
+
+
+def update_many(model, rows, increments=(), expressions=None, using=None):
+    """
+    Update many rows of `model` with a single ``UPDATE ... FROM (VALUES ...)``
+    statement.
+
+    `rows` maps primary keys to a dictionary of field values, all rows must
+    update the same fields. Fields listed in `increments` are added to the
+    current value of the column, all others are assigned as-is. Additional
+    raw SQL assignments can be passed in `expressions`, where the current row
+    is available as ``t`` and the provided values as ``v``.
+
+    Returns the set of primary keys that were updated.
+
+    >>> update_many(Group, {
+    >>>     1: {'times_seen': 3, 'last_seen': now},
+    >>>     2: {'times_seen': 1, 'last_seen': now},
+    >>> }, increments=('times_seen',))
+    """
+    if not rows:
+        return set()
+
+    if not using:
+        using = router.db_for_write(model)
+
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    meta = model._meta
+
+    field_names = list(next(iter(rows.values())))
+    fields = [meta.pk] + [meta.get_field(name) for name in field_names]
+
+    # Postgres infers the types of a VALUES list from its contents, cast
+    # explicitly so that NULLs and text literals end up with the column type.
+    placeholder = "(%s)" % ", ".join(f"%s::{_get_cast_type(field, connection)}" for field in fields)
+
+    params = []
+    for pk, values in rows.items():
+        assert list(values) == field_names, "All rows must update the same fields."
+        params.append(meta.pk.get_db_prep_value(pk, connection))
+        for field, name in zip(fields[1:], field_names):
+            params.append(field.get_db_prep_save(values[name], connection))
+
+    assignments = []
+    for field in fields[1:]:
+        column = qn(field.column)
+        if field.name in increments:
+            assignments.append(f"{column} = t.{column} + v.{column}")
+        else:
+            assignments.append(f"{column} = v.{column}")
+    for name, sql in (expressions or {}).items():
+        assignments.append(f"{qn(meta.get_field(name).column)} = {sql}")
+
+    pk_column = qn(meta.pk.column)
+    sql = (
+        "UPDATE {table} AS t SET {assignments} "
+        "FROM (VALUES {values}) AS v ({columns}) "
+        "WHERE t.{pk} = v.{pk} RETURNING t.{pk}"
+    ).format(
+        table=qn(meta.db_table),
+        assignments=", ".join(assignments),
+        values=", ".join([placeholder] * len(rows)),
+        columns=", ".join(qn(field.column) for field in fields),
+        pk=pk_column,
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {pk for (pk,) in cursor.fetchall()}
+
+
 def in_iexact(column, values):
     """Operator to test if any of the given values are (case-insensitive)
     matching to values in the given column."""
@@ -15,7 +15,7 @@ def load(options: Mapping[str, str]) -> Any:
     return import_string(options["path"])(**options.get("options", {}))
 
 
-DEFAULT_CODEC = {"path": "sentry.digests.codecs.CompressedPickleCodec"}
+DEFAULT_CODEC = {"path": "sentry.digests.codecs.CompactNotificationCodec"}
 
 
 class InvalidState(Exception):
@@ -1,7 +1,16 @@
 import pickle
+import uuid
 import zlib
 from typing import Any
 
+import msgpack
+
+from sentry import options
+
+# Records written by `CompactNotificationCodec` start with a byte that zlib
+# streams (and therefore `CompressedPickleCodec` payloads) never start with.
+COMPACT_CODEC_PREFIX = b"\x01"
+
 
 class Codec:
     def encode(self, value: Any) -> bytes:
@@ -17,3 +26,49 @@ class CompressedPickleCodec(Codec):
 
     def decode(self, value: bytes) -> Any:
         return pickle.loads(zlib.decompress(value))
+
+
+class CompactNotificationCodec(CompressedPickleCodec):
+    """
+    Stores notifications as references only: the project, event and group
+    ids of the event and the ids of the rules that fired. Decoded events are
+    not bound to their data, which is loaded from nodestore for all records
+    at once when the digest is built (see `fetch_state`).
+
+    Other values, and records written by `CompressedPickleCodec`, are still
+    encoded with and decoded by pickle.
+    """
+
+    def encode(self, value: Any) -> bytes:
+        from sentry.digests.notifications import Notification
+
+        # The compact encoding can only be written once all workers
+        # delivering digests are able to read it (this is to ensure a zero
+        # downtime deploy), until then we keep writing pickle.
+        if not isinstance(value, Notification) or not options.get("digests.write-compact-codec"):
+            return super().encode(value)
+
+        event = value.event
+        try:
+            event_id = uuid.UUID(event.event_id).bytes
+        except ValueError:
+            event_id = event.event_id
+
+        return COMPACT_CODEC_PREFIX + msgpack.packb(
+            [event.project_id, event_id, event.group_id, list(value.rules)],
+            use_bin_type=True,
+        )
+
+    def decode(self, value: bytes) -> Any:
+        if not value.startswith(COMPACT_CODEC_PREFIX):
+            return super().decode(value)
+
+        from sentry.digests.notifications import Notification
+        from sentry.eventstore.models import Event
+
+        project_id, event_id, group_id, rules = msgpack.unpackb(
+            value[len(COMPACT_CODEC_PREFIX) :], raw=False
+        )
+        if isinstance(event_id, bytes):
+            event_id = uuid.UUID(bytes=event_id).hex
+        return Notification(Event(project_id, event_id, group_id=group_id), rules)
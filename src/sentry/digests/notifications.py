@@ -14,6 +14,7 @@ from typing import (
     Tuple,
 )
 
+from sentry import eventstore
 from sentry.app import tsdb
 from sentry.digests import Record
 from sentry.eventstore.models import Event
@@ -68,6 +69,13 @@ def fetch_state(project: "Project", records: Sequence[Record]) -> Mapping[str, A
     start = records[-1].datetime
     end = records[0].datetime
 
+    # Records written by `CompactNotificationCodec` only reference their
+    # events, fetch the data of all of them at once.
+    eventstore.bind_nodes(
+        [record.value.event for record in records if not record.value.event.data.is_bound],
+        "data",
+    )
+
     groups = Group.objects.in_bulk(record.value.event.group_id for record in records)
     return {
         "project": project,
@@ -24,6 +24,7 @@ from sentry.constants import (
 )
 from sentry.culprit import generate_culprit
 from sentry.eventstore.processing import event_processing_store
+from sentry.grouping import grouphash_cache
 from sentry.grouping.api import (
     BackgroundGroupingConfigLoader,
     GroupingConfigNotFound,
@@ -36,6 +37,7 @@ from sentry.grouping.api import (
     load_grouping_config,
 )
 from sentry.grouping.result import CalculatedHashes
+from sentry.grouping.strategies.newstyle import frame_component_cache
 from sentry.ingest.inbound_filters import FilterStatKeys
 from sentry.killswitches import killswitch_matches_context
 from sentry.lang.native.utils import STORE_CRASH_REPORTS_ALL, convert_crashreport_count
@@ -328,37 +330,196 @@ class EventManager:
 
             return jobs[0]["event"]
 
-        with metrics.timer("event_manager.save.organization.get_from_cache"):
-            project.set_cached_field_value(
-                "organization", Organization.objects.get_from_cache(id=project.organization_id)
-            )
+        job = {
+            "data": self._data,
+            "project_id": project_id,
+            "raw": raw,
+            "start_time": start_time,
+            "cache_key": cache_key,
+        }
+        save_error_events([job], projects)
 
-        job = {"data": self._data, "project_id": project_id, "raw": raw, "start_time": start_time}
-        jobs = [job]
+        if job.get("hash_discarded") is not None:
+            raise job["hash_discarded"]
 
-        is_reprocessed = is_reprocessed_event(job["data"])
+        self._data = job["event"].data.data
 
-        with sentry_sdk.start_span(op="event_manager.save.pull_out_data"):
-            _pull_out_data(jobs, projects)
+        return job["event"]
 
-        with sentry_sdk.start_span(op="event_manager.save.get_or_create_release_many"):
-            _get_or_create_release_many(jobs, projects)
 
-        with sentry_sdk.start_span(op="event_manager.save.get_event_user_many"):
-            _get_event_user_many(jobs, projects)
+@metrics.wraps("event_manager.save_error_events")
+def save_error_events(jobs, projects):
+    """
+    Save a batch of (normalized) error events. Every job needs to contain
+    the event payload as `data`, `project_id`, `raw`, `start_time` and the
+    `cache_key` attachments are stored at.
+
+    Lookups that are shared between events of the batch (organizations,
+    project keys, grouphashes, environments, releases and their associated
+    models) are deduplicated and executed once per batch rather than once
+    per event.
+
+    Jobs whose hash has been discarded are refunded and skipped, the
+    `HashDiscarded` exception is stored as `hash_discarded` on the job.
+    Returns the list of jobs that were saved.
+    """
+    with metrics.timer("event_manager.save_error_events.fetch_organizations"):
+        organization_ids = {project.organization_id for project in projects.values()}
+        organizations = {
+            o.id: o for o in Organization.objects.get_many_from_cache(organization_ids)
+        }
 
-        job["project_key"] = None
-        if job["key_id"] is not None:
-            with metrics.timer("event_manager.load_project_key"):
-                try:
-                    job["project_key"] = ProjectKey.objects.get_from_cache(id=job["key_id"])
-                except ProjectKey.DoesNotExist:
-                    pass
+        for project in projects.values():
+            try:
+                project.set_cached_field_value(
+                    "organization", organizations[project.organization_id]
+                )
+            except KeyError:
+                continue
+
+    for job in jobs:
+        job["is_reprocessed"] = is_reprocessed_event(job["data"])
+
+    with sentry_sdk.start_span(op="event_manager.save.pull_out_data"):
+        _pull_out_data(jobs, projects)
+
+    with sentry_sdk.start_span(op="event_manager.save.get_or_create_release_many"):
+        _get_or_create_release_many(jobs, projects)
+
+    with sentry_sdk.start_span(op="event_manager.save.get_event_user_many"):
+        _get_event_user_many(jobs, projects)
+
+    _get_project_key_many(jobs)
+
+    _derive_plugin_tags_many(jobs, projects)
+    _derive_interface_tags_many(jobs)
+
+    _calculate_event_grouping_many(jobs, projects)
+
+    _materialize_metadata_many(jobs)
+
+    # Load attachments first, but persist them at the very last after
+    # posting to eventstream to make sure all counters and eventstream are
+    # incremented for sure. Also wait for grouping to remove attachments
+    # based on the group counter.
+    with metrics.timer("event_manager.get_attachments"):
+        with sentry_sdk.start_span(op="event_manager.save.get_attachments"):
+            for job in jobs:
+                job["attachments"] = get_attachments(job["cache_key"], job)
+
+    jobs = _save_aggregate_many(jobs, projects)
+
+    _get_or_create_environment_many(jobs, projects)
+    _get_or_create_group_environment_many(jobs)
+    _get_or_create_release_associated_models(jobs, projects)
+    _get_or_create_group_release_many(jobs)
+
+    _tsdb_record_all_metrics(jobs)
+
+    for job in jobs:
+        if job["group"]:
+            UserReport.objects.filter(
+                project_id=job["project_id"], event_id=job["event"].event_id
+            ).update(group_id=job["group"].id, environment_id=job["environment"].id)
+
+    with metrics.timer("event_manager.filter_attachments_for_group"):
+        for job in jobs:
+            job["attachments"] = filter_attachments_for_group(job["attachments"], job)
+
+    # XXX: DO NOT MUTATE THE EVENT PAYLOAD AFTER THIS POINT
+    _materialize_event_metrics(jobs)
+
+    for job in jobs:
+        for attachment in job["attachments"]:
+            key = f"bytes.stored.{attachment.type}"
+            old_bytes = job["event_metrics"].get(key) or 0
+            job["event_metrics"][key] = old_bytes + attachment.size
+
+    _nodestore_save_many(jobs)
+
+    for job in jobs:
+        project = projects[job["project_id"]]
+        save_unprocessed_event(project, job["event"].event_id)
+
+        if job["release"]:
+            if job["is_new"]:
+                buffer.incr(
+                    ReleaseProject,
+                    {"new_groups": 1},
+                    {"release_id": job["release"].id, "project_id": project.id},
+                )
+            if job["is_new_group_environment"]:
+                buffer.incr(
+                    ReleaseProjectEnvironment,
+                    {"new_issues_count": 1},
+                    {
+                        "project_id": project.id,
+                        "release_id": job["release"].id,
+                        "environment_id": job["environment"].id,
+                    },
+                )
+        if not job["raw"]:
+            if not project.first_event:
+                project.update(first_event=job["event"].datetime)
+                first_event_received.send_robust(
+                    project=project, event=job["event"], sender=Project
+                )
+
+        if job["is_reprocessed"]:
+            safe_execute(delete_old_primary_hash, job["event"], _with_transaction=False)
+
+    _eventstream_insert_many(jobs)
+
+    for job in jobs:
+        # Do this last to ensure signals get emitted even if connection to the
+        # file store breaks temporarily.
+        #
+        # We do not need this for reprocessed events as for those we update the
+        # group_id on existing models in post_process_group, which already does
+        # this because of indiv. attachments.
+        if not job["is_reprocessed"]:
+            with metrics.timer("event_manager.save_attachments"):
+                save_attachments(job["cache_key"], job["attachments"], job)
+
+        metric_tags = {"from_relay": "_relay_processed" in job["data"]}
+
+        metrics.timing(
+            "events.latency",
+            job["received_timestamp"] - job["recorded_timestamp"],
+            tags=metric_tags,
+        )
+        metrics.timing("events.size.data.post_save", job["event"].size, tags=metric_tags)
+        metrics.incr(
+            "events.post_save.normalize.errors",
+            amount=len(job["data"].get("errors") or ()),
+            tags=metric_tags,
+        )
+
+    _track_outcome_accepted_many(jobs)
 
-        _derive_plugin_tags_many(jobs, projects)
-        _derive_interface_tags_many(jobs)
+    return jobs
+
+
+@metrics.wraps("save_event.get_project_key_many")
+def _get_project_key_many(jobs):
+    key_ids = {job["key_id"] for job in jobs if job["key_id"] is not None}
+
+    project_keys = {}
+    if key_ids:
+        with metrics.timer("event_manager.load_project_key"):
+            project_keys = {k.id: k for k in ProjectKey.objects.get_many_from_cache(key_ids)}
+
+    for job in jobs:
+        job["project_key"] = project_keys.get(job["key_id"])
+
+
+@metrics.wraps("save_event.calculate_event_grouping_many")
+def _calculate_event_grouping_many(jobs, projects):
+    do_background_grouping_before = options.get("store.background-grouping-before")
+
+    for job in jobs:
+        project = projects[job["project_id"]]
 
-        do_background_grouping_before = options.get("store.background-grouping-before")
         if do_background_grouping_before:
             _run_background_grouping(project, job)
 
@@ -390,7 +551,7 @@ class EventManager:
         ):
             hashes = _calculate_event_grouping(project, job["event"], grouping_config)
 
-        hashes = CalculatedHashes(
+        job["hashes"] = hashes = CalculatedHashes(
             hashes=hashes.hashes + (secondary_hashes and secondary_hashes.hashes or []),
             hierarchical_hashes=hashes.hierarchical_hashes,
             tree_labels=hashes.tree_labels,
@@ -402,8 +563,36 @@ class EventManager:
         if hashes.tree_labels:
             job["finest_tree_label"] = hashes.finest_tree_label
 
-        _materialize_metadata_many(jobs)
 
+@metrics.wraps("save_event.get_grouphashes_many")
+def _get_grouphashes_many(jobs):
+    """
+    Fetch the existing grouphashes of all jobs with one query per project.
+    Also returns the version of the grouphash cache of every project as of
+    before the query, see `_cache_grouphashes`.
+    """
+    hashes_by_project = {}
+    for job in jobs:
+        hashes_by_project.setdefault(job["project_id"], set()).update(job["hashes"].hashes)
+
+    grouphashes = {}
+    versions = {}
+    use_cache = grouphash_cache.is_enabled()
+    for project_id, hashes in hashes_by_project.items():
+        if use_cache:
+            versions[project_id] = grouphash_cache.get_version(project_id)
+        for grouphash in GroupHash.objects.filter(project_id=project_id, hash__in=hashes):
+            grouphashes[(project_id, grouphash.hash)] = grouphash
+
+    return grouphashes, versions
+
+
+@metrics.wraps("save_event.save_aggregate_many")
+def _save_aggregate_many(jobs, projects):
+    grouphashes, grouphash_versions = _get_grouphashes_many(jobs)
+
+    saved_jobs = []
+    for job in jobs:
         kwargs = {
             "platform": job["platform"],
             "message": job["event"].search_message,
@@ -418,27 +607,22 @@ class EventManager:
         if job["release"]:
             kwargs["first_release"] = job["release"]
 
-        # Load attachments first, but persist them at the very last after
-        # posting to eventstream to make sure all counters and eventstream are
-        # incremented for sure. Also wait for grouping to remove attachments
-        # based on the group counter.
-        with metrics.timer("event_manager.get_attachments"):
-            with sentry_sdk.start_span(op="event_manager.save.get_attachments"):
-                attachments = get_attachments(cache_key, job)
-
         try:
             with sentry_sdk.start_span(op="event_manager.save.save_aggregate_fn"):
                 job["group"], job["is_new"], job["is_regression"] = _save_aggregate(
                     event=job["event"],
-                    hashes=hashes,
+                    hashes=job["hashes"],
                     release=job["release"],
                     metadata=dict(job["event_metadata"]),
                     received_timestamp=job["received_timestamp"],
+                    grouphashes=grouphashes,
+                    grouphash_version=grouphash_versions.get(job["project_id"]),
                     **kwargs,
                 )
-        except HashDiscarded:
-            discard_event(job, attachments)
-            raise
+        except HashDiscarded as e:
+            discard_event(job, job["attachments"])
+            job["hash_discarded"] = e
+            continue
 
         job["event"].group = job["group"]
 
@@ -446,106 +630,9 @@ class EventManager:
         # XXX(markus): No clue what this does
         job["event"].data.bind_ref(job["event"])
 
-        _get_or_create_environment_many(jobs, projects)
-
-        if job["group"]:
-            group_environment, job["is_new_group_environment"] = GroupEnvironment.get_or_create(
-                group_id=job["group"].id,
-                environment_id=job["environment"].id,
-                defaults={"first_release": job["release"] or None},
-            )
-        else:
-            job["is_new_group_environment"] = False
-
-        _get_or_create_release_associated_models(jobs, projects)
-
-        if job["release"] and job["group"]:
-            job["grouprelease"] = GroupRelease.get_or_create(
-                group=job["group"],
-                release=job["release"],
-                environment=job["environment"],
-                datetime=job["event"].datetime,
-            )
-
-        _tsdb_record_all_metrics(jobs)
-
-        if job["group"]:
-            UserReport.objects.filter(project_id=project.id, event_id=job["event"].event_id).update(
-                group_id=job["group"].id, environment_id=job["environment"].id
-            )
-
-        with metrics.timer("event_manager.filter_attachments_for_group"):
-            attachments = filter_attachments_for_group(attachments, job)
-
-        # XXX: DO NOT MUTATE THE EVENT PAYLOAD AFTER THIS POINT
-        _materialize_event_metrics(jobs)
-
-        for attachment in attachments:
-            key = f"bytes.stored.{attachment.type}"
-            old_bytes = job["event_metrics"].get(key) or 0
-            job["event_metrics"][key] = old_bytes + attachment.size
-
-        _nodestore_save_many(jobs)
-        save_unprocessed_event(project, job["event"].event_id)
-
-        if job["release"]:
-            if job["is_new"]:
-                buffer.incr(
-                    ReleaseProject,
-                    {"new_groups": 1},
-                    {"release_id": job["release"].id, "project_id": project.id},
-                )
-            if job["is_new_group_environment"]:
-                buffer.incr(
-                    ReleaseProjectEnvironment,
-                    {"new_issues_count": 1},
-                    {
-                        "project_id": project.id,
-                        "release_id": job["release"].id,
-                        "environment_id": job["environment"].id,
-                    },
-                )
-        if not raw:
-            if not project.first_event:
-                project.update(first_event=job["event"].datetime)
-                first_event_received.send_robust(
-                    project=project, event=job["event"], sender=Project
-                )
-
-        if is_reprocessed:
-            safe_execute(delete_old_primary_hash, job["event"], _with_transaction=False)
-
-        _eventstream_insert_many(jobs)
-
-        # Do this last to ensure signals get emitted even if connection to the
-        # file store breaks temporarily.
-        #
-        # We do not need this for reprocessed events as for those we update the
-        # group_id on existing models in post_process_group, which already does
-        # this because of indiv. attachments.
-        if not is_reprocessed:
-            with metrics.timer("event_manager.save_attachments"):
-                save_attachments(cache_key, attachments, job)
-
-        metric_tags = {"from_relay": "_relay_processed" in job["data"]}
-
-        metrics.timing(
-            "events.latency",
-            job["received_timestamp"] - job["recorded_timestamp"],
-            tags=metric_tags,
-        )
-        metrics.timing("events.size.data.post_save", job["event"].size, tags=metric_tags)
-        metrics.incr(
-            "events.post_save.normalize.errors",
-            amount=len(job["data"].get("errors") or ()),
-            tags=metric_tags,
-        )
-
-        _track_outcome_accepted_many(jobs)
+        saved_jobs.append(job)
 
-        self._data = job["event"].data.data
-
-        return job["event"]
+    return saved_jobs
 
 
 @metrics.wraps("event_manager.background_grouping")
@@ -734,10 +821,50 @@ def _materialize_metadata_many(jobs):
 
 @metrics.wraps("save_event.get_or_create_environment_many")
 def _get_or_create_environment_many(jobs, projects):
+    environments = {}
     for job in jobs:
-        job["environment"] = Environment.get_or_create(
-            project=projects[job["project_id"]], name=job["environment"]
+        environment_key = (job["project_id"], job["environment"])
+        if environment_key not in environments:
+            environments[environment_key] = Environment.get_or_create(
+                project=projects[job["project_id"]], name=job["environment"]
+            )
+        job["environment"] = environments[environment_key]
+
+
+@metrics.wraps("save_event.get_or_create_group_environment_many")
+def _get_or_create_group_environment_many(jobs):
+    group_environments = {}
+    for job in jobs:
+        if not job["group"]:
+            job["is_new_group_environment"] = False
+            continue
+
+        group_environment_key = (job["group"].id, job["environment"].id)
+        if group_environment_key in group_environments:
+            # Only the first event of the batch can create it.
+            job["is_new_group_environment"] = False
+            continue
+
+        _, job["is_new_group_environment"] = GroupEnvironment.get_or_create(
+            group_id=job["group"].id,
+            environment_id=job["environment"].id,
+            defaults={"first_release": job["release"] or None},
         )
+        group_environments[group_environment_key] = True
+
+
+def _track_date_range(dates, key, date):
+    """
+    Keep track of the oldest and the newest date per key in `dates`, as a
+    list of one or two dates in ascending order.
+    """
+    known = dates.get(key)
+    if known is None:
+        dates[key] = [date]
+    elif date < known[0]:
+        dates[key] = [date, known[-1]]
+    elif date > known[-1]:
+        dates[key] = [known[0], date]
 
 
 @metrics.wraps("save_event.get_or_create_release_associated_models")
@@ -745,22 +872,53 @@ def _get_or_create_release_associated_models(jobs, projects):
     # XXX: This is possibly unnecessarily detached from
     # _get_or_create_release_many, but we do not want to destroy order of
     # execution right now
+    release_environment_dates = {}
     for job in jobs:
         release = job["release"]
         if not release:
             continue
 
-        project = projects[job["project_id"]]
-        environment = job["environment"]
-        date = job["event"].datetime
+        key = (job["project_id"], release, job["environment"])
+        _track_date_range(release_environment_dates, key, job["event"].datetime)
 
-        ReleaseEnvironment.get_or_create(
-            project=project, release=release, environment=environment, datetime=date
-        )
+    for (project_id, release, environment), dates in release_environment_dates.items():
+        project = projects[project_id]
 
-        ReleaseProjectEnvironment.get_or_create(
-            project=project, release=release, environment=environment, datetime=date
-        )
+        # Rows are created with the oldest event of the batch as first seen,
+        # the newest one then bumps last seen.
+        for date in dates:
+            ReleaseEnvironment.get_or_create(
+                project=project, release=release, environment=environment, datetime=date
+            )
+
+            ReleaseProjectEnvironment.get_or_create(
+                project=project, release=release, environment=environment, datetime=date
+            )
+
+
+@metrics.wraps("save_event.get_or_create_group_release_many")
+def _get_or_create_group_release_many(jobs):
+    group_releases = {}
+    group_release_dates = {}
+    for job in jobs:
+        if not job["release"] or not job["group"]:
+            continue
+
+        key = (job["group"], job["release"], job["environment"])
+        _track_date_range(group_release_dates, key, job["event"].datetime)
+
+    for (group, release, environment), dates in group_release_dates.items():
+        # See `_get_or_create_release_associated_models`.
+        for date in dates:
+            group_releases[(group.id, release.id, environment.id)] = GroupRelease.get_or_create(
+                group=group, release=release, environment=environment, datetime=date
+            )
+
+    for job in jobs:
+        if job["release"] and job["group"]:
+            job["grouprelease"] = group_releases[
+                (job["group"].id, job["release"].id, job["environment"].id)
+            ]
 
 
 @metrics.wraps("save_event.tsdb_record_all_metrics")
@@ -984,12 +1142,44 @@ def get_culprit(data):
     )
 
 
-def _save_aggregate(event, hashes, release, metadata, received_timestamp, **kwargs):
+def _save_aggregate(
+    event,
+    hashes,
+    release,
+    metadata,
+    received_timestamp,
+    grouphashes=None,
+    grouphash_version=None,
+    **kwargs,
+):
     project = event.project
 
-    flat_grouphashes = [
-        GroupHash.objects.get_or_create(project=project, hash=hash)[0] for hash in hashes.hashes
-    ]
+    if grouphashes is None:
+        grouphashes = {}
+
+    use_grouphash_cache = not hashes.hierarchical_hashes and grouphash_cache.is_enabled()
+    if use_grouphash_cache:
+        rv = _save_aggregate_cached(event, hashes, release, metadata, received_timestamp, kwargs)
+        if rv is not None:
+            return rv
+
+        # Grouphashes read from here on are only cached if nothing moved them
+        # in the meantime. Prefetched grouphashes come with the version they
+        # were read at.
+        if grouphash_version is None:
+            grouphash_version = grouphash_cache.get_version(project.id)
+
+    # `grouphashes` may contain grouphashes that have been prefetched for a
+    # whole batch of events, see `_get_grouphashes_many`. Whether they are
+    # associated with a group is re-checked under lock before creating one.
+    flat_grouphashes = []
+    for hash in hashes.hashes:
+        grouphash = grouphashes.get((project.id, hash))
+        if grouphash is None:
+            grouphash = grouphashes[(project.id, hash)] = GroupHash.objects.get_or_create(
+                project=project, hash=hash
+            )[0]
+        flat_grouphashes.append(grouphash)
 
     # The root_hierarchical_hash is the least specific hash within the tree, so
     # typically hierarchical_hashes[0], unless a hash `n` has been split in
@@ -1116,6 +1306,14 @@ def _save_aggregate(event, hashes, release, metadata, received_timestamp, **kwar
                     tags={"platform": event.platform or "unknown"},
                 )
 
+                if use_grouphash_cache:
+                    # The group is not visible to other processes before the
+                    # transaction commits.
+                    transaction.on_commit(
+                        lambda: _cache_grouphashes(project, new_hashes, group, grouphash_version),
+                        using=router.db_for_write(GroupHash),
+                    )
+
                 return group, is_new, is_regression
 
     group = Group.objects.get(id=existing_grouphash.group_id)
@@ -1156,6 +1354,14 @@ def _save_aggregate(event, hashes, release, metadata, received_timestamp, **kwar
             state=GroupHash.State.LOCKED_IN_MIGRATION
         ).update(group=group)
 
+    if use_grouphash_cache:
+        _cache_grouphashes(
+            project,
+            [h for h in flat_grouphashes if h.group_id is not None] + new_hashes,
+            group,
+            grouphash_version,
+        )
+
     is_regression = _process_existing_aggregate(
         group=group, event=event, data=kwargs, release=release
     )
@@ -1163,6 +1369,57 @@ def _save_aggregate(event, hashes, release, metadata, received_timestamp, **kwar
     return group, is_new, is_regression
 
 
+def _save_aggregate_cached(event, hashes, release, metadata, received_timestamp, kwargs):
+    """
+    Fast path of `_save_aggregate` for events whose flat hashes are all known
+    to be associated with a group already. Returns `None` if the grouphashes
+    have to be looked up in the database.
+    """
+    project = event.project
+
+    cached = grouphash_cache.get_many(project.id, hashes.hashes)
+    if len(cached) < len(set(hashes.hashes)):
+        return None
+
+    # Same precedence as in `_find_existing_grouphash`: The first hash that is
+    # associated with a group wins. The group itself is always fetched from
+    # the database as its status is required for regression detection.
+    group = Group.objects.filter(id=cached[hashes.hashes[0]]).first()
+    if group is None:
+        grouphash_cache.invalidate(project.id)
+        return None
+
+    # The grouphashes of groups that are being deleted are deleted as well,
+    # so the database lookup creates a new group for the event.
+    if group.status in (GroupStatus.PENDING_DELETION, GroupStatus.DELETION_IN_PROGRESS):
+        return None
+
+    kwargs["data"] = materialize_metadata(
+        event.data,
+        get_event_type(event.data),
+        metadata,
+    )
+    kwargs["data"]["last_received"] = received_timestamp
+
+    is_regression = _process_existing_aggregate(
+        group=group, event=event, data=kwargs, release=release
+    )
+
+    return group, False, is_regression
+
+
+def _cache_grouphashes(project, grouphashes, group, version):
+    grouphash_cache.set_many(
+        project.id,
+        {
+            h.hash: h.group_id if h.group_id is not None else group.id
+            for h in grouphashes
+            if h.state != GroupHash.State.LOCKED_IN_MIGRATION
+        },
+        version,
+    )
+
+
 def _find_existing_grouphash(
     project,
     flat_grouphashes,
@@ -1687,11 +1944,12 @@ def _calculate_event_grouping(project, event, grouping_config) -> CalculatedHash
         # Here we try to use the grouping config that was requested in the
         # event.  If that config has since been deleted (because it was an
         # experimental grouping config) we fall back to the default.
-        try:
-            hashes = event.get_hashes(grouping_config)
-        except GroupingConfigNotFound:
-            event.data["grouping_config"] = get_grouping_config_dict_for_project(project)
-            hashes = event.get_hashes()
+        with frame_component_cache(enabled=options.get("grouping.use-frame-component-cache")):
+            try:
+                hashes = event.get_hashes(grouping_config)
+            except GroupingConfigNotFound:
+                event.data["grouping_config"] = get_grouping_config_dict_for_project(project)
+                hashes = event.get_hashes()
 
     hashes.write_to_event(event.data)
     return hashes
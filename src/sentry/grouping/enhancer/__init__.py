@@ -11,6 +11,7 @@ from sentry.grouping.component import GroupingComponent
 from sentry.utils.strings import unescape_string
 
 from .actions import Action, FlagAction, VarAction
+from .compiler import CompiledRule
 from .exceptions import InvalidEnhancerConfig
 from .matchers import (
     CalleeMatch,
@@ -116,6 +117,24 @@ class Enhancements:
         self._modifier_rules = [rule for rule in self.iter_rules() if rule.is_modifier]
         self._updater_rules = [rule for rule in self.iter_rules() if rule.is_updater]
 
+        # Rules indexed by the set of families in a stacktrace, see
+        # `_get_rules_for_frames`.
+        self._rules_by_families = {}
+
+    def _get_rules_for_frames(self, rules, match_frames):
+        """Returns the rules that can possibly match any of the given frames
+        as far as their family is concerned, in their original order.
+        """
+        families = frozenset(frame["family"] for frame in match_frames)
+        key = (rules is self._modifier_rules, families)
+        try:
+            return self._rules_by_families[key]
+        except KeyError:
+            rv = self._rules_by_families[key] = [
+                rule for rule in rules if rule._compiled.may_match_families(families)
+            ]
+            return rv
+
     def apply_modifications_to_frame(self, frames, platform, exception_data):
         """This applies the frame modifications to the frames itself.  This
         does not affect grouping.
@@ -125,7 +144,7 @@ class Enhancements:
 
         match_frames = [create_match_frame(frame, platform) for frame in frames]
 
-        for rule in self._modifier_rules:
+        for rule in self._get_rules_for_frames(self._modifier_rules, match_frames):
             for idx, action in rule.get_matching_frame_actions(
                 match_frames, platform, exception_data, cache
             ):
@@ -139,7 +158,7 @@ class Enhancements:
 
         stacktrace_state = StacktraceState()
         # Apply direct frame actions and update the stack state alongside
-        for rule in self._updater_rules:
+        for rule in self._get_rules_for_frames(self._updater_rules, match_frames):
 
             for idx, action in rule.get_matching_frame_actions(
                 match_frames, platform, exception_data, cache
@@ -277,18 +296,14 @@ class Rule:
     def __init__(self, matchers, actions):
         self.matchers = matchers
 
-        self._exception_matchers = []
-        self._other_matchers = []
-        for matcher in matchers:
-            if isinstance(matcher, ExceptionFieldMatch):
-                self._exception_matchers.append(matcher)
-            else:
-                self._other_matchers.append(matcher)
+        self._exception_matchers = [m for m in matchers if isinstance(m, ExceptionFieldMatch)]
 
         self.actions = actions
         self._is_updater = any(action.is_updater for action in actions)
         self._is_modifier = any(action.is_modifier for action in actions)
 
+        self._compiled = CompiledRule(matchers)
+
     @property
     def matcher_description(self):
         rv = " ".join(x.description for x in self.matchers)
@@ -327,11 +342,8 @@ class Rule:
         rv = []
 
         # 2 - Check if frame matchers match
-        for idx, frame in enumerate(frames):
-            if all(
-                m.matches_frame(frames, idx, platform, exception_data, cache)
-                for m in self._other_matchers
-            ):
+        for idx in range(len(frames)):
+            if self._compiled.matches_frame(frames, idx, platform, exception_data, cache):
                 for action in self.actions:
                     rv.append((idx, action))
 
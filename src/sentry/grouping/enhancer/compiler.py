@@ -0,0 +1,126 @@
+"""
+Compiled representation of enhancement rules.
+
+Evaluating enhancements naively means calling every matcher of every rule on
+every frame, most of which ends up in (comparatively expensive) glob matching.
+Compiling a rule extracts cheap necessary conditions from its matchers so
+that most frames can be rejected without running any glob:
+
+* the families the rule is restricted to, if any,
+* literal prefixes of positive ``function``, ``module`` and ``category``
+  patterns (``module:std::*`` can only match modules starting with ``std::``).
+
+Rules whose matchers only look at the frame itself (no caller/callee
+matchers) additionally memoize their result per match frame. Since the same
+frames show up in event after event, results are kept in a bounded
+process-wide cache keyed by the values of the match frame.
+"""
+
+from sentry.utils.datastructures import LRUCache
+
+from .matchers import (
+    CalleeMatch,
+    CallerMatch,
+    ExceptionFieldMatch,
+    FamilyMatch,
+    FrameFieldMatch,
+    FunctionMatch,
+)
+
+# Maximum number of distinct match frames to remember results for.
+FRAME_CACHE_SIZE = 50000
+
+# Characters with special meaning in glob patterns. Everything before the
+# first of those is matched literally.
+GLOB_SPECIAL_CHARS = b"*?[]{}\\"
+
+_frame_cache = LRUCache(FRAME_CACHE_SIZE)
+
+
+def get_literal_prefix(pattern):
+    """
+    Returns the literal prefix of an (encoded) glob pattern, that is the part
+    every value matching the pattern has to start with.
+    """
+    for idx, char in enumerate(pattern):
+        if char in GLOB_SPECIAL_CHARS:
+            return pattern[:idx]
+    return pattern
+
+
+def get_match_frame_key(match_frame):
+    # Match frames are created with a fixed set of keys in a fixed order by
+    # `create_match_frame`, and actions only modify existing keys.
+    return tuple(match_frame.values())
+
+
+class CompiledRule:
+    def __init__(self, matchers):
+        self.matchers = tuple(m for m in matchers if not isinstance(m, ExceptionFieldMatch))
+
+        self.families = None
+        self.prefixes = []
+        for matcher in self.matchers:
+            # Only positive frame matchers (not caller/callee matchers)
+            # impose conditions on the frame itself.
+            if getattr(matcher, "negated", True):
+                continue
+
+            if isinstance(matcher, FamilyMatch):
+                if b"all" in matcher._flags:
+                    continue
+                if self.families is None:
+                    self.families = frozenset(matcher._flags)
+                else:
+                    self.families &= matcher._flags
+            elif isinstance(matcher, FunctionMatch):
+                prefix = get_literal_prefix(matcher._encoded_pattern)
+                if prefix:
+                    self.prefixes.append(("function", prefix))
+            elif isinstance(matcher, FrameFieldMatch):
+                prefix = get_literal_prefix(matcher._encoded_pattern)
+                if prefix:
+                    self.prefixes.append((matcher.field, prefix))
+
+        # Caller and callee matchers depend on the neighbouring frames, so
+        # the result cannot be memoized for the frame alone.
+        self.is_frame_local = not any(
+            isinstance(m, (CallerMatch, CalleeMatch)) for m in self.matchers
+        )
+
+    def may_match_families(self, families):
+        return self.families is None or not self.families.isdisjoint(families)
+
+    def matches_frame(self, frames, idx, platform, exception_data, cache):
+        match_frame = frames[idx]
+
+        if self.families is not None and match_frame["family"] not in self.families:
+            return False
+
+        for field, prefix in self.prefixes:
+            value = match_frame[field]
+            if value is None or not value.startswith(prefix):
+                return False
+
+        if not self.is_frame_local:
+            return self._matches_frame(frames, idx, platform, exception_data, cache)
+
+        frame_key = get_match_frame_key(match_frame)
+        results = _frame_cache.get(frame_key)
+        if results is None:
+            results = {}
+            _frame_cache.set(frame_key, results)
+
+        # Frame matchers are interned (see `FrameMatch.from_key`), so the
+        # tuple of matchers identifies the rule across events.
+        rv = results.get(self.matchers)
+        if rv is None:
+            rv = results[self.matchers] = self._matches_frame(
+                frames, idx, platform, exception_data, cache
+            )
+        return rv
+
+    def _matches_frame(self, frames, idx, platform, exception_data, cache):
+        return all(
+            m.matches_frame(frames, idx, platform, exception_data, cache) for m in self.matchers
+        )
@@ -0,0 +1,165 @@
+"""
+A two-tier cache mapping grouphashes to the group they are associated with.
+
+Most events are grouped into long-lived groups through a small set of hashes,
+which means that the ``GroupHash`` lookups in ``_save_aggregate`` return the
+same result over and over again. This caches ``(project_id, hash) ->
+group_id`` in a bounded in-process LRU in front of the shared Django cache.
+
+Entries are versioned per project. Anything that moves grouphashes between
+groups (merge, unmerge, discard, deletion) calls ``invalidate``, which bumps
+the version and thereby invalidates all entries for the project. Versions are
+remembered per process for ``VERSION_TTL`` seconds, which is how long it takes
+for an invalidation to reach all processes. Invalidations happen once the
+transaction moving the grouphashes has committed, and entries are only written
+if the version in the shared cache did not change since the grouphashes were
+read, so that concurrent saves cannot cache the mapping from before the move.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import router, transaction
+
+from sentry import options
+from sentry.utils import metrics
+from sentry.utils.datastructures import LRUCache
+
+CACHE_TIMEOUT = 3600
+
+# Entries in the local tier are still validated against the project version
+# on every lookup, the TTL only bounds how long unused entries stay around.
+LOCAL_CACHE_TTL = 300
+LOCAL_CACHE_SIZE = 10000
+
+# Seconds project versions are remembered per process.
+VERSION_TTL = 10
+
+# Number of project versions remembered per process.
+MAX_VERSIONS = 1000
+
+_local_cache = LRUCache(LOCAL_CACHE_SIZE, ttl=LOCAL_CACHE_TTL)
+_versions = LRUCache(MAX_VERSIONS, ttl=VERSION_TTL)
+
+
+def is_enabled():
+    return options.get("store.use-grouphash-cache")
+
+
+def _get_version_key(project_id):
+    return f"grouphash-group:v:{project_id}"
+
+
+def _get_cache_key(project_id, version, hash):
+    return f"grouphash-group:{project_id}:{version}:{hash}"
+
+
+def get_version(project_id, local=True):
+    """
+    Returns the current version of the cached grouphashes of a project.
+    Callers pass it to ``set_many`` after reading the grouphashes. With
+    ``local=False``, the version remembered by this process is not used.
+    """
+    if local:
+        version = _versions.get(project_id)
+        if version is not None:
+            return version
+
+    key = _get_version_key(project_id)
+    version = cache.get(key)
+    if version is None:
+        # Never restart at a version that has been used before, otherwise
+        # entries that were invalidated could become visible again after
+        # the version key has been evicted.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    if version is not None:
+        _versions.set(project_id, version)
+    return version
+
+
+def get_many(project_id, hashes):
+    """
+    Returns a dictionary of the given hashes to the id of the group they are
+    associated with. Hashes that are not cached are omitted.
+    """
+    if not hashes:
+        return {}
+
+    version = get_version(project_id)
+    if version is None:
+        return {}
+
+    rv = {}
+    missing = []
+    for hash in hashes:
+        group_id = _local_cache.get(_get_cache_key(project_id, version, hash))
+        if group_id is None:
+            missing.append(hash)
+        else:
+            rv[hash] = group_id
+
+    if missing:
+        keys = {_get_cache_key(project_id, version, hash): hash for hash in missing}
+        for key, group_id in cache.get_many(list(keys)).items():
+            rv[keys[key]] = group_id
+            _local_cache.set(key, group_id)
+
+    metrics.incr("grouping.grouphash_cache.hits", amount=len(rv), skip_internal=True)
+    metrics.incr(
+        "grouping.grouphash_cache.local_hits",
+        amount=len(hashes) - len(missing),
+        skip_internal=True,
+    )
+    metrics.incr(
+        "grouping.grouphash_cache.misses", amount=len(hashes) - len(rv), skip_internal=True
+    )
+
+    return rv
+
+
+def set_many(project_id, group_ids, version):
+    """
+    Cache the given mapping of hashes to group ids, which was read from the
+    database at ``version``. Nothing is cached if the grouphashes of the
+    project have been invalidated since.
+    """
+    if not group_ids or version is None:
+        return
+
+    if get_version(project_id, local=False) != version:
+        metrics.incr("grouping.grouphash_cache.set_skipped", skip_internal=True)
+        return
+
+    values = {}
+    for hash, group_id in group_ids.items():
+        key = _get_cache_key(project_id, version, hash)
+        values[key] = group_id
+        _local_cache.set(key, group_id)
+
+    cache.set_many(values, CACHE_TIMEOUT)
+
+
+def invalidate(project_id):
+    """
+    Invalidate all cached grouphashes of a project.
+    """
+    key = _get_version_key(project_id)
+    try:
+        _versions.set(project_id, cache.incr(key))
+    except ValueError:
+        # The version key does not exist (anymore), the next lookup
+        # initializes it with a version that has not been used before.
+        _versions.delete(project_id)
+    metrics.incr("grouping.grouphash_cache.invalidate", skip_internal=True)
+
+
+def invalidate_on_commit(project_id):
+    """
+    Invalidate all cached grouphashes of a project once the current
+    transaction has committed. Invalidating earlier would allow concurrent
+    saves to cache the grouphashes as they were before the transaction.
+    """
+    from sentry.models import GroupHash
+
+    transaction.on_commit(lambda: invalidate(project_id), using=router.db_for_write(GroupHash))
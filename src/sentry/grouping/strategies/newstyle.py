@@ -1,5 +1,7 @@
 import re
-from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Generator, List, Optional, Tuple
 
 from sentry.eventstore.models import Event
 from sentry.grouping.component import GroupingComponent, calculate_tree_label
@@ -18,6 +20,8 @@ from sentry.interfaces.exception import SingleException
 from sentry.interfaces.stacktrace import Frame, Stacktrace
 from sentry.interfaces.threads import Threads
 from sentry.stacktraces.platform import get_behavior_family_for_platform
+from sentry.utils import metrics
+from sentry.utils.datastructures import LRUCache
 from sentry.utils.iterators import shingle
 
 _ruby_erb_func = re.compile(r"__\d{4,}_\d{4,}$")
@@ -61,6 +65,27 @@ RECURSION_COMPARISON_FIELDS = [
 # TODO(markus)
 StacktraceEncoderReturnValue = Any
 
+# Frame components only depend on the frame and the grouping config, and the
+# same frames show up in many events. See `frame`.
+FRAME_COMPONENT_CACHE_SIZE = 10000
+FRAME_COMPONENT_CACHE_METRICS_SAMPLE_RATE = 0.1
+
+_frame_component_cache = LRUCache(FRAME_COMPONENT_CACHE_SIZE)
+_frame_component_cache_enabled: ContextVar[bool] = ContextVar(
+    "frame_component_cache_enabled", default=False
+)
+
+
+@contextmanager
+def frame_component_cache(enabled: bool = True) -> Generator[None, None, None]:
+    """Enables the cross-event frame component cache for grouping done
+    within this block."""
+    token = _frame_component_cache_enabled.set(enabled)
+    try:
+        yield
+    finally:
+        _frame_component_cache_enabled.reset(token)
+
 
 def is_recursion_v1(frame1: Frame, frame2: Frame) -> bool:
     """
@@ -300,6 +325,57 @@ def frame(
     frame = interface
     platform = frame.platform or event.platform
 
+    # The tree label of hierarchical grouping contains the datapath of the
+    # frame, which makes the component specific to the event.
+    if not _frame_component_cache_enabled.get() or context["hierarchical_grouping"]:
+        return {context["variant"]: _get_frame_component(frame, platform, context)}
+
+    cache_key = _get_frame_component_cache_key(frame, platform, context)
+    metric_tags = {"strategy": meta["strategy"].id}
+
+    # Components are mutated when assembling the stacktrace (e.g. by
+    # enhancements), so only copies of the cached component are handed out.
+    rv = _frame_component_cache.get(cache_key)
+    if rv is not None:
+        metric_tags["result"] = "hit"
+        rv = rv.deep_copy()
+    else:
+        metric_tags["result"] = "miss"
+        rv = _get_frame_component(frame, platform, context)
+        _frame_component_cache.set(cache_key, rv.deep_copy())
+
+    metrics.incr(
+        "grouping.frame_component_cache",
+        tags=metric_tags,
+        sample_rate=FRAME_COMPONENT_CACHE_METRICS_SAMPLE_RATE,
+    )
+
+    return {context["variant"]: rv}
+
+
+def _get_frame_component_cache_key(
+    frame: Frame, platform: Optional[str], context: GroupingContext
+) -> Tuple[Any, ...]:
+    # Everything `_get_frame_component` looks at. The grouping config id
+    # determines the initial context, so it covers all config flags.
+    return (
+        context.config.id,
+        context["is_recursion"],
+        platform,
+        frame.abs_path,
+        frame.filename,
+        frame.module,
+        frame.function,
+        frame.raw_function,
+        frame.package,
+        frame.context_line,
+        bool(frame.data and frame.data.get("sourcemap") is not None),
+    )
+
+
+def _get_frame_component(
+    frame: Frame, platform: Optional[str], context: GroupingContext
+) -> GroupingComponent:
     # Safari throws [native code] frames in for calls like ``forEach``
     # whereas Chrome ignores these. Let's remove it from the hashing algo
     # so that they're more likely to group together
@@ -428,7 +504,7 @@ def frame(
             # show.
             rv.tree_label = None
 
-    return {context["variant"]: rv}
+    return rv
 
 
 def get_contextline_component(
@@ -0,0 +1,192 @@
+"""
+On-disk store of release archives (artifact bundles) for processing workers.
+
+Looking up a file in a release archive means fetching the whole archive,
+which is only cached in the shared cache if it is small enough. Large
+bundles are therefore downloaded again for every file that is not cached
+individually yet.
+
+The store keeps bundles in a local directory shared by all workers of a
+machine, keyed by release, dist and archive ident (archives are never
+modified after upload, new uploads get a new ident). Bundles are opened with
+``mmap`` and the offsets of all members are computed once when a bundle is
+opened, so reading a file does not go through ``zipfile`` and stored
+(uncompressed) members are sliced straight out of the mapping. Members
+compressed with methods other than deflate are read with ``zipfile``. The
+least recently used bundles are deleted once the directory exceeds
+``max_size`` bytes.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zipfile
+import zlib
+from typing import IO, Callable, Optional, Tuple
+
+from sentry.utils import json, metrics
+from sentry.utils.datastructures import LRUCache
+
+# Number of bundles kept mapped per process.
+MAX_OPEN_BUNDLES = 32
+
+# Local file header (see `zipfile._FH`): the name and extra field lengths are
+# the last two fields.
+_local_file_header = struct.Struct("<4s2B4HL2L2H")
+
+
+class MappedBundle:
+    """
+    A release archive that is read through a memory mapping.
+    """
+
+    def __init__(self, path: str):
+        # The file is kept open for members that are read through `zipfile`,
+        # since the bundle may be evicted from disk while it is mapped.
+        self._file = open(path, "rb")
+        self._file_lock = threading.Lock()
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        with zipfile.ZipFile(self._file) as zip_file:
+            infos = zip_file.infolist()
+
+        # filename -> (offset, compressed size, compression)
+        self._members = {}
+        for info in infos:
+            header = _local_file_header.unpack_from(self._mmap, info.header_offset)
+            offset = info.header_offset + _local_file_header.size + header[-2] + header[-1]
+            self._members[info.filename] = (offset, info.compress_size, info.compress_type)
+
+        self.manifest = json.loads(self.read("manifest.json").decode("utf-8"))
+        self._entries_by_url = {
+            entry["url"]: (filename, entry)
+            for filename, entry in self.manifest.get("files", {}).items()
+        }
+
+    def read(self, filename: str) -> bytes:
+        offset, size, compression = self._members[filename]
+        if compression == zipfile.ZIP_STORED:
+            return self._mmap[offset : offset + size]
+        if compression == zipfile.ZIP_DEFLATED:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            return decompressor.decompress(self._mmap[offset : offset + size])
+
+        # Other methods (bzip2, lzma) are rare, leave them to `zipfile`.
+        with self._file_lock, zipfile.ZipFile(self._file) as zip_file:
+            return zip_file.read(filename)
+
+    def get_file_by_url(self, url: str) -> Tuple[bytes, dict]:
+        """
+        Return the contents and headers of a file.
+
+        May raise ``KeyError``
+        """
+        filename, entry = self._entries_by_url[url]
+        return self.read(filename), entry.get("headers", {})
+
+
+class ArtifactBundleStore:
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self._bundles = LRUCache(MAX_OPEN_BUNDLES)
+        self._lock = threading.Lock()
+
+    def _get_path(self, release_id: int, dist_id: Optional[int], archive_ident: str) -> str:
+        name = hashlib.sha1(f"{release_id}:{dist_id}:{archive_ident}".encode()).hexdigest()
+        return os.path.join(self.path, name[:2], name + ".zip")
+
+    def get(
+        self,
+        release_id: int,
+        dist_id: Optional[int],
+        archive_ident: str,
+        fetch: Callable[[], Optional[IO]],
+    ) -> Optional[MappedBundle]:
+        """
+        Return the mapped bundle, materializing it from the file object
+        returned by ``fetch`` if it is not stored yet.
+        """
+        path = self._get_path(release_id, dist_id, archive_ident)
+
+        bundle = self._bundles.get(path)
+        if bundle is not None:
+            metrics.incr("sourcemaps.bundle_store", tags={"result": "mapped"}, skip_internal=True)
+            return bundle
+
+        try:
+            # Keep track of usage for eviction.
+            os.utime(path)
+        except FileNotFoundError:
+            metrics.incr("sourcemaps.bundle_store", tags={"result": "miss"}, skip_internal=True)
+            fileobj = fetch()
+            if fileobj is None:
+                return None
+            with fileobj:
+                self._store(path, fileobj)
+        else:
+            metrics.incr("sourcemaps.bundle_store", tags={"result": "disk"}, skip_internal=True)
+
+        bundle = MappedBundle(path)
+        self._bundles.set(path, bundle)
+        return bundle
+
+    def _store(self, path: str, fileobj: IO):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so that other workers never see
+        # partially written bundles.
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = fileobj.read(65536)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        metrics.timing("sourcemaps.bundle_store.size", os.path.getsize(path))
+        self.evict()
+
+    def evict(self):
+        """
+        Delete the least recently used bundles until the store fits into
+        ``max_size``. Bundles that are still mapped by any process stay
+        readable until they are closed.
+        """
+        with self._lock:
+            entries = []
+            total_size = 0
+            for dirpath, _, filenames in os.walk(self.path):
+                for filename in filenames:
+                    if not filename.endswith(".zip"):
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total_size += stat.st_size
+
+            if total_size <= self.max_size:
+                return
+
+            evicted = 0
+            for _, size, path in sorted(entries):
+                if total_size <= self.max_size:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                self._bundles.delete(path)
+                total_size -= size
+                evicted += 1
+
+            metrics.incr("sourcemaps.bundle_store.evicted", amount=evicted, skip_internal=True)
@@ -2,7 +2,7 @@ from symbolic import SourceView
 
 from sentry.utils.strings import codec_lookup
 
-__all__ = ["SourceCache", "SourceMapCache"]
+__all__ = ["SourceCache", "SourceMapCache", "make_source_view"]
 
 
 def is_utf8(codec):
@@ -10,6 +10,20 @@ def is_utf8(codec):
     return name in ("utf-8", "ascii")
 
 
+def make_source_view(source, encoding=None):
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    # If an encoding is provided and it's not utf-8 compatible
+    # we try to re-encoding the source and create a source view
+    # from it.
+    elif encoding is not None and not is_utf8(encoding):
+        try:
+            source = source.decode(encoding).encode("utf-8")
+        except UnicodeError:
+            pass
+    return SourceView.from_bytes(source)
+
+
 class SourceCache:
     def __init__(self):
         self._cache = {}
@@ -40,17 +54,7 @@ class SourceCache:
         url = self._get_canonical_url(url)
 
         if not isinstance(source, SourceView):
-            if isinstance(source, str):
-                source = source.encode("utf-8")
-            # If an encoding is provided and it's not utf-8 compatible
-            # we try to re-encoding the source and create a source view
-            # from it.
-            elif encoding is not None and not is_utf8(encoding):
-                try:
-                    source = source.decode(encoding).encode("utf-8")
-                except UnicodeError:
-                    pass
-            source = SourceView.from_bytes(source)
+            source = make_source_view(source, encoding)
         self._cache[url] = source
 
     def add_error(self, url, error):
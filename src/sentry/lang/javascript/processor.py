@@ -1,22 +1,27 @@
 import base64
 import errno
+import hashlib
 import logging
+import operator
+import os
 import re
 import sys
 import time
 import zlib
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from os.path import splitext
-from typing import IO, Optional, Tuple
+from typing import IO, Optional, Tuple, Union
 from urllib.parse import urlsplit
 
 import sentry_sdk
+from django import db
 from django.conf import settings
 from django.utils.encoding import force_bytes, force_text
 from requests.utils import get_encoding_from_headers
 from symbolic import SourceMapView
 
-from sentry import http
+from sentry import http, options
 from sentry.interfaces.stacktrace import Stacktrace
 from sentry.models import EventError, Organization, ReleaseFile
 from sentry.models.releasefile import ARTIFACT_INDEX_FILENAME, ReleaseArchive, read_artifact_index
@@ -27,6 +32,7 @@ from sentry.utils import json, metrics
 # holding the results of attempting to fetch both kinds of files, either from the
 # database or from the internet
 from sentry.utils.cache import cache
+from sentry.utils.datastructures import LRUCache
 from sentry.utils.files import compress_file
 from sentry.utils.hashlib import md5_text
 from sentry.utils.http import is_valid_origin
@@ -34,7 +40,8 @@ from sentry.utils.retries import ConditionalRetryPolicy, exponential_delay
 from sentry.utils.safe import get_path
 from sentry.utils.urls import non_standard_url_join
 
-from .cache import SourceCache, SourceMapCache
+from .bundle_store import ArtifactBundleStore, MappedBundle
+from .cache import SourceCache, SourceMapCache, make_source_view
 
 __all__ = ["JavaScriptStacktraceProcessor"]
 
@@ -72,6 +79,9 @@ CACHE_MAX_VALUE_SIZE = settings.SENTRY_CACHE_MAX_VALUE_SIZE
 
 logger = logging.getLogger(__name__)
 
+_parsed_artifact_cache = None
+_artifact_bundle_store = None
+
 
 class UnparseableSourcemap(http.BadSource):
     error_type = EventError.JS_INVALID_SOURCEMAP
@@ -299,36 +309,97 @@ def result_from_cache(filename, result):
     return http.UrlResult(filename, result[0], zlib.decompress(result[1]), result[2], encoding)
 
 
+class PrefetchedArtifacts:
+    """
+    Release artifact cache entries and release files looked up in bulk by
+    ``prefetch_release_artifacts``.
+    """
+
+    def __init__(self, results, releasefiles, idents):
+        # cache key -> cached value, `None` if it was not cached
+        self.results = results
+        # ident -> ReleaseFile
+        self.releasefiles = releasefiles
+        # all idents that were looked up in the database
+        self.idents = idents
+
+    def get_cached(self, cache_key):
+        if cache_key in self.results:
+            return self.results[cache_key]
+        return cache.get(cache_key)
+
+    def get_release_files(self, release, dist, filename_idents):
+        if self.idents.issuperset(filename_idents):
+            return [self.releasefiles[i] for i in filename_idents if i in self.releasefiles]
+        return get_release_files(release, dist, filename_idents)
+
+
+def get_filename_idents(filename, dist):
+    dist_name = dist and dist.name or None
+    return [ReleaseFile.get_ident(f, dist_name) for f in ReleaseFile.normalize(filename)]
+
+
+def get_release_files(release, dist, filename_idents):
+    return list(
+        ReleaseFile.objects.filter(
+            release_id=release.id,
+            dist_id=dist.id if dist else dist,
+            ident__in=filename_idents,
+        ).select_related("file")
+    )
+
+
+@metrics.wraps("sourcemaps.prefetch_release_artifacts")
+def prefetch_release_artifacts(urls, release, dist=None):
+    """
+    Look up the cached release artifacts of all ``urls`` with a single
+    ``cache.get_many`` and the release files of the ones that are not cached
+    with a single query. The result can be passed to ``fetch_file``.
+    """
+    cache_keys = {get_cache_keys(url, release, dist)[0]: url for url in urls}
+    results = dict.fromkeys(cache_keys)
+    results.update(cache.get_many(list(cache_keys)))
+
+    idents = set()
+    for cache_key, url in cache_keys.items():
+        if results[cache_key] is None:
+            idents.update(get_filename_idents(url, dist))
+
+    releasefiles = {}
+    if idents:
+        releasefiles = {rf.ident: rf for rf in get_release_files(release, dist, list(idents))}
+
+    return PrefetchedArtifacts(results, releasefiles, idents)
+
+
 @metrics.wraps("sourcemaps.release_file")
-def fetch_release_file(filename, release, dist=None):
+def fetch_release_file(filename, release, dist=None, prefetched=None):
     """
     Attempt to retrieve a release artifact from the database.
 
     Caches the result of that attempt (whether successful or not).
     """
-    dist_name = dist and dist.name or None
     cache_key, cache_key_meta = get_cache_keys(filename, release, dist)
 
     logger.debug("Checking cache for release artifact %r (release_id=%s)", filename, release.id)
-    result = cache.get(cache_key)
+    if prefetched is not None:
+        result = prefetched.get_cached(cache_key)
+    else:
+        result = cache.get(cache_key)
 
     # not in the cache (meaning we haven't checked the database recently), so check the database
     if result is None:
         with metrics.timer("sourcemaps.release_artifact_from_file"):
-            filename_choices = ReleaseFile.normalize(filename)
-            filename_idents = [ReleaseFile.get_ident(f, dist_name) for f in filename_choices]
+            filename_idents = get_filename_idents(filename, dist)
 
             logger.debug(
                 "Checking database for release artifact %r (release_id=%s)", filename, release.id
             )
 
-            possible_files = list(
-                ReleaseFile.objects.filter(
-                    release_id=release.id,
-                    dist_id=dist.id if dist else dist,
-                    ident__in=filename_idents,
-                ).select_related("file")
-            )
+            if prefetched is not None:
+                possible_files = prefetched.get_release_files(release, dist, filename_idents)
+            else:
+                possible_files = get_release_files(release, dist, filename_idents)
 
             if len(possible_files) == 0:
                 logger.debug(
@@ -378,7 +449,9 @@ def fetch_release_file(filename, release, dist=None):
 
 
 @metrics.wraps("sourcemaps.get_from_archive")
-def get_from_archive(url: str, archive: ReleaseArchive) -> Tuple[bytes, dict]:
+def get_from_archive(
+    url: str, archive: Union[ReleaseArchive, MappedBundle]
+) -> Tuple[Union[IO, bytes], dict]:
     candidates = ReleaseFile.normalize(url)
     for candidate in candidates:
         try:
@@ -441,11 +514,17 @@ def fetch_release_archive_for_url(release, dist, url) -> Optional[IO]:
         # is not yet known
         return None
 
-    archive_ident = info["archive_ident"]
-
     # TODO(jjbayer): Could already extract filename from info and return
     # it later
 
+    return fetch_release_archive(release, dist, info["archive_ident"])
+
+
+def fetch_release_archive(release, dist, archive_ident) -> Optional[IO]:
+    """Fetch the release archive with the given ident and cache if possible.
+
+    If return value is not empty, the caller is responsible for closing the stream.
+    """
     cache_key = get_release_file_cache_key(release_id=release.id, releasefile_ident=archive_ident)
 
     result = cache.get(cache_key)
@@ -481,13 +560,44 @@ def fetch_release_archive_for_url(release, dist, url) -> Optional[IO]:
             return file_
 
 
+def get_artifact_bundle_store() -> Optional[ArtifactBundleStore]:
+    global _artifact_bundle_store
+    max_size = options.get("processing.artifact-bundle-store-size")
+    if not max_size:
+        return None
+    path = os.path.join(options.get("releasefile.cache-path"), "bundles")
+    if (
+        _artifact_bundle_store is None
+        or _artifact_bundle_store.path != path
+        or _artifact_bundle_store.max_size != max_size
+    ):
+        _artifact_bundle_store = ArtifactBundleStore(path, max_size)
+    return _artifact_bundle_store
+
+
+@metrics.wraps("sourcemaps.get_artifact_bundle")
+def get_artifact_bundle(bundle_store, release, dist, url) -> Optional[MappedBundle]:
+    """Get the locally stored artifact bundle containing `url`, if any."""
+    info = get_index_entry(release, dist, url)
+    if info is None:
+        return None
+
+    archive_ident = info["archive_ident"]
+    return bundle_store.get(
+        release.id,
+        dist.id if dist else None,
+        archive_ident,
+        lambda: fetch_release_archive(release, dist, archive_ident),
+    )
+
+
 def compress(fp: IO) -> Tuple[bytes, bytes]:
     """Alternative for compress_file when fp does not support chunks"""
     content = fp.read()
     return zlib.compress(content), content
 
 
-def fetch_release_artifact(url, release, dist):
+def fetch_release_artifact(url, release, dist, prefetched=None):
     """
     Get a release artifact either by extracting it or fetching it directly.
 
@@ -497,7 +607,10 @@ def fetch_release_artifact(url, release, dist):
     """
     cache_key, cache_key_meta = get_cache_keys(url, release, dist)
 
-    result = cache.get(cache_key)
+    if prefetched is not None:
+        result = prefetched.get_cached(cache_key)
+    else:
+        result = cache.get(cache_key)
 
     if result == -1:  # Cached as unavailable
         return None
@@ -506,6 +619,41 @@ def fetch_release_artifact(url, release, dist):
         return result_from_cache(url, result)
 
     start = time.monotonic()
+
+    bundle_store = get_artifact_bundle_store()
+    if bundle_store is not None:
+        try:
+            bundle = get_artifact_bundle(bundle_store, release, dist, url)
+        except Exception as exc:
+            # Fall back to reading the archive directly.
+            logger.error("sourcemaps.bundle_store_failed", exc_info=exc)
+            bundle = None
+
+        if bundle is not None:
+            try:
+                body, headers = get_from_archive(url, bundle)
+            except KeyError:
+                # The manifest mapped the url to an archive, but the file
+                # is not there.
+                logger.error("Release artifact %r not found in artifact bundle", url)
+                cache.set(cache_key, -1, 60)
+                return None
+            else:
+                result = fetch_and_cache_artifact(
+                    url,
+                    lambda: BytesIO(body),
+                    cache_key,
+                    cache_key_meta,
+                    headers,
+                    compress_fn=compress,
+                )
+                metrics.timing(
+                    "sourcemaps.release_artifact_from_archive",
+                    time.monotonic() - start,
+                    tags={"bundle_store": True},
+                )
+                return result
+
     archive_file = fetch_release_archive_for_url(release, dist, url)
     if archive_file is not None:
         try:
@@ -555,12 +703,12 @@ def fetch_release_artifact(url, release, dist):
 
     # Fall back to maintain compatibility with old releases and versions of
     # sentry-cli which upload files individually
-    result = fetch_release_file(url, release, dist)
+    result = fetch_release_file(url, release, dist, prefetched=prefetched)
 
     return result
 
 
-def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True):
+def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True, prefetched=None):
     """
     Pull down a URL, returning a UrlResult object.
 
@@ -568,6 +716,8 @@ def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True):
     event), then the internet. Caches the result of each of those two attempts
     separately, whether or not those attempts are successful. Used for both
     source files and source maps.
+
+    ``prefetched`` are the results of ``prefetch_release_artifacts``, if any.
     """
     # If our url has been truncated, it'd be impossible to fetch
     # so we check for this early and bail
@@ -576,7 +726,7 @@ def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True):
 
     # if we've got a release to look on, try that first (incl associated cache)
     if release:
-        result = fetch_release_artifact(url, release, dist)
+        result = fetch_release_artifact(url, release, dist, prefetched=prefetched)
     else:
         result = None
 
@@ -694,7 +844,63 @@ def get_max_age(headers):
     return min(max_age, CACHE_CONTROL_MAX)
 
 
-def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=True):
+def get_parsed_artifact_cache():
+    """
+    Returns the per-process cache of parsed source maps and source views,
+    which is bounded by the total size of the raw artifacts in bytes.
+    """
+    global _parsed_artifact_cache
+    max_size = options.get("processing.parsed-artifact-cache-size")
+    if not max_size:
+        return None
+    if _parsed_artifact_cache is None or _parsed_artifact_cache.max_size != max_size:
+        _parsed_artifact_cache = LRUCache(max_size, weigh=operator.itemgetter(1))
+    return _parsed_artifact_cache
+
+
+def get_parsed_artifact(kind, url, body, release, dist, parse):
+    """
+    Returns ``parse(body)``, reusing the result of previous events for the
+    same artifact. Entries are keyed by the checksum of the artifact, so
+    artifacts that changed are never served from the cache.
+    """
+    parsed_artifact_cache = get_parsed_artifact_cache()
+    if parsed_artifact_cache is None:
+        return parse(body)
+
+    key = (
+        kind,
+        release.id if release else None,
+        dist.id if dist else None,
+        url,
+        hashlib.sha1(body).hexdigest(),
+    )
+    rv = parsed_artifact_cache.get(key)
+    metrics.incr(
+        "sourcemaps.parsed_artifact_cache",
+        tags={"kind": kind, "result": "miss" if rv is None else "hit"},
+        skip_internal=True,
+    )
+    if rv is not None:
+        return rv[0]
+
+    value = parse(body)
+    parsed_artifact_cache.set(key, (value, len(body)))
+    return value
+
+
+def parse_sourcemap(url, body):
+    try:
+        return SourceMapView.from_json_bytes(body)
+    except Exception as exc:
+        # This is in debug because the product shows an error already.
+        logger.debug(str(exc), exc_info=True)
+        raise UnparseableSourcemap({"url": http.expose_url(url)})
+
+
+def fetch_sourcemap(
+    url, project=None, release=None, dist=None, allow_scraping=True, prefetched=None
+):
     if is_data_uri(url):
         try:
             body = base64.b64decode(
@@ -711,14 +917,38 @@ def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=T
             release=release,
             dist=dist,
             allow_scraping=allow_scraping,
+            prefetched=prefetched,
         )
         body = result.body
-    try:
-        return SourceMapView.from_json_bytes(body)
-    except Exception as exc:
-        # This is in debug because the product shows an error already.
-        logger.debug(str(exc), exc_info=True)
-        raise UnparseableSourcemap({"url": http.expose_url(url)})
+
+    return get_parsed_artifact(
+        "sourcemap",
+        # Inline source maps are identified by their contents alone.
+        None if is_data_uri(url) else url,
+        body,
+        release,
+        dist,
+        lambda body: parse_sourcemap(url, body),
+    )
+
+
+def fetch_concurrently(fetch, items, concurrency):
+    """
+    Returns ``[fetch(item) for item in items]``, running up to
+    ``concurrency`` fetches at a time.
+    """
+    if concurrency <= 1 or len(items) <= 1:
+        return [fetch(item) for item in items]
+
+    def run(item):
+        try:
+            return fetch(item)
+        finally:
+            # Worker threads have their own database connections.
+            db.connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as executor:
+        return list(executor.map(run, items))
 
 
 def is_data_uri(url):
@@ -1089,16 +1319,25 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
         Look for and (if found) cache a source file and its associated source
         map (if any).
         """
-
-        sourcemaps = self.sourcemaps
-        cache = self.cache
-
         self.fetch_count += 1
 
         if self.fetch_count > self.max_fetches:
-            cache.add_error(filename, {"type": EventError.JS_TOO_MANY_REMOTE_SOURCES})
+            self.cache.add_error(filename, {"type": EventError.JS_TOO_MANY_REMOTE_SOURCES})
+            return
+
+        result = self.fetch_source(filename)
+        sourcemap_url = self.add_source(filename, result)
+        if not sourcemap_url or sourcemap_url in self.sourcemaps:
             return
 
+        self.add_sourcemap(filename, sourcemap_url, self.fetch_sourcemap(sourcemap_url))
+
+    def fetch_source(self, filename, prefetched=None):
+        """
+        Fetch a source file. Returns either the ``UrlResult`` or the
+        ``BadSource`` exception. Does not modify the processor, so this is
+        safe to call concurrently.
+        """
         # TODO: respect cache-control/max-age headers to some extent
         logger.debug("Attempting to cache source %r", filename)
         try:
@@ -1107,62 +1346,94 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 op="JavaScriptStacktraceProcessor.cache_source.fetch_file"
             ) as span:
                 span.set_data("filename", filename)
-                result = fetch_file(
+                return fetch_file(
                     filename,
                     project=self.project,
                     release=self.release,
                     dist=self.dist,
                     allow_scraping=self.allow_scraping,
+                    prefetched=prefetched,
                 )
         except http.BadSource as exc:
+            return exc
+
+    def fetch_sourcemap(self, sourcemap_url, prefetched=None):
+        """
+        Fetch and parse a source map. Returns either the ``SourceMapView`` or
+        the ``BadSource`` exception. Safe to call concurrently.
+        """
+        try:
+            with sentry_sdk.start_span(
+                op="JavaScriptStacktraceProcessor.cache_source.fetch_sourcemap"
+            ) as span:
+                span.set_data("sourcemap_url", sourcemap_url)
+                return fetch_sourcemap(
+                    sourcemap_url,
+                    project=self.project,
+                    release=self.release,
+                    dist=self.dist,
+                    allow_scraping=self.allow_scraping,
+                    prefetched=prefetched,
+                )
+        except http.BadSource as exc:
+            return exc
+
+    def add_source(self, filename, result):
+        """
+        Cache the result of ``fetch_source``. Returns the url of the source
+        map of the file, if any.
+        """
+        cache = self.cache
+
+        if isinstance(result, http.BadSource):
             # most people don't upload release artifacts for their third-party libraries,
             # so ignore missing node_modules files
-            if exc.data["type"] == EventError.JS_MISSING_SOURCE and "node_modules" in filename:
+            if result.data["type"] == EventError.JS_MISSING_SOURCE and "node_modules" in filename:
                 pass
             else:
-                cache.add_error(filename, exc.data)
+                cache.add_error(filename, result.data)
 
             # either way, there's no more for us to do here, since we don't have
             # a valid file to cache
-            return
-        cache.add(filename, result.body, result.encoding)
+            return None
+
+        source_view = get_parsed_artifact(
+            "source",
+            result.url,
+            result.body,
+            self.release,
+            self.dist,
+            lambda body: make_source_view(body, result.encoding),
+        )
+        cache.add(filename, source_view)
         cache.alias(result.url, filename)
 
         sourcemap_url = discover_sourcemap(result)
         if not sourcemap_url:
-            return
+            return None
 
         logger.debug(
             "Found sourcemap URL %r for minified script %r", sourcemap_url[:256], result.url
         )
-        sourcemaps.link(filename, sourcemap_url)
-        if sourcemap_url in sourcemaps:
-            return
+        self.sourcemaps.link(filename, sourcemap_url)
+        return sourcemap_url
 
-        # pull down sourcemap
-        try:
-            with sentry_sdk.start_span(
-                op="JavaScriptStacktraceProcessor.cache_source.fetch_sourcemap"
-            ) as span:
-                span.set_data("sourcemap_url", sourcemap_url)
-                sourcemap_view = fetch_sourcemap(
-                    sourcemap_url,
-                    project=self.project,
-                    release=self.release,
-                    dist=self.dist,
-                    allow_scraping=self.allow_scraping,
-                )
-        except http.BadSource as exc:
+    def add_sourcemap(self, filename, sourcemap_url, sourcemap_view):
+        """
+        Cache the result of ``fetch_sourcemap`` for the source map of
+        ``filename``.
+        """
+        if isinstance(sourcemap_view, http.BadSource):
             # we don't perform the same check here as above, because if someone has
             # uploaded a node_modules file, which has a sourceMappingURL, they
             # presumably would like it mapped (and would like to know why it's not
             # working, if that's the case). If they're not looking for it to be
             # mapped, then they shouldn't be uploading the source file in the
             # first place.
-            cache.add_error(filename, exc.data)
+            self.cache.add_error(filename, sourcemap_view.data)
             return
 
-        sourcemaps.add(sourcemap_url, sourcemap_view)
+        self.sourcemaps.add(sourcemap_url, sourcemap_view)
 
         # cache any inlined sources
         for src_id, source_name in sourcemap_view.iter_sources():
@@ -1170,12 +1441,28 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             if source_view is not None:
                 self.cache.add(non_standard_url_join(sourcemap_url, source_name), source_view)
 
+    def prefetch(self, urls):
+        urls = [url for url in urls if not is_data_uri(url)]
+        if self.release is None or not urls:
+            return None
+        try:
+            return prefetch_release_artifacts(urls, self.release, self.dist)
+        except Exception:
+            # Fall back to looking up every artifact individually.
+            logger.error("sourcemaps.prefetch_failed", exc_info=True)
+            return None
+
     def populate_source_cache(self, frames):
         """
         Fetch all sources that we know are required (being referenced directly
         in frames).
+
+        This is equivalent to calling ``cache_source`` for every file, but
+        looks up all release artifacts in bulk and fetches them concurrently
+        (see the ``processing.javascript-fetch-concurrency`` option): first
+        all source files and then their distinct source maps.
         """
-        pending_file_list = set()
+        pending_file_list = {}
         for f in frames:
             # We can't even attempt to fetch source if abs_path is None
             if f.get("abs_path") is None:
@@ -1189,14 +1476,49 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             # we cannot fetch any other files than those uploaded by user
             if self.data.get("platform") == "node" and not f.get("abs_path").startswith("app:"):
                 continue
-            pending_file_list.add(f["abs_path"])
+            pending_file_list[f["abs_path"]] = None
+
+        filenames = list(pending_file_list)
+        budget = max(self.max_fetches - self.fetch_count, 0)
+        self.fetch_count += len(filenames)
+        for filename in filenames[budget:]:
+            self.cache.add_error(filename, {"type": EventError.JS_TOO_MANY_REMOTE_SOURCES})
+        filenames = filenames[:budget]
+        if not filenames:
+            return
 
-        for idx, filename in enumerate(pending_file_list):
-            with sentry_sdk.start_span(
-                op="JavaScriptStacktraceProcessor.populate_source_cache.cache_source"
-            ) as span:
-                span.set_data("filename", filename)
-                self.cache_source(filename=filename)
+        concurrency = options.get("processing.javascript-fetch-concurrency")
+
+        with sentry_sdk.start_span(
+            op="JavaScriptStacktraceProcessor.populate_source_cache.fetch_sources"
+        ):
+            prefetched = self.prefetch(filenames)
+            results = fetch_concurrently(
+                lambda filename: self.fetch_source(filename, prefetched), filenames, concurrency
+            )
+
+        # source map url -> files linked to it
+        sourcemap_files = {}
+        for filename, result in zip(filenames, results):
+            sourcemap_url = self.add_source(filename, result)
+            if sourcemap_url and sourcemap_url not in self.sourcemaps:
+                sourcemap_files.setdefault(sourcemap_url, []).append(filename)
+
+        if not sourcemap_files:
+            return
+
+        with sentry_sdk.start_span(
+            op="JavaScriptStacktraceProcessor.populate_source_cache.fetch_sourcemaps"
+        ):
+            sourcemap_urls = list(sourcemap_files)
+            prefetched = self.prefetch(sourcemap_urls)
+            sourcemap_views = fetch_concurrently(
+                lambda url: self.fetch_sourcemap(url, prefetched), sourcemap_urls, concurrency
+            )
+
+        for sourcemap_url, sourcemap_view in zip(sourcemap_urls, sourcemap_views):
+            for filename in sourcemap_files[sourcemap_url]:
+                self.add_sourcemap(filename, sourcemap_url, sourcemap_view)
 
     def close(self):
         StacktraceProcessor.close(self)
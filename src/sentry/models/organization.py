@@ -152,7 +152,7 @@ class Organization(Model):
         default=1,
     )
 
-    objects = OrganizationManager(cache_fields=("pk", "slug"))
+    objects = OrganizationManager(cache_fields=("pk", "slug"), host_cache=True)
 
     class Meta:
         app_label = "sentry"
@@ -6,22 +6,19 @@ from sentry.db.models import FlexibleForeignKey, Model, sane_repr
 from sentry.db.models.fields import EncryptedPickledObjectField
 from sentry.db.models.manager import OptionManager, Value
 from sentry.tasks.relay import schedule_update_config_cache
-from sentry.utils.cache import cache
 
 if TYPE_CHECKING:
     from sentry.models import Organization
 
 
 class OrganizationOptionManager(OptionManager["Organization"]):
+    instance_field = "organization"
+
     def get_value_bulk(
         self, instances: Sequence["Organization"], key: str
     ) -> Mapping["Organization", Any]:
-        instance_map = {i.id: i for i in instances}
-        queryset = self.filter(organization__in=instances, key=key)
-        result = {i: None for i in instances}
-        for obj in queryset:
-            result[instance_map[obj.organization_id]] = obj.value
-        return result
+        values = self.get_all_values_bulk([i.id for i in instances])
+        return {i: values[i.id].get(key) for i in instances}
 
     def get_value(
         self, organization: "Organization", key: str, default: Optional[Value] = None
@@ -46,17 +43,10 @@ class OrganizationOptionManager(OptionManager["Organization"]):
             organization_id = organization.id
         else:
             organization_id = organization
-        cache_key = self._make_key(organization_id)
-
-        if cache_key not in self._option_cache:
-            result = cache.get(cache_key)
-            if result is None:
-                self.reload_cache(organization_id, "organizationoption.get_all_values")
-            else:
-                self._option_cache[cache_key] = result
 
-        # Explicitly typing to satisfy mypy.
-        values: Mapping[str, Value] = self._option_cache.get(cache_key, {})
+        values = self._option_cache.get(self._make_key(organization_id))
+        if values is None:
+            values = self.get_all_values_bulk([organization_id])[organization_id]
         return values
 
     def reload_cache(self, organization_id: int, update_reason: str) -> Mapping[str, Value]:
@@ -65,10 +55,8 @@ class OrganizationOptionManager(OptionManager["Organization"]):
                 organization_id=organization_id, generate=False, update_reason=update_reason
             )
 
-        cache_key = self._make_key(organization_id)
-        result = {i.key: i.value for i in self.filter(organization=organization_id)}
-        cache.set(cache_key, result)
-        self._option_cache[cache_key] = result
+        result = self._load_values([organization_id])[organization_id]
+        self._store_values(organization_id, result)
         return result
 
     def post_save(self, instance: "OrganizationOption", **kwargs: Any) -> None:
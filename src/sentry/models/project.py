@@ -157,7 +157,7 @@ class Project(Model, PendingDeletionMixin):
         null=True,
     )
 
-    objects = ProjectManager(cache_fields=["pk"])
+    objects = ProjectManager(cache_fields=["pk"], host_cache=True)
     platform = models.CharField(max_length=64, null=True)
 
     class Meta:
@@ -77,6 +77,10 @@ class ProjectKey(Model):
         # store projectkeys in memcached for longer than other models,
         # specifically to make the relay_projectconfig endpoint faster.
         cache_ttl=60 * 30,
+        # keys are also kept per host (see `host_cache`). a key that is
+        # disabled or removed stays valid on other hosts until their entries
+        # expire after `SENTRY_MODEL_HOST_CACHE_TTL` seconds.
+        host_cache=True,
     )
 
     data = JSONField()
@@ -7,20 +7,17 @@ from sentry.db.models import FlexibleForeignKey, Model, sane_repr
 from sentry.db.models.fields import EncryptedPickledObjectField
 from sentry.db.models.manager import OptionManager, ValidateFunction, Value
 from sentry.tasks.relay import schedule_update_config_cache
-from sentry.utils.cache import cache
 
 if TYPE_CHECKING:
     from sentry.models import Project
 
 
 class ProjectOptionManager(OptionManager["Project"]):
+    instance_field = "project"
+
     def get_value_bulk(self, instances: Sequence["Project"], key: str) -> Mapping["Project", Any]:
-        instance_map = {i.id: i for i in instances}
-        queryset = self.filter(project__in=instances, key=key)
-        result = {i: None for i in instances}
-        for obj in queryset:
-            result[instance_map[obj.project_id]] = obj.value
-        return result
+        values = self.get_all_values_bulk([i.id for i in instances])
+        return {i: values[i.id].get(key) for i in instances}
 
     def get_value(
         self,
@@ -56,17 +53,10 @@ class ProjectOptionManager(OptionManager["Project"]):
             project_id = project.id
         else:
             project_id = project
-        cache_key = self._make_key(project_id)
-
-        if cache_key not in self._option_cache:
-            result = cache.get(cache_key)
-            if result is None:
-                self.reload_cache(project_id, "projectoption.get_all_values")
-            else:
-                self._option_cache[cache_key] = result
 
-        # Explicitly typing to satisfy mypy.
-        values: Mapping[str, Value] = self._option_cache.get(cache_key, {})
+        values = self._option_cache.get(self._make_key(project_id))
+        if values is None:
+            values = self.get_all_values_bulk([project_id])[project_id]
         return values
 
     def reload_cache(self, project_id: int, update_reason: str) -> Mapping[str, Value]:
@@ -74,10 +64,9 @@ class ProjectOptionManager(OptionManager["Project"]):
             schedule_update_config_cache(
                 project_id=project_id, generate=True, update_reason=update_reason
             )
-        cache_key = self._make_key(project_id)
-        result = {i.key: i.value for i in self.filter(project=project_id)}
-        cache.set(cache_key, result)
-        self._option_cache[cache_key] = result
+
+        result = self._load_values([project_id])[project_id]
+        self._store_values(project_id, result)
         return result
 
     def post_save(self, instance: "ProjectOption", **kwargs: Any) -> None:
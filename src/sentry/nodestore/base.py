@@ -3,6 +3,8 @@ from threading import local
 import sentry_sdk
 from django.core.cache import InvalidCacheBackendError, caches
 
+from sentry import options
+from sentry.nodestore import encoding
 from sentry.utils import json
 from sentry.utils.cache import memoize
 from sentry.utils.services import Service
@@ -92,6 +94,12 @@ class NodeStorage(local, Service):
         if value is None:
             return None
 
+        if encoding.is_versioned(value):
+            segment = encoding.read_segment(value, subkey=subkey)
+            if segment is None:
+                return None
+            return json_loads(segment)
+
         lines_iter = iter(value.splitlines())
         try:
             if subkey is not None:
@@ -200,7 +208,17 @@ class NodeStorage(local, Service):
 
         >>> _encode({"unprocessed": {}, None: {"stacktrace": {}}})
         b'{"stacktrace": {}}\nunprocessed\n{}'
+
+        If `nodestore.write-versioned-encoding` is enabled, the versioned
+        binary encoding from `sentry.nodestore.encoding` is written instead.
+        Both encodings are always readable.
         """
+        if options.get("nodestore.write-versioned-encoding"):
+            segments = {None: json_dumps(data.pop(None)).encode("utf8")}
+            for key, value in data.items():
+                segments[key] = json_dumps(value).encode("utf8")
+            return encoding.encode(segments)
+
         lines = [json_dumps(data.pop(None)).encode("utf8")]
         for key, value in data.items():
             lines.append(key.encode("ascii"))
@@ -0,0 +1,149 @@
+"""
+Versioned binary encoding for nodestore values.
+
+The legacy encoding (see ``NodeStorage._encode``) joins the default payload
+and every subkey as newline-separated JSON blobs. Reading a subkey means
+scanning the value line by line, and reading the default payload means
+splitting the whole value even if it is followed by a large "unprocessed"
+snapshot.
+
+The versioned encoding starts with a fixed magic, followed by a header with
+an offset table describing every segment (one per subkey, the default payload
+being the segment with an empty name). Segments are individually compressed
+with zstd when that makes them smaller, so only the segment that is actually
+requested has to be decompressed and deserialized::
+
+    MAGIC | VERSION | SEGMENT COUNT
+    (NAME LENGTH | NAME | FLAGS | OFFSET | LENGTH) * SEGMENT COUNT
+    SEGMENT DATA...
+
+Offsets are relative to the end of the header. All integers are big endian.
+"""
+
+import struct
+
+import zstandard
+
+MAGIC = b"\xffNS"
+VERSION = 2
+
+# Segments smaller than this are stored uncompressed, zstd frame overhead
+# would eat most of the savings.
+COMPRESSION_THRESHOLD = 128
+
+FLAG_ZSTD = 1 << 0
+
+_prefix = struct.Struct(">3sBH")
+_name_length = struct.Struct(">B")
+_segment = struct.Struct(">BII")
+
+
+class InvalidNodeEncoding(Exception):
+    pass
+
+
+def is_versioned(value):
+    """
+    Return whether `value` was written using the versioned encoding (as
+    opposed to the legacy newline-joined JSON encoding).
+    """
+    return value[: len(MAGIC)] == MAGIC
+
+
+def encode(segments, compression_threshold=COMPRESSION_THRESHOLD):
+    """
+    Encode a mapping of segment name to already serialized bytes. The default
+    payload must be passed under the `None` key.
+
+    >>> encode({None: b'{"stacktrace":{}}', "unprocessed": b"{}"})
+    """
+    header = [_prefix.pack(MAGIC, VERSION, len(segments))]
+    body = []
+    offset = 0
+
+    compressor = zstandard.ZstdCompressor()
+
+    for name, data in segments.items():
+        if name == "":
+            raise InvalidNodeEncoding("Subkey names must not be empty")
+        # Those keys should be statically known identifiers in the app, such
+        # as "unprocessed". There is really no reason to allow anything but
+        # ASCII here.
+        name = b"" if name is None else name.encode("ascii")
+
+        flags = 0
+        if len(data) >= compression_threshold:
+            compressed = compressor.compress(data)
+            if len(compressed) < len(data):
+                data = compressed
+                flags |= FLAG_ZSTD
+
+        header.append(_name_length.pack(len(name)))
+        header.append(name)
+        header.append(_segment.pack(flags, offset, len(data)))
+        body.append(data)
+        offset += len(data)
+
+    return b"".join(header + body)
+
+
+def read_header(value):
+    """
+    Parse the offset table of a versioned value. Returns a dictionary of
+    segment name (`None` for the default payload) to `(flags, start, end)`,
+    where start and end are absolute positions in `value`.
+    """
+    view = memoryview(value)
+    try:
+        magic, version, count = _prefix.unpack_from(view, 0)
+    except struct.error:
+        raise InvalidNodeEncoding("Truncated header")
+
+    if magic != MAGIC:
+        raise InvalidNodeEncoding("Value is not using the versioned encoding")
+    if version != VERSION:
+        raise InvalidNodeEncoding(f"Unsupported encoding version {version}")
+
+    pos = _prefix.size
+    entries = []
+    try:
+        for _ in range(count):
+            (name_length,) = _name_length.unpack_from(view, pos)
+            pos += _name_length.size
+            name = bytes(view[pos : pos + name_length]).decode("ascii") or None
+            pos += name_length
+            flags, offset, length = _segment.unpack_from(view, pos)
+            pos += _segment.size
+            entries.append((name, flags, offset, length))
+    except struct.error:
+        raise InvalidNodeEncoding("Truncated header")
+
+    rv = {}
+    for name, flags, offset, length in entries:
+        start = pos + offset
+        end = start + length
+        if end > len(value):
+            raise InvalidNodeEncoding(f"Segment {name!r} exceeds value size")
+        rv[name] = (flags, start, end)
+
+    return rv
+
+
+def read_segment(value, subkey=None, header=None):
+    """
+    Return the serialized bytes of a single segment without touching (let
+    alone decompressing) any of the other segments. Returns `None` if the
+    segment does not exist.
+    """
+    if header is None:
+        header = read_header(value)
+
+    try:
+        flags, start, end = header[subkey]
+    except KeyError:
+        return None
+
+    data = value[start:end]
+    if flags & FLAG_ZSTD:
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return data
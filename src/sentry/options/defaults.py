@@ -218,6 +218,15 @@ register("snuba.snql.snql_only", default=1.0)
 # The percentage of tagkeys that we want to cache. Set to 1.0 in order to cache everything, <=0.0 to stop caching
 register("snuba.tagstore.cache-tagkeys-rate", default=0.0, flags=FLAG_PRIORITIZE_DISK)
 
+# Snuba query cache: share the result of identical queries that run
+# concurrently within a process, keep results in a per-process cache of the
+# given size in bytes, and serve stale results of the listed referrers for up
+# to `stale-ttl` seconds while refreshing them in the background.
+register("snuba.query-cache.singleflight", default=False, flags=FLAG_PRIORITIZE_DISK)
+register("snuba.query-cache.local-max-size", default=0, flags=FLAG_PRIORITIZE_DISK)
+register("snuba.query-cache.stale-referrers", type=Sequence, default=[], flags=FLAG_PRIORITIZE_DISK)
+register("snuba.query-cache.stale-ttl", default=300, flags=FLAG_PRIORITIZE_DISK)
+
 # Kafka Publisher
 register("kafka-publisher.raw-event-sample-rate", default=0.0)
 register("kafka-publisher.max-event-size", default=100000)
@@ -272,9 +281,28 @@ register("transaction-events.force-disable-internal-project", default=False)
 register("outcomes.signals-in-consumer-sample-rate", default=0.0)  # unused
 register("outcomes.tsdb-in-consumer-sample-rate", default=0.0)  # unused
 
+# Write pending buffer values with the compact msgpack codec instead of pickle.
+# Only enable once all workers processing the buffer can read it.
+register("buffer.write-compact-codec", default=False, flags=FLAG_PRIORITIZE_DISK)
+
+# Write digest records with the compact codec (references to the event, group
+# and rules) instead of pickle. Only enable once all workers delivering
+# digests can read it.
+register("digests.write-compact-codec", default=False, flags=FLAG_PRIORITIZE_DISK)
+
+# Cache the number of events per project and day in Redis while preparing
+# reports, so that weekly reports only query TSDB for the last week.
+register("reports.cache-daily-totals", default=False, flags=FLAG_PRIORITIZE_DISK)
+
+# Number of pages of a discover export fetched concurrently from Snuba.
+register("data-export.fetch-concurrency", default=1, flags=FLAG_PRIORITIZE_DISK)
+
 # Node data save rate
 register("nodedata.cache-sample-rate", default=0.0, flags=FLAG_PRIORITIZE_DISK)
 register("nodedata.cache-on-save", default=False, flags=FLAG_PRIORITIZE_DISK)
+# Write nodestore values using the versioned binary encoding with per-subkey
+# compression. Both encodings are always readable.
+register("nodestore.write-versioned-encoding", default=False, flags=FLAG_PRIORITIZE_DISK)
 
 # Use nodestore for eventstore.get_events
 register("eventstore.use-nodestore", default=False, flags=FLAG_PRIORITIZE_DISK)
@@ -314,6 +342,9 @@ register("store.reprocessing-force-disable", default=False)
 
 register("store.race-free-group-creation-force-disable", default=False)
 
+# Cache the group of known grouphashes to skip GroupHash lookups when saving events
+register("store.use-grouphash-cache", default=False, flags=FLAG_PRIORITIZE_DISK)
+
 
 # ## sentry.killswitches
 #
@@ -337,6 +368,9 @@ register("store.background-grouping-sample-rate", default=0.0)
 # True if background grouping should run before secondary and primary grouping
 register("store.background-grouping-before", default=False)
 
+# Reuse frame grouping components of identical frames across events
+register("grouping.use-frame-component-cache", default=False, flags=FLAG_PRIORITIZE_DISK)
+
 # Store release files bundled as zip files
 register("processing.save-release-archives", default=False)  # unused
 
@@ -347,6 +381,23 @@ register("processing.release-archive-min-files", default=10)
 # Try to read release artifacts from zip archives
 register("processing.use-release-archives-sample-rate", default=0.0)  # unused
 
+# Maximum size (in bytes of the raw artifacts) of parsed source maps and
+# source views kept per process across events. 0 disables the cache.
+register("processing.parsed-artifact-cache-size", default=0, flags=FLAG_PRIORITIZE_DISK)
+
+# Number of source files and source maps fetched concurrently per event during
+# JavaScript processing. 1 fetches them one after another.
+register("processing.javascript-fetch-concurrency", default=1, flags=FLAG_PRIORITIZE_DISK)
+
+# Maximum size in bytes of the local store of release archives below
+# `releasefile.cache-path`. 0 disables the store.
+register("processing.artifact-bundle-store-size", default=0, flags=FLAG_PRIORITIZE_DISK)
+
+# Maximum size in bytes of stacktrace processor results (see
+# `ProcessableFrame.set_cache_value`) kept per process in front of the shared
+# cache. 0 disables the local tier.
+register("processing.frame-cache-local-size", default=0, flags=FLAG_PRIORITIZE_DISK)
+
 # All Relay options (statically authenticated Relays can be registered here)
 register("relay.static_auth", default={}, flags=FLAG_NOSTORE)
 
@@ -1,4 +1,6 @@
 import logging
+import os
+import threading
 from collections import namedtuple
 from random import random
 from time import time
@@ -11,6 +13,10 @@ from sentry.utils.hashlib import md5_text
 
 Key = namedtuple("Key", ("name", "default", "type", "flags", "ttl", "grace", "cache_key"))
 
+# Values of all stored options as of ``loaded_at``. Snapshots are never
+# mutated, a new one replaces the old one instead.
+Snapshot = namedtuple("Snapshot", ("values", "loaded_at"))
+
 CACHE_FETCH_ERR = "Unable to fetch option cache for %s"
 CACHE_UPDATE_ERR = "Unable to update option cache for %s"
 
@@ -41,6 +47,8 @@ class OptionsStore:
     def __init__(self, cache=None, ttl=None):
         self.cache = cache
         self.ttl = ttl
+        self.snapshot_interval = None
+        self._registered_at_fork = False
         self.flush_local_cache()
 
     @cached_property
@@ -56,6 +64,12 @@ class OptionsStore:
         """
         Fetches a value from the options store.
         """
+        # Read into a local since the refresher may swap the snapshot at any
+        # time.
+        snapshot = self._snapshot
+        if snapshot is not None and key.ttl > 0 and time() < snapshot.loaded_at + key.ttl:
+            return snapshot.values.get(key.name)
+
         result = self.get_cache(key, silent=silent)
         if result is not None:
             return result
@@ -66,7 +80,23 @@ class OptionsStore:
 
         # As a last ditch effort, let's hope we have a key
         # in local cache that's possibly stale
-        return self.get_local_cache(key, force_grace=True)
+        result = self.get_local_cache(key, force_grace=True)
+        if result is None and snapshot is not None and key.ttl > 0:
+            result = self.get_snapshot_value(snapshot, key)
+        return result
+
+    def get_snapshot_value(self, snapshot, key):
+        """
+        Return the value of a key from a stale snapshot, as long as the
+        snapshot is within the key's grace window.
+        """
+        if time() >= snapshot.loaded_at + key.ttl + key.grace:
+            return None
+
+        from sentry.utils import metrics
+
+        metrics.incr("options.snapshot.stale", skip_internal=True)
+        return snapshot.values.get(key.name)
 
     def get_cache(self, key, silent=False):
         """
@@ -182,6 +212,7 @@ class OptionsStore:
         assert self.cache is not None, "cache must be configured before mutating options"
 
         self.set_store(key, value)
+        self._update_snapshot(key, value)
         return self.set_cache(key, value)
 
     def set_store(self, key, value):
@@ -217,6 +248,7 @@ class OptionsStore:
         assert self.cache is not None, "cache must be configured before mutating options"
 
         self.delete_store(key)
+        self._update_snapshot(key, None)
         return self.delete_cache(key)
 
     def delete_store(self, key):
@@ -269,6 +301,79 @@ class OptionsStore:
         Empty store's local in-process cache.
         """
         self._local_cache = {}
+        self._snapshot = None
+
+    def refresh_snapshot(self):
+        """
+        Load all stored options with a single query and replace the snapshot
+        that ``get`` serves values from.
+        """
+        loaded_at = time()
+        values = dict(self.model.objects.values_list("key", "value"))
+        self._snapshot = Snapshot(values, loaded_at)
+
+    def _update_snapshot(self, key, value):
+        # Make changes made by this process visible right away instead of
+        # after the next refresh.
+        snapshot = self._snapshot
+        if snapshot is None:
+            return
+        values = dict(snapshot.values)
+        if value is None:
+            values.pop(key.name, None)
+        else:
+            values[key.name] = value
+        self._snapshot = Snapshot(values, snapshot.loaded_at)
+
+    def start_snapshot_refresher(self, interval):
+        """
+        Serve options from a snapshot of all stored options, which a
+        background thread refreshes every ``interval`` seconds.
+
+        While the snapshot is younger than a key's TTL, ``get`` returns the
+        key's value from the snapshot without checking the network cache or
+        the database. Older snapshots are only used within the grace window
+        of a key, when neither the caches nor the database have a value.
+        """
+        self.snapshot_interval = interval
+        self._start_snapshot_thread()
+
+        # Threads don't survive forking, so worker processes start their own.
+        if not self._registered_at_fork:
+            os.register_at_fork(after_in_child=self._start_snapshot_thread)
+            self._registered_at_fork = True
+
+    def _start_snapshot_thread(self):
+        if not self.snapshot_interval:
+            return
+        thread = threading.Thread(target=self._refresh_snapshots, name="options-snapshot")
+        thread.daemon = True
+        thread.start()
+
+    def _refresh_snapshots(self):
+        from django.db import close_old_connections
+
+        from sentry.utils import metrics
+
+        wait = threading.Event().wait
+        interval = self.snapshot_interval
+        while interval:
+            try:
+                # This thread lives as long as the process, so its connection
+                # has to be replaced once it breaks (e.g. after a failover).
+                close_old_connections()
+                with metrics.timer("options.snapshot.refresh"):
+                    self.refresh_snapshot()
+            except Exception:
+                logger.warning("option.snapshot-refresh-failed", exc_info=True)
+                metrics.incr("options.snapshot.refresh-failed")
+
+            snapshot = self._snapshot
+            if snapshot is not None:
+                metrics.timing("options.snapshot.age", time() - snapshot.loaded_at)
+
+            wait(interval)
+            interval = self.snapshot_interval
 
     def maybe_clean_local_cache(self, **kwargs):
         # Periodically force an expire on the local cache.
@@ -2,9 +2,20 @@ from sentry.utils.services import Service
 
 
 class RateLimiter(Service):
-    __all__ = ("is_limited", "validate")
+    __all__ = ("is_limited", "is_limited_many", "validate")
 
     window = 60
 
     def is_limited(self, key, limit, project=None, window=None):
         return False
+
+    def is_limited_many(self, requests, project=None):
+        """
+        Checks multiple rate limits at once. ``requests`` is a sequence of
+        ``(key, limit, window)`` tuples, where ``window`` may be ``None`` to
+        use the default window. Returns a list of booleans in the same order.
+        """
+        return [
+            self.is_limited(key, limit, project=project, window=window)
+            for key, limit, window in requests
+        ]
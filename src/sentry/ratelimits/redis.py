@@ -1,3 +1,5 @@
+import threading
+from collections import defaultdict
 from time import time
 
 from redis.exceptions import RedisError
@@ -5,8 +7,11 @@ from sentry_sdk import capture_exception
 
 from sentry.exceptions import InvalidConfiguration
 from sentry.ratelimits.base import RateLimiter
+from sentry.utils.datastructures import LRUCache
 from sentry.utils.hashlib import md5_text
-from sentry.utils.redis import get_cluster_from_options
+from sentry.utils.redis import get_cluster_from_options, load_script
+
+check_gcra_limits = load_script("ratelimits/gcra.lua")
 
 
 class RedisRateLimiter(RateLimiter):
@@ -44,3 +49,121 @@ class RedisRateLimiter(RateLimiter):
             # can't be updated. We do want to know when that happens.
             capture_exception(e)
             return False
+
+
+class RedisGCRARateLimiter(RedisRateLimiter):
+    """
+    A rate limiter that enforces limits as a sliding window using the generic
+    cell rate algorithm: no more than ``limit`` requests are allowed within
+    any period of ``window`` seconds. Every check is a single script
+    invocation, and ``is_limited_many`` checks all keys with a single
+    invocation per Redis host.
+
+    If ``local_cache_size`` is set, keys that are found to be rate limited
+    are remembered in-process until they are allowed again, so that hot keys
+    that keep hitting their limit do not go to Redis on every request.
+    Additionally, ``local_tokens`` requests can be taken ahead of time and
+    handed out locally for up to ``local_token_ttl`` seconds. Tokens that
+    are not used up in time are lost, so this never allows more requests
+    than the limit, but may reject some requests early.
+    """
+
+    def __init__(self, local_cache_size=0, local_tokens=0, local_token_ttl=1, **options):
+        super().__init__(**options)
+        self.local_tokens = local_tokens
+        self.local_token_ttl = local_token_ttl
+        if local_cache_size:
+            self.local_cache = LRUCache(local_cache_size)
+        else:
+            self.local_cache = None
+        self._local_cache_lock = threading.Lock()
+
+    def _get_redis_key(self, key, project=None):
+        if project:
+            return f"rl:gcra:{key}:{project.id}"
+        return f"rl:gcra:{key}"
+
+    def is_limited(self, key, limit, project=None, window=None):
+        return self.is_limited_many([(key, limit, window)], project=project)[0]
+
+    def is_limited_many(self, requests, project=None):
+        now = time()
+        results = []
+        pending = defaultdict(list)
+        router = self.cluster.get_router()
+
+        for idx, (key, limit, window) in enumerate(requests):
+            results.append(False)
+
+            if limit <= 0:
+                results[idx] = True
+                continue
+
+            redis_key = self._get_redis_key(key, project)
+            is_limited = self._check_local_cache(redis_key, now)
+            if is_limited is not None:
+                results[idx] = is_limited
+                continue
+
+            pending[router.get_host_for_key(redis_key)].append(
+                (idx, redis_key, limit, window or self.window)
+            )
+
+        requested = 1 + self.local_tokens if self.local_cache is not None else 1
+
+        for host, checks in pending.items():
+            args = [int(now * 1000)]
+            for _, _, limit, window in checks:
+                args.extend((window * 1000.0 / limit, window * 1000, requested))
+
+            try:
+                rv = check_gcra_limits(
+                    self.cluster.get_local_client(host), [c[1] for c in checks], args
+                )
+            except RedisError as e:
+                # We don't want rate limited endpoints to fail when ratelimits
+                # can't be updated. We do want to know when that happens.
+                capture_exception(e)
+                continue
+
+            for (idx, redis_key, _, _), (granted, retry_after) in zip(checks, rv):
+                results[idx] = not granted
+                self._update_local_cache(redis_key, now, granted, retry_after)
+
+        return results
+
+    def _check_local_cache(self, redis_key, now):
+        """
+        Returns whether the key is rate limited according to the local cache,
+        or `None` if the key has to be checked in Redis.
+        """
+        if self.local_cache is None:
+            return None
+
+        with self._local_cache_lock:
+            entry = self.local_cache.get(redis_key)
+            if entry is None:
+                return None
+
+            tokens, valid_until = entry
+            if valid_until <= now:
+                self.local_cache.delete(redis_key)
+                return None
+
+            if not tokens:
+                return True
+
+            if tokens == 1:
+                self.local_cache.delete(redis_key)
+            else:
+                self.local_cache.set(redis_key, (tokens - 1, valid_until))
+            return False
+
+    def _update_local_cache(self, redis_key, now, granted, retry_after):
+        if self.local_cache is None:
+            return
+
+        if not granted:
+            self.local_cache.set(redis_key, (0, now + retry_after / 1000.0))
+        elif granted > 1:
+            self.local_cache.set(redis_key, (granted - 1, now + self.local_token_ttl))
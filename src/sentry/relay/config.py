@@ -1,3 +1,4 @@
+import hashlib
 import uuid
 from datetime import datetime
 from typing import List
@@ -8,6 +9,7 @@ from sentry_sdk import Hub
 from sentry import features, quotas, utils
 from sentry.constants import ObjectStatus
 from sentry.datascrubbing import get_datascrubbing_settings, get_pii_config
+from sentry.db.models.manager.option import get_all_values_bulk
 from sentry.grouping.api import get_grouping_config_dict_for_project
 from sentry.ingest.inbound_filters import (
     FilterStatKeys,
@@ -16,7 +18,7 @@ from sentry.ingest.inbound_filters import (
     get_filter_key,
 )
 from sentry.interfaces.security import DEFAULT_DISALLOWED_SOURCES
-from sentry.models import Project, ProjectKeyStatus
+from sentry.models import Organization, OrganizationOption, Project, ProjectKeyStatus, ProjectOption
 from sentry.relay.utils import to_camel_case_name
 from sentry.utils.http import get_origins
 from sentry.utils.sdk import configure_scope
@@ -27,13 +29,28 @@ EXPOSABLE_FEATURES = [
 ]
 
 
+#: Fields of a project config that change on every fetch. They are not covered
+#: by the digest returned from ``serialize_project_config``.
+VOLATILE_CONFIG_FIELDS = ("lastFetch", "lastChange", "rev")
+
+
 def get_exposed_features(project: Project) -> List[str]:
+    return _get_organization_features(project.organization) + _get_project_features(project)
+
+
+def _get_organization_features(organization: Organization) -> List[str]:
+    return [
+        feature
+        for feature in EXPOSABLE_FEATURES
+        if feature.startswith("organizations:") and features.has(feature, organization)
+    ]
+
 
+def _get_project_features(project: Project) -> List[str]:
     active_features = []
     for feature in EXPOSABLE_FEATURES:
         if feature.startswith("organizations:"):
-            if features.has(feature, project.organization):
-                active_features.append(feature)
+            continue
 
         elif feature.startswith("projects:"):
             if features.has(feature, project):
@@ -125,9 +142,103 @@ def get_project_config(project, full_config=True, project_keys=None):
     with configure_scope() as scope:
         scope.set_tag("project", project.id)
 
-    if project.status != ObjectStatus.VISIBLE:
-        return ProjectConfig(project, disabled=True)
+    (config,) = get_project_configs_bulk([project], [project_keys], full_config=full_config)
+    return config
+
+
+def get_project_configs_bulk(projects, project_keys=None, full_config=True):
+    """
+    Constructs the ProjectConfig information of many projects at once.
+
+    Project and organization options of all projects are loaded with batched
+    lookups, organizations that are not bound on the projects are fetched
+    together, and the parts of the config that only depend on the
+    organization are computed once per organization.
+
+    :param projects: The projects to load configuration for. A project may be
+        passed more than once, for instance with different project keys.
+    :param project_keys: A sequence with the pre-fetched project keys of every
+        entry in ``projects``, see ``get_project_config``.
+    :param full_config: True if the full config is required, see
+        ``get_project_config``.
+
+    :return: a list of ProjectConfig objects in the order of ``projects``
+    """
+    projects = list(projects)
+    if project_keys is None:
+        project_keys = [None] * len(projects)
+
+    with Hub.current.start_span(op="get_project_configs_bulk.prefetch"):
+        _prefetch_organizations(projects)
+        get_all_values_bulk(
+            {
+                ProjectOption.objects: {project.id for project in projects},
+                OrganizationOption.objects: {project.organization_id for project in projects},
+            }
+        )
+
+    org_configs = {}
+    configs = []
+    for project, keys in zip(projects, project_keys):
+        if project.status != ObjectStatus.VISIBLE:
+            configs.append(ProjectConfig(project, disabled=True))
+            continue
+
+        org_config = org_configs.get(project.organization_id)
+        if org_config is None:
+            org_config = org_configs[project.organization_id] = _get_organization_config(
+                project.organization, full_config
+            )
+
+        configs.append(_get_project_config(project, org_config, full_config, keys))
+
+    return configs
 
+
+def _prefetch_organizations(projects):
+    unbound = [project for project in projects if not Project.organization.is_cached(project)]
+    if not unbound:
+        return
+
+    organizations = {
+        organization.id: organization
+        for organization in Organization.objects.get_many_from_cache(
+            {project.organization_id for project in unbound}
+        )
+    }
+    for project in unbound:
+        organization = organizations.get(project.organization_id)
+        if organization is not None:
+            project.set_cached_field_value("organization", organization)
+
+
+def _get_organization_config(organization, full_config):
+    """
+    Returns the parts of the config that are the same for all projects of an
+    organization.
+    """
+    org_config = {
+        "trustedRelays": [
+            r["public_key"] for r in organization.get_option("sentry:trusted-relays", []) if r
+        ],
+        "features": _get_organization_features(organization),
+        "dynamicSampling": features.has("organizations:filters-and-sampling", organization),
+    }
+
+    if full_config:
+        org_config["breakdownsV2"] = features.has(
+            "organizations:performance-ops-breakdown", organization
+        )
+        org_config["spanAttributes"] = features.has(
+            "organizations:performance-suspect-spans-ingestion", organization
+        )
+        with Hub.current.start_span(op="get_event_retention"):
+            org_config["eventRetention"] = quotas.get_event_retention(organization)
+
+    return org_config
+
+
+def _get_project_config(project, org_config, full_config, project_keys):
     public_keys = get_public_key_configs(project, full_config, project_keys=project_keys)
 
     with Hub.current.start_span(op="get_public_config"):
@@ -141,23 +252,15 @@ def get_project_config(project, full_config=True, project_keys=None):
             "publicKeys": public_keys,
             "config": {
                 "allowedDomains": list(get_origins(project)),
-                "trustedRelays": [
-                    r["public_key"]
-                    for r in project.organization.get_option("sentry:trusted-relays", [])
-                    if r
-                ],
+                "trustedRelays": list(org_config["trustedRelays"]),
                 "piiConfig": get_pii_config(project),
                 "datascrubbingSettings": get_datascrubbing_settings(project),
-                "features": get_exposed_features(project),
+                "features": org_config["features"] + _get_project_features(project),
             },
             "organizationId": project.organization_id,
             "projectId": project.id,  # XXX: Unused by Relay, required by Python store
         }
-    allow_dynamic_sampling = features.has(
-        "organizations:filters-and-sampling",
-        project.organization,
-    )
-    if allow_dynamic_sampling:
+    if org_config["dynamicSampling"]:
         dynamic_sampling = project.get_option("sentry:dynamic_sampling")
         if dynamic_sampling is not None:
             cfg["config"]["dynamicSampling"] = dynamic_sampling
@@ -166,22 +269,43 @@ def get_project_config(project, full_config=True, project_keys=None):
         # This is all we need for external Relay processors
         return ProjectConfig(project, **cfg)
 
-    if features.has("organizations:performance-ops-breakdown", project.organization):
+    if org_config["breakdownsV2"]:
         cfg["config"]["breakdownsV2"] = project.get_option("sentry:breakdowns")
-    if features.has("organizations:performance-suspect-spans-ingestion", project.organization):
+    if org_config["spanAttributes"]:
         cfg["config"]["spanAttributes"] = project.get_option("sentry:span_attributes")
     with Hub.current.start_span(op="get_filter_settings"):
         cfg["config"]["filterSettings"] = get_filter_settings(project)
     with Hub.current.start_span(op="get_grouping_config_dict_for_project"):
         cfg["config"]["groupingConfig"] = get_grouping_config_dict_for_project(project)
-    with Hub.current.start_span(op="get_event_retention"):
-        cfg["config"]["eventRetention"] = quotas.get_event_retention(project.organization)
+    cfg["config"]["eventRetention"] = org_config["eventRetention"]
     with Hub.current.start_span(op="get_all_quotas"):
         cfg["config"]["quotas"] = get_quotas(project, keys=project_keys)
 
     return ProjectConfig(project, **cfg)
 
 
+def serialize_project_config(cfg):
+    """
+    Serializes a project config dictionary to JSON.
+
+    :return: a tuple of the serialized config and a digest of its contents.
+        The digest does not cover ``VOLATILE_CONFIG_FIELDS`` and therefore
+        only changes when the config itself changes.
+    """
+    stable = {key: value for key, value in cfg.items() if key not in VOLATILE_CONFIG_FIELDS}
+    serialized = utils.json.dumps(stable)
+    digest = hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+    volatile = {key: cfg[key] for key in VOLATILE_CONFIG_FIELDS if key in cfg}
+    if volatile:
+        # Splice the volatile fields into the object instead of serializing
+        # the config a second time.
+        prefix = utils.json.dumps(volatile)
+        serialized = f"{prefix[:-1]},{serialized[1:]}" if stable else prefix
+
+    return serialized, digest
+
+
 class _ConfigBase:
     """
     Base class for configuration objects
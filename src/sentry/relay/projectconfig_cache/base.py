@@ -1,8 +1,9 @@
+from sentry.utils import json
 from sentry.utils.services import Service
 
 
 class ProjectConfigCache(Service):
-    __all__ = ("set_many", "delete_many", "get")
+    __all__ = ("set_many", "set_many_serialized", "delete_many", "get")
 
     def __init__(self, **options):
         pass
@@ -10,6 +11,13 @@ class ProjectConfigCache(Service):
     def set_many(self, configs):
         pass
 
+    def set_many_serialized(self, configs):
+        """
+        Like ``set_many``, for configs that have already been serialized to
+        JSON.
+        """
+        self.set_many({key: json.loads(config) for key, config in configs.items()})
+
     def delete_many(self, project_ids):
         pass
 
@@ -25,6 +25,10 @@ class RedisProjectConfigCache(ProjectConfigCache):
             return self.cluster.get_local_client_for_key(routing_key)
 
     def set_many(self, configs):
+        self.set_many_serialized({key: json.dumps(config) for key, config in configs.items()})
+
+    def set_many_serialized(self, configs):
+        # Relay reads these keys directly, so the JSON is stored as is.
         for project_id, config in configs.items():
             # XXX(markus): Figure out how to do pipelining here. We may have
             # multiple routing keys (-> multiple clients).
@@ -34,7 +38,7 @@ class RedisProjectConfigCache(ProjectConfigCache):
 
             key = self.__get_redis_key(project_id)
             client = self.__get_redis_client(key)
-            client.setex(key, REDIS_CACHE_TIMEOUT, json.dumps(config))
+            client.setex(key, REDIS_CACHE_TIMEOUT, config)
 
     def delete_many(self, project_ids):
         for project_id in project_ids:
@@ -358,6 +358,8 @@ def initialize_app(config, skip_service_validation=False):
 
     bind_cache_to_option_store()
 
+    start_option_snapshots(settings)
+
     register_plugins(settings)
 
     initialize_receivers()
@@ -521,6 +523,14 @@ def bind_cache_to_option_store():
     default_store.cache = default_cache
 
 
+def start_option_snapshots(settings):
+    from sentry.options import default_store
+
+    interval = getattr(settings, "SENTRY_OPTIONS_SNAPSHOT_INTERVAL", None)
+    if interval:
+        default_store.start_snapshot_refresher(interval)
+
+
 def apply_legacy_settings(settings):
     from sentry import options
 
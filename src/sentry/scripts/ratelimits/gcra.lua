@@ -0,0 +1,53 @@
+-- Check a set of rate limits using the generic cell rate algorithm (GCRA).
+--
+-- Every key stores the "theoretical arrival time" (TAT) of the next request
+-- in milliseconds. Requests are spaced out by the emission interval
+-- (``window / limit``) and a request is allowed as long as the TAT does not
+-- run further ahead of the current time than ``window``. This behaves like a
+-- sliding window: no more than ``limit`` requests are allowed within any
+-- period of ``window`` milliseconds, without the bursts at the edges of fixed
+-- windows.
+--
+-- ``ARGV[1]`` is the current time in milliseconds. Every key is followed by
+-- three values in ``ARGV``: the emission interval and the window (both in
+-- milliseconds), and the number of requests to take. For example, to take one
+-- request from ``foo`` (10 requests per minute) and three requests from
+-- ``bar`` (100 requests per hour):
+--
+--   KEYS = {"foo", "bar"}
+--   ARGV = {1600000000000, 6000, 60000, 1, 36000, 3600000, 3}
+--
+-- Fewer requests than asked for are granted if the limit does not allow for
+-- all of them. The result contains a ``{granted, retry_after}`` pair for
+-- every key, where ``retry_after`` is the number of milliseconds until the
+-- next request would be allowed if none could be granted.
+assert(#ARGV == #KEYS * 3 + 1, "incorrect number of keys and arguments provided")
+
+local now = tonumber(ARGV[1])
+local results = {}
+
+for i = 1, #KEYS do
+    local interval = tonumber(ARGV[i * 3 - 1])
+    local window = tonumber(ARGV[i * 3])
+    local requested = tonumber(ARGV[i * 3 + 1])
+
+    local tat = tonumber(redis.call('GET', KEYS[i]) or now)
+    if tat < now then
+        tat = now
+    end
+
+    -- The small offset guards against floating point errors, e.g. when the
+    -- window is not a multiple of the limit.
+    local available = math.floor((now + window - tat) / interval + 1e-6)
+    local granted = math.min(requested, available)
+
+    if granted > 0 then
+        tat = tat + granted * interval
+        redis.call('SET', KEYS[i], string.format('%.3f', tat), 'PX', math.ceil(tat - now))
+        results[i] = {granted, 0}
+    else
+        results[i] = {0, math.ceil(tat + interval - window - now)}
+    end
+end
+
+return results
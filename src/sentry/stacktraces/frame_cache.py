@@ -0,0 +1,169 @@
+"""
+Cache for the results of stacktrace processors.
+
+Processors set a cache key on the frames they handle in ``preprocess_frame``
+and store results with ``ProcessableFrame.set_cache_value``. ``FrameCache``
+looks up the values of all frames of an event with a single ``get_many`` and
+writes new values with a single ``set_many`` once processing is done.
+
+Keys are namespaced per processor and every namespace has a version stored in
+the shared cache, so ``invalidate`` drops all cached values of a processor at
+once. Versions are remembered per process for ``VERSION_TTL`` seconds, which
+is how long it takes for an invalidation to reach all processes.
+
+Optionally, values are also kept in a per-process LRU tier in front of the
+shared cache (see ``processing.frame-cache-local-size``). The tier holds
+pickled values so that processors mutating cached values cannot affect other
+events.
+"""
+
+import pickle
+from typing import Any, Iterable, Mapping, Optional
+
+from sentry import options
+from sentry.utils import metrics
+from sentry.utils.cache import cache as default_cache
+from sentry.utils.datastructures import LRUCache
+
+# Seconds values are kept in the shared cache.
+FRAME_CACHE_TTL = 3600
+
+# Seconds namespace versions are remembered per process.
+VERSION_TTL = 60
+
+# Number of namespace versions remembered per process.
+MAX_VERSIONS = 1000
+
+
+class FrameCache:
+    def __init__(self, cache=default_cache, timeout=FRAME_CACHE_TTL):
+        self.cache = cache
+        self.timeout = timeout
+        self._versions = LRUCache(MAX_VERSIONS, ttl=VERSION_TTL)
+        self._local = None
+
+    def _get_local(self) -> Optional[LRUCache]:
+        max_size = options.get("processing.frame-cache-local-size")
+        if not max_size:
+            return None
+        if self._local is None or self._local.max_size != max_size:
+            self._local = LRUCache(max_size, ttl=self.timeout, weigh=len)
+        return self._local
+
+    def _get_version_key(self, namespace: str) -> str:
+        return f"pfv:{namespace}"
+
+    def get_versions(self, namespaces: Iterable[str]) -> Mapping[str, int]:
+        """
+        Return the current version of every namespace. Namespaces that were
+        never invalidated are at version 1.
+        """
+        rv = {}
+        missing = []
+        for namespace in namespaces:
+            version = self._versions.get(namespace)
+            if version is None:
+                missing.append(namespace)
+            else:
+                rv[namespace] = version
+
+        if missing:
+            keys = {self._get_version_key(namespace): namespace for namespace in missing}
+            found = self.cache.get_many(list(keys))
+            for key, namespace in keys.items():
+                version = found.get(key) or 1
+                self._versions.set(namespace, version)
+                rv[namespace] = version
+
+        return rv
+
+    def invalidate(self, namespace: str) -> int:
+        """
+        Drop all values of a namespace by bumping its version. Returns the new
+        version.
+        """
+        key = self._get_version_key(namespace)
+        try:
+            version = self.cache.incr(key)
+        except ValueError:
+            # Namespaces without a stored version are at version 1.
+            version = 2
+            self.cache.set(key, version, None)
+        self._versions.set(namespace, version)
+        return version
+
+    def _make_keys(self, keys_by_namespace):
+        versions = self.get_versions(keys_by_namespace)
+        return {
+            (namespace, key): f"{key}:{namespace}:{versions[namespace]}"
+            for namespace, keys in keys_by_namespace.items()
+            for key in keys
+        }
+
+    def get_many(
+        self, keys_by_namespace: Mapping[str, Iterable[str]]
+    ) -> Mapping[tuple, Optional[Any]]:
+        """
+        Look up ``{namespace: [key, ...]}`` and return a
+        ``{(namespace, key): value}`` mapping. Values that are not cached are
+        ``None``.
+        """
+        full_keys = self._make_keys(keys_by_namespace)
+        local = self._get_local()
+
+        rv = {}
+        hits = {}
+        to_fetch = {}
+        for (namespace, key), full_key in full_keys.items():
+            pickled = local.get(full_key) if local is not None else None
+            if pickled is not None:
+                rv[(namespace, key)] = pickle.loads(pickled)
+                hits[(namespace, "local")] = hits.get((namespace, "local"), 0) + 1
+            else:
+                to_fetch[full_key] = (namespace, key)
+
+        if to_fetch:
+            found = self.cache.get_many(list(to_fetch))
+            for full_key, (namespace, key) in to_fetch.items():
+                value = found.get(full_key)
+                rv[(namespace, key)] = value
+                result = "miss" if value is None else "shared"
+                hits[(namespace, result)] = hits.get((namespace, result), 0) + 1
+                if value is not None and local is not None:
+                    local.set(full_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+        for (namespace, result), count in hits.items():
+            metrics.incr(
+                "stacktraces.frame_cache.lookup",
+                amount=count,
+                tags={"processor": namespace, "result": result},
+                skip_internal=True,
+            )
+
+        return rv
+
+    def set_many(self, values_by_namespace: Mapping[str, Mapping[str, Any]]):
+        """
+        Store ``{namespace: {key: value}}`` in both tiers.
+        """
+        full_keys = self._make_keys(values_by_namespace)
+        local = self._get_local()
+
+        to_set = {}
+        for namespace, values in values_by_namespace.items():
+            size = 0
+            for key, value in values.items():
+                full_key = full_keys[(namespace, key)]
+                to_set[full_key] = value
+                pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                size += len(pickled)
+                if local is not None:
+                    local.set(full_key, pickled)
+
+            metrics.timing("stacktraces.frame_cache.bytes", size, tags={"processor": namespace})
+
+        if to_set:
+            self.cache.set_many(to_set, self.timeout)
+
+
+frame_cache = FrameCache()
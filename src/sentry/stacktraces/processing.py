@@ -6,8 +6,8 @@ import sentry_sdk
 from django.utils import timezone
 
 from sentry.models import Project, Release
+from sentry.stacktraces.frame_cache import frame_cache
 from sentry.stacktraces.functions import set_in_app, trim_function_name
-from sentry.utils.cache import cache
 from sentry.utils.hashlib import hash_values
 from sentry.utils.safe import get_path, safe_execute
 
@@ -30,6 +30,7 @@ class ProcessableFrame:
         self.data = None
         self.cache_key = None
         self.cache_value = None
+        self.pending_cache_value = None
         self.processable_frames = processable_frames
 
     def __repr__(self):
@@ -62,9 +63,15 @@ class ProcessableFrame:
             return
         return self.processable_frames[last_idx]
 
+    @property
+    def cache_namespace(self):
+        return self.processor.__class__.__name__
+
     def set_cache_value(self, value):
         if self.cache_key is not None:
-            cache.set(self.cache_key, value, 3600)
+            # Written together with the values of all other frames when the
+            # processing task is closed.
+            self.pending_cache_value = (self.cache_namespace, value)
             return True
         return False
 
@@ -84,9 +91,19 @@ class StacktraceProcessingTask:
         self.processors = processors
 
     def close(self):
+        to_store = {}
         for frame in self.iter_processable_frames():
+            if frame.pending_cache_value is not None:
+                namespace, value = frame.pending_cache_value
+                to_store.setdefault(namespace, {})[frame.cache_key] = value
             frame.close()
 
+        if to_store:
+            try:
+                frame_cache.set_many(to_store)
+            except Exception:
+                logger.exception("stacktraces.processing.frame_cache_failed")
+
     def iter_processors(self):
         return iter(self.processors)
 
@@ -440,11 +457,11 @@ def get_crash_frame_from_event_data(data, frame_filter=None):
         return default
 
 
-def lookup_frame_cache(keys):
-    rv = {}
-    for key in keys:
-        rv[key] = cache.get(key)
-    return rv
+def lookup_frame_cache(keys_by_namespace):
+    """Looks up the cache values of ``{namespace: [cache_key, ...]}`` in a
+    single round trip and returns a ``{(namespace, cache_key): value}`` dict.
+    """
+    return frame_cache.get_many(keys_by_namespace)
 
 
 def get_stacktrace_processing_task(infos, processors):
@@ -468,11 +485,19 @@ def get_stacktrace_processing_task(infos, processors):
                 processable_frame
             )
             if processable_frame.cache_key is not None:
-                to_lookup[processable_frame.cache_key] = processable_frame
-
-    frame_cache = lookup_frame_cache(to_lookup)
-    for cache_key, processable_frame in to_lookup.items():
-        processable_frame.cache_value = frame_cache.get(cache_key)
+                to_lookup.setdefault(
+                    (processable_frame.cache_namespace, processable_frame.cache_key), []
+                ).append(processable_frame)
+
+    if to_lookup:
+        keys_by_namespace = {}
+        for namespace, cache_key in to_lookup:
+            keys_by_namespace.setdefault(namespace, []).append(cache_key)
+
+        cache_values = lookup_frame_cache(keys_by_namespace)
+        for key, processable_frames in to_lookup.items():
+            for processable_frame in processable_frames:
+                processable_frame.cache_value = cache_values.get(key)
 
     return StacktraceProcessingTask(
         processable_stacktraces=by_stacktrace_info, processors=by_processor
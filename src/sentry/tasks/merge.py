@@ -5,6 +5,7 @@ from django.db.models import F
 
 from sentry import eventstream, similarity
 from sentry.app import tsdb
+from sentry.grouping import grouphash_cache
 from sentry.tasks.base import instrumented_task, track_group_async_operation
 
 logger = logging.getLogger("sentry.merge")
@@ -105,6 +106,9 @@ def merge_groups(
             model_list, group, new_group, logger=logger, transaction_id=transaction_id
         )
 
+        # Grouphashes of the merged group may have been moved to the new group.
+        grouphash_cache.invalidate_on_commit(group.project_id)
+
         if not has_more:
             # There are no more objects to merge for *this* "from" group, remove it
             # from the list of "from" groups that are being merged, and finish the
@@ -28,7 +28,7 @@ def update_config_cache(generate, organization_id=None, project_id=None, update_
 
     from sentry.models import Project, ProjectKey, ProjectKeyStatus
     from sentry.relay import projectconfig_cache
-    from sentry.relay.config import get_project_config
+    from sentry.relay.config import get_project_configs_bulk
 
     if project_id:
         set_current_event_project(project_id)
@@ -61,12 +61,13 @@ def update_config_cache(generate, organization_id=None, project_id=None, update_
         project_keys.setdefault(key.project_id, []).append(key)
 
     if generate:
-        config_cache = {}
+        cache_keys = []
+        config_projects = []
+        config_project_keys = []
         for project in projects:
-            project_config = get_project_config(
-                project, project_keys=project_keys.get(project.id, []), full_config=True
-            )
-            config_cache[project.id] = project_config.to_dict()
+            cache_keys.append(project.id)
+            config_projects.append(project)
+            config_project_keys.append(project_keys.get(project.id, []))
 
             for key in project_keys.get(project.id) or ():
                 # XXX(markus): This is currently the cleanest way to get only
@@ -75,8 +76,17 @@ def update_config_cache(generate, organization_id=None, project_id=None, update_
                 if key.status != ProjectKeyStatus.ACTIVE:
                     continue
 
-                project_config = get_project_config(project, project_keys=[key], full_config=True)
-                config_cache[key.public_key] = project_config.to_dict()
+                cache_keys.append(key.public_key)
+                config_projects.append(project)
+                config_project_keys.append([key])
+
+        project_configs = get_project_configs_bulk(
+            config_projects, config_project_keys, full_config=True
+        )
+        config_cache = {
+            cache_key: project_config.to_dict()
+            for cache_key, project_config in zip(cache_keys, project_configs)
+        }
 
         projectconfig_cache.set_many(config_cache)
     else:
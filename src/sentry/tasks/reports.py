@@ -4,10 +4,10 @@ import math
 import operator
 import zlib
 from calendar import Calendar
-from collections import OrderedDict, namedtuple
+from collections import OrderedDict, defaultdict, namedtuple
 from datetime import datetime, timedelta
 from functools import partial, reduce
-from itertools import zip_longest
+from itertools import groupby, zip_longest
 from typing import Iterable, Mapping, NamedTuple, Tuple
 
 import pytz
@@ -21,11 +21,12 @@ from snuba_sdk.expressions import Granularity
 from snuba_sdk.function import Function
 from snuba_sdk.query import Query
 
-from sentry import features
+from sentry import features, options
 from sentry.app import tsdb
 from sentry.constants import DataCategory
 from sentry.models import (
     Activity,
+    Group,
     GroupStatus,
     Organization,
     OrganizationStatus,
@@ -36,7 +37,7 @@ from sentry.models import (
 )
 from sentry.snuba.dataset import Dataset
 from sentry.tasks.base import instrumented_task
-from sentry.utils import json, redis
+from sentry.utils import json, metrics, redis
 from sentry.utils.compat import filter, map, zip
 from sentry.utils.dates import floor_to_utc_day, to_datetime, to_timestamp
 from sentry.utils.email import MessageBuilder
@@ -54,6 +55,11 @@ BATCH_SIZE = 20000
 
 ONE_DAY = int(timedelta(days=1).total_seconds())
 
+# Daily totals are cached long enough to build the calendar of the weekly
+# report (three months) from them.
+DAILY_TOTALS_TTL = ONE_DAY * 100
+DAILY_TOTALS_VERSION = 1
+
 project_breakdown_colors = ["#422C6E", "#895289", "#D6567F", "#F38150", "#F2B713"]
 
 calendar_heat_colors = [
@@ -221,7 +227,131 @@ def _query_tsdb_groups_chunked(func, issue_ids, start, stop, rollup):
     return combined
 
 
-def build_project_series(start__stop, project):
+def _get_group_ids_by_project(queryset):
+    group_ids = defaultdict(set)
+    for project_id, group_id in queryset:
+        group_ids[project_id].add(group_id)
+    return group_ids
+
+
+class DailyProjectTotals:
+    """
+    Number of events per project and day, the equivalent of querying TSDB
+    for ``tsdb.models.project`` with a daily rollup.
+
+    All days requested for any of the projects are fetched with a single TSDB
+    query. Days that are over are additionally cached in Redis (see
+    ``reports.cache-daily-totals``), so that the weekly reports (which look
+    at three months of data for the calendar) only query the last week.
+    """
+
+    def __init__(self, projects, cluster=None):
+        self.projects = list(projects)
+        self.cluster = cluster if cluster is not None else redis.clusters.get("default")
+        self._totals = {project.id: {} for project in self.projects}
+        self._days = set()
+
+    def _make_key(self, organization_id, day):
+        return f"r:d:{DAILY_TOTALS_VERSION}:{organization_id}:{day}"
+
+    def _get_days(self, start, stop):
+        # Like TSDB, include the bucket `stop` falls into.
+        start = int(to_timestamp(floor_to_utc_day(start)))
+        return range(start, int(to_timestamp(stop)) + 1, ONE_DAY)
+
+    def fetch(self, start, stop):
+        """
+        Fetch all days between ``start`` and ``stop`` that were not fetched
+        yet.
+        """
+        days = [day for day in self._get_days(start, stop) if day not in self._days]
+        if not days or not self.projects:
+            return
+
+        cacheable = []
+        if options.get("reports.cache-daily-totals"):
+            today = to_timestamp(floor_to_utc_day(timezone.now()))
+            cacheable = [day for day in days if day + ONE_DAY <= today]
+
+        missing = set(days) - set(cacheable)
+        missing.update(self._fetch_cached(cacheable))
+
+        if missing:
+            results = tsdb.get_range(
+                tsdb.models.project,
+                list(self._totals.keys()),
+                to_datetime(min(missing)),
+                to_datetime(max(missing)),
+                rollup=ONE_DAY,
+            )
+            for project_id, series in results.items():
+                totals = self._totals[project_id]
+                for timestamp, count in series:
+                    if timestamp in missing:
+                        totals[timestamp] = count
+
+            self._store_cached([day for day in cacheable if day in missing])
+
+        self._days.update(days)
+
+    def _get_project_ids_by_organization(self):
+        project_ids = defaultdict(list)
+        for project in self.projects:
+            project_ids[project.organization_id].append(project.id)
+        return project_ids
+
+    def _fetch_cached(self, days):
+        """
+        Load cached days and return the days that have to be queried.
+        """
+        if not days:
+            return set()
+
+        with self.cluster.map() as client:
+            results = [
+                (day, project_ids, client.hmget(self._make_key(organization_id, day), project_ids))
+                for organization_id, project_ids in self._get_project_ids_by_organization().items()
+                for day in days
+            ]
+
+        missing = set()
+        for day, project_ids, result in results:
+            for project_id, count in zip(project_ids, result.value):
+                if count is None:
+                    missing.add(day)
+                else:
+                    self._totals[project_id][day] = int(count)
+
+        metrics.incr("reports.daily_totals.cached", amount=len(set(days) - missing))
+        return missing
+
+    def _store_cached(self, days):
+        if not days:
+            return
+
+        with self.cluster.map() as client:
+            for organization_id, project_ids in self._get_project_ids_by_organization().items():
+                for day in days:
+                    key = self._make_key(organization_id, day)
+                    client.hmset(
+                        key,
+                        {
+                            project_id: self._totals[project_id].get(day, 0)
+                            for project_id in project_ids
+                        },
+                    )
+                    client.expire(key, DAILY_TOTALS_TTL)
+
+    def get_range(self, project_id, start, stop):
+        self.fetch(start, stop)
+        totals = self._totals[project_id]
+        return [(day, totals.get(day, 0)) for day in self._get_days(start, stop)]
+
+    def get_sum(self, project_id, start, stop):
+        return sum(count for _, count in self.get_range(project_id, start, stop))
+
+
+def build_organization_series(start__stop, projects, daily_totals):
     start, stop = start__stop
     rollup = ONE_DAY
 
@@ -229,29 +359,39 @@ def build_project_series(start__stop, project):
     assert resolution == rollup, "resolution does not match requested value"
 
     clean = partial(clean_series, start, stop, rollup)
-    issue_ids = project.group_set.filter(
-        status=GroupStatus.RESOLVED, resolved_at__gte=start, resolved_at__lt=stop
-    ).values_list("id", flat=True)
-
-    tsdb_range_resolved = _query_tsdb_groups_chunked(tsdb.get_range, issue_ids, start, stop, rollup)
-    resolved_series = reduce(
-        merge_series,
-        map(clean, tsdb_range_resolved.values()),
-        clean([(timestamp, 0) for timestamp in series]),
+    issue_ids = _get_group_ids_by_project(
+        Group.objects.filter(
+            project__in=projects,
+            status=GroupStatus.RESOLVED,
+            resolved_at__gte=start,
+            resolved_at__lt=stop,
+        ).values_list("project_id", "id")
     )
 
-    total_series = clean(
-        tsdb.get_range(tsdb.models.project, [project.id], start, stop, rollup=rollup)[project.id]
+    tsdb_range_resolved = _query_tsdb_groups_chunked(
+        tsdb.get_range, set().union(*issue_ids.values()), start, stop, rollup
     )
 
-    return merge_series(
-        resolved_series,
-        total_series,
-        lambda resolved, total: (resolved, total - resolved),  # unresolved
-    )
+    rv = {}
+    for project in projects:
+        resolved_series = reduce(
+            merge_series,
+            map(clean, [tsdb_range_resolved[id] for id in issue_ids[project.id]]),
+            clean([(timestamp, 0) for timestamp in series]),
+        )
 
+        total_series = clean(daily_totals.get_range(project.id, start, stop))
 
-def build_project_aggregates(ignore__stop, project):
+        rv[project.id] = merge_series(
+            resolved_series,
+            total_series,
+            lambda resolved, total: (resolved, total - resolved),  # unresolved
+        )
+
+    return rv
+
+
+def build_organization_aggregates(ignore__stop, projects, daily_totals):
     # TODO: This needs to return ``None`` for periods that don't have any data
     # (because the project is not old enough) and possibly extrapolate for
     # periods that only have partial periods.
@@ -260,25 +400,27 @@ def build_project_aggregates(ignore__stop, project):
     period = timedelta(days=7)
     start = stop - (period * segments)
 
-    def get_aggregate_value(start, stop):
-        return tsdb.get_sums(tsdb.models.project, (project.id,), start, stop, rollup=ONE_DAY)[
-            project.id
+    return {
+        project.id: [
+            daily_totals.get_sum(
+                project.id,
+                start + (period * i),
+                start + (period * (i + 1) - timedelta(seconds=1)),
+            )
+            for i in range(segments)
         ]
-
-    return [
-        get_aggregate_value(start + (period * i), start + (period * (i + 1) - timedelta(seconds=1)))
-        for i in range(segments)
-    ]
+        for project in projects
+    }
 
 
-def build_project_issue_summaries(interval, project):
+def build_organization_issue_summaries(interval, projects, daily_totals):
     start, stop = interval
 
-    queryset = project.group_set.exclude(status=GroupStatus.IGNORED)
+    queryset = Group.objects.filter(project__in=projects).exclude(status=GroupStatus.IGNORED)
 
     # Fetch all new issues.
-    new_issue_ids = set(
-        queryset.filter(first_seen__gte=start, first_seen__lt=stop).values_list("id", flat=True)
+    new_issue_ids = _get_group_ids_by_project(
+        queryset.filter(first_seen__gte=start, first_seen__lt=stop).values_list("project_id", "id")
     )
 
     # Fetch all regressions. This is a little weird, since there's no way to
@@ -288,7 +430,7 @@ def build_project_issue_summaries(interval, project):
     # past week. (In theory, the activity table *could* be used to answer this
     # query without the subselect, but there's no suitable indexes to make it's
     # performance predictable.)
-    reopened_issue_ids = set(
+    reopened_issue_ids = _get_group_ids_by_project(
         Activity.objects.filter(
             group__in=queryset.filter(
                 last_seen__gte=start,
@@ -300,27 +442,34 @@ def build_project_issue_summaries(interval, project):
             datetime__lt=stop,
         )
         .distinct()
-        .values_list("group_id", flat=True)
+        .values_list("project_id", "group_id")
     )
 
     rollup = ONE_DAY
     event_counts = _query_tsdb_groups_chunked(
-        tsdb.get_sums, new_issue_ids | reopened_issue_ids, start, stop, rollup
+        tsdb.get_sums,
+        set().union(*new_issue_ids.values(), *reopened_issue_ids.values()),
+        start,
+        stop,
+        rollup,
     )
-
-    new_issue_count = sum(event_counts[id] for id in new_issue_ids)
-    reopened_issue_count = sum(event_counts[id] for id in reopened_issue_ids)
-    existing_issue_count = max(
-        tsdb.get_sums(tsdb.models.project, [project.id], start, stop, rollup=rollup)[project.id]
-        - new_issue_count
-        - reopened_issue_count,
-        0,
+    project_counts = tsdb.get_sums(
+        tsdb.models.project, [project.id for project in projects], start, stop, rollup=rollup
     )
 
-    return [new_issue_count, reopened_issue_count, existing_issue_count]
+    rv = {}
+    for project in projects:
+        new_issue_count = sum(event_counts[id] for id in new_issue_ids[project.id])
+        reopened_issue_count = sum(event_counts[id] for id in reopened_issue_ids[project.id])
+        existing_issue_count = max(
+            project_counts[project.id] - new_issue_count - reopened_issue_count, 0
+        )
+        rv[project.id] = [new_issue_count, reopened_issue_count, existing_issue_count]
 
+    return rv
 
-def build_project_usage_outcomes(start__stop, project):
+
+def build_organization_usage_outcomes(start__stop, projects, daily_totals):
     start, stop = start__stop
 
     # XXX(epurkhiser): Tsdb used to use day buckets, where the end would
@@ -328,62 +477,61 @@ def build_project_usage_outcomes(start__stop, project):
     # capture the entire last day
     end = stop + timedelta(days=1)
 
-    query = Query(
-        dataset=Dataset.Outcomes.value,
-        match=Entity("outcomes"),
-        select=[
-            Column("outcome"),
-            Column("category"),
-            Function("sum", [Column("quantity")], "total"),
-        ],
-        where=[
-            Condition(Column("timestamp"), Op.GTE, start),
-            Condition(Column("timestamp"), Op.LT, end),
-            Condition(Column("project_id"), Op.EQ, project.id),
-            Condition(Column("org_id"), Op.EQ, project.organization_id),
-            Condition(
-                Column("outcome"), Op.IN, [Outcome.ACCEPTED, Outcome.FILTERED, Outcome.RATE_LIMITED]
-            ),
-            Condition(
+    rv = {}
+    for organization_id, org_projects in groupby(
+        sorted(projects, key=lambda project: project.organization_id),
+        key=lambda project: project.organization_id,
+    ):
+        org_projects = list(org_projects)
+        query = Query(
+            dataset=Dataset.Outcomes.value,
+            match=Entity("outcomes"),
+            select=[
+                Column("project_id"),
+                Column("outcome"),
                 Column("category"),
-                Op.IN,
-                [*DataCategory.error_categories(), DataCategory.TRANSACTION],
-            ),
-        ],
-        groupby=[Column("outcome"), Column("category")],
-        granularity=Granularity(ONE_DAY),
-    )
-    data = raw_snql_query(query, referrer="reports.outcomes")["data"]
-
-    return (
-        # Accepted errors
-        sum(
-            row["total"]
-            for row in data
-            if row["category"] in DataCategory.error_categories()
-            and row["outcome"] == Outcome.ACCEPTED
-        ),
-        # Dropped errors
-        sum(
-            row["total"]
-            for row in data
-            if row["category"] in DataCategory.error_categories()
-            and row["outcome"] == Outcome.RATE_LIMITED
-        ),
-        # accepted transactions
-        sum(
-            row["total"]
-            for row in data
-            if row["category"] == DataCategory.TRANSACTION and row["outcome"] == Outcome.ACCEPTED
-        ),
-        # Dropped transactions
-        sum(
-            row["total"]
-            for row in data
-            if row["category"] == DataCategory.TRANSACTION
-            and row["outcome"] == Outcome.RATE_LIMITED
-        ),
-    )
+                Function("sum", [Column("quantity")], "total"),
+            ],
+            where=[
+                Condition(Column("timestamp"), Op.GTE, start),
+                Condition(Column("timestamp"), Op.LT, end),
+                Condition(Column("project_id"), Op.IN, [project.id for project in org_projects]),
+                Condition(Column("org_id"), Op.EQ, organization_id),
+                Condition(
+                    Column("outcome"),
+                    Op.IN,
+                    [Outcome.ACCEPTED, Outcome.FILTERED, Outcome.RATE_LIMITED],
+                ),
+                Condition(
+                    Column("category"),
+                    Op.IN,
+                    [*DataCategory.error_categories(), DataCategory.TRANSACTION],
+                ),
+            ],
+            groupby=[Column("project_id"), Column("outcome"), Column("category")],
+            granularity=Granularity(ONE_DAY),
+        )
+        data = raw_snql_query(query, referrer="reports.outcomes")["data"]
+
+        for project in org_projects:
+            rv[project.id] = [0, 0, 0, 0]
+
+        for row in data:
+            if row["category"] in DataCategory.error_categories():
+                index = 0
+            elif row["category"] == DataCategory.TRANSACTION:
+                index = 2
+            else:
+                continue
+
+            if row["outcome"] == Outcome.ACCEPTED:
+                # Accepted errors or transactions
+                rv[row["project_id"]][index] += row["total"]
+            elif row["outcome"] == Outcome.RATE_LIMITED:
+                # Dropped errors or transactions
+                rv[row["project_id"]][index + 1] += row["total"]
+
+    return {project_id: tuple(outcomes) for project_id, outcomes in rv.items()}
 
 
 def get_calendar_range(ignore__stop_time, months):
@@ -426,15 +574,40 @@ def clean_calendar_data(project, series, start, stop, rollup, timestamp=None):
     return map(remove_invalid_values, clean_series(start, stop, rollup, series))
 
 
-def build_project_calendar_series(interval, project):
+def build_organization_calendar_series(interval, projects, daily_totals):
     start, stop = get_calendar_query_range(interval, 3)
 
     rollup = ONE_DAY
-    series = tsdb.get_range(tsdb.models.project, [project.id], start, stop, rollup=rollup)[
-        project.id
-    ]
+    return {
+        project.id: clean_calendar_data(
+            project, daily_totals.get_range(project.id, start, stop), start, stop, rollup
+        )
+        for project in projects
+    }
+
 
-    return clean_calendar_data(project, series, start, stop, rollup)
+def _build_for_project(build, interval, project):
+    return build(interval, [project], DailyProjectTotals([project]))[project.id]
+
+
+def build_project_series(start__stop, project):
+    return _build_for_project(build_organization_series, start__stop, project)
+
+
+def build_project_aggregates(ignore__stop, project):
+    return _build_for_project(build_organization_aggregates, ignore__stop, project)
+
+
+def build_project_issue_summaries(interval, project):
+    return _build_for_project(build_organization_issue_summaries, interval, project)
+
+
+def build_project_usage_outcomes(start__stop, project):
+    return _build_for_project(build_organization_usage_outcomes, start__stop, project)
+
+
+def build_project_calendar_series(interval, project):
+    return _build_for_project(build_organization_calendar_series, interval, project)
 
 
 def build_report(fields):
@@ -444,6 +617,11 @@ def build_report(fields):
 
     Each field is a tuple of the (field name, builder fn, merge fn).
 
+    The builder function is called with the interval, a list of projects and
+    their ``DailyProjectTotals`` and returns the value of that field for each
+    of the projects, so that every field is queried once for all projects of
+    an organization.
+
     The merge function is used to merge the value of that field together for
     multiple reports.
     """
@@ -451,8 +629,15 @@ def build_report(fields):
 
     cls = namedtuple("Report", names)
 
-    def prepare(*args):
-        return cls(*(f(*args) for f in field_builders))
+    def prepare(interval, projects):
+        projects = list(projects)
+        daily_totals = DailyProjectTotals(projects)
+        # The calendar covers the days all other fields need, fetch them
+        # with a single query.
+        daily_totals.fetch(get_calendar_query_range(interval, 3)[0], interval[1])
+
+        values = [f(interval, projects, daily_totals) for f in field_builders]
+        return {project.id: cls(*(value[project.id] for value in values)) for project in projects}
 
     def merge(target, other):
         return cls(*(f(target[i], other[i]) for i, f in enumerate(field_mergers)))
@@ -460,29 +645,33 @@ def build_report(fields):
     return cls, prepare, merge
 
 
-Report, build_project_report, merge_reports = build_report(
+Report, build_organization_reports, merge_reports = build_report(
     [
         (
             "series",
-            build_project_series,
+            build_organization_series,
             partial(merge_series, function=merge_sequences),
         ),
         (
             "aggregates",
-            build_project_aggregates,
+            build_organization_aggregates,
             partial(merge_sequences, function=safe_add),
         ),
-        ("issue_summaries", build_project_issue_summaries, merge_sequences),
-        ("series_outcomes", build_project_usage_outcomes, merge_sequences),
+        ("issue_summaries", build_organization_issue_summaries, merge_sequences),
+        ("series_outcomes", build_organization_usage_outcomes, merge_sequences),
         (
             "calendar_series",
-            build_project_calendar_series,
+            build_organization_calendar_series,
             partial(merge_series, function=safe_add),
         ),
     ],
 )
 
 
+def build_project_report(interval, project):
+    return build_organization_reports(interval, [project])[project.id]
+
+
 class ReportBackend:
     def build(self, timestamp, duration, project):
         """
@@ -490,6 +679,13 @@ class ReportBackend:
         """
         return build_project_report(_to_interval(timestamp, duration), project)
 
+    def build_many(self, timestamp, duration, projects):
+        """
+        Constructs the reports for a set of projects, returning a mapping of
+        project ID to report.
+        """
+        return build_organization_reports(_to_interval(timestamp, duration), projects)
+
     def prepare(self, timestamp, duration, organization):
         """
         Build and store reports for all projects in an organization.
@@ -510,7 +706,8 @@ class DummyReportBackend(ReportBackend):
 
     def fetch(self, timestamp, duration, organization, projects):
         assert all(project.organization_id == organization.id for project in projects)
-        return map(partial(self.build, timestamp, duration), projects)
+        reports = self.build_many(timestamp, duration, projects)
+        return [reports[project.id] for project in projects]
 
 
 class RedisReportBackend(ReportBackend):
@@ -536,9 +733,12 @@ class RedisReportBackend(ReportBackend):
         return Report(*json.loads(zlib.decompress(value)))
 
     def prepare(self, timestamp, duration, organization):
-        reports = {}
-        for project in organization.project_set.all():
-            reports[project.id] = self.__encode(self.build(timestamp, duration, project))
+        reports = {
+            project_id: self.__encode(report)
+            for project_id, report in self.build_many(
+                timestamp, duration, organization.project_set.all()
+            ).items()
+        }
 
         if not reports:
             # XXX: HMSET requires at least one key/value pair, so we need to
@@ -6,6 +6,7 @@ from enum import Enum
 from django.conf import settings
 from django.utils import timezone
 
+from sentry.tsdb.series import SeriesArray
 from sentry.utils.compat import map
 from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.services import Service
@@ -100,7 +101,9 @@ class BaseTSDB(Service):
     __read_methods__ = frozenset(
         [
             "get_range",
+            "get_range_array",
             "get_sums",
+            "get_sums_array",
             "get_distinct_counts_series",
             "get_distinct_counts_totals",
             "get_distinct_counts_union",
@@ -361,8 +364,27 @@ class BaseTSDB(Service):
         """
         raise NotImplementedError
 
+    def get_range_array(
+        self, model, keys, start, end, rollup=None, environment_ids=None, use_cache=False
+    ):
+        """
+        Like ``get_range``, but returns a ``SeriesArray`` (a keys x buckets
+        matrix of counts) instead of a list of points per key.
+        """
+        return SeriesArray.from_points(
+            self.get_range(
+                model,
+                keys,
+                start,
+                end,
+                rollup,
+                environment_ids=environment_ids,
+                use_cache=use_cache,
+            )
+        )
+
     def get_sums(self, model, keys, start, end, rollup=None, environment_id=None, use_cache=False):
-        range_set = self.get_range(
+        return self.get_range_array(
             model,
             keys,
             start,
@@ -370,28 +392,34 @@ class BaseTSDB(Service):
             rollup,
             environment_ids=[environment_id] if environment_id is not None else None,
             use_cache=use_cache,
-        )
-        sum_set = {key: sum(p for _, p in points) for (key, points) in range_set.items()}
-        return sum_set
+        ).sums()
+
+    def get_sums_array(
+        self, model, keys, start, end, rollup=None, environment_id=None, use_cache=False
+    ):
+        """
+        Returns a list of sums in the order of ``keys``.
+        """
+        return self.get_range_array(
+            model,
+            keys,
+            start,
+            end,
+            rollup,
+            environment_ids=[environment_id] if environment_id is not None else None,
+            use_cache=use_cache,
+        ).get_totals(keys)
 
     def rollup(self, values, rollup):
         """
         Given a set of values (as returned from ``get_range``), roll them up
         using the ``rollup`` time (in seconds).
         """
-        normalize_ts_to_epoch = self.normalize_ts_to_epoch
-        result = {}
-        for key, points in values.items():
-            result[key] = []
-            last_new_ts = None
-            for (ts, count) in points:
-                new_ts = normalize_ts_to_epoch(ts, rollup)
-                if new_ts == last_new_ts:
-                    result[key][-1][1] += count
-                else:
-                    result[key].append([new_ts, count])
-                    last_new_ts = new_ts
-        return result
+        series = SeriesArray.from_points(values).rollup(rollup)
+        return {
+            key: [[ts, count] for ts, count in zip(series.timestamps, row)]
+            for key, row in zip(series.keys, series.rows)
+        }
 
     def record(self, model, key, values, timestamp=None, environment_id=None):
         """
@@ -0,0 +1,306 @@
+"""
+Write-combining front-end for the Redis TSDB.
+
+Every event records a handful of counters, distinct counters and frequency
+tables, and ``RedisTSDB`` writes each of those to every rollup (and
+environment) right away. Since most events of a process fall into the same
+few rollup buckets, ``WriteCombiningRedisTSDB`` instead accumulates writes
+in-process (counters are summed, distinct counter values are merged into
+sets, frequency scores are summed per member) and writes them as a single
+batch per cluster when either:
+
+* ``flush_interval`` seconds have passed since the last flush, or
+* more than ``max_pending`` operations are pending.
+
+Reads are passed through and therefore lag behind by up to
+``flush_interval``. Pending writes are lost if the process dies, which bounds
+the loss window to ``flush_interval`` seconds or ``max_pending`` operations.
+Failed flushes to durable clusters are retried with the next flush as long as
+the buffer stays below ``max_pending`` operations, failed flushes to
+non-durable clusters are dropped (see ``RedisTSDB.get_cluster``).
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.utils import timezone
+
+from sentry.tsdb.redis import CountMinScript, RedisTSDB
+from sentry.utils import metrics
+from sentry.utils.dates import to_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+class PendingWrites:
+    def __init__(self):
+        # (hash_key, hash_field) -> count
+        self.counters = defaultdict(int)
+        # hash_key -> expiry
+        self.counter_expiries = {}
+        # key -> (routing key, values, expiry)
+        self.distinct_counters = {}
+        # (routing key, keys) -> {member: score}
+        self.frequencies = {}
+        # key -> expiry
+        self.frequency_expiries = {}
+
+    def __len__(self):
+        return len(self.counters) + len(self.distinct_counters) + len(self.frequencies)
+
+    def add_counters(self, key_operations, key_expiries):
+        for operation, count in key_operations.items():
+            self.counters[operation] += count
+        for hash_key, expiry in key_expiries.items():
+            if self.counter_expiries.get(hash_key, 0) < expiry:
+                self.counter_expiries[hash_key] = expiry
+
+    def add_distinct_counter(self, routing_key, key, values, expiry):
+        pending = self.distinct_counters.get(key)
+        if pending is None:
+            self.distinct_counters[key] = (routing_key, set(values), expiry)
+        else:
+            pending[1].update(values)
+            if pending[2] < expiry:
+                self.distinct_counters[key] = (routing_key, pending[1], expiry)
+
+    def add_frequencies(self, routing_key, keys, items, expirations):
+        scores = self.frequencies.setdefault((routing_key, tuple(keys)), defaultdict(int))
+        for member, score in items.items():
+            scores[member] += score
+        for key, expiry in expirations.items():
+            if self.frequency_expiries.get(key, 0) < expiry:
+                self.frequency_expiries[key] = expiry
+
+    def add_distinct_counters(self, records):
+        for routing_key, key, values, expiry in records:
+            self.add_distinct_counter(routing_key, key, values, expiry)
+
+    def add_frequency_tables(self, tables):
+        for routing_key, keys, items, expirations in tables:
+            self.add_frequencies(routing_key, keys, items, expirations)
+
+    def merge(self, other):
+        self.add_counters(other.counters, other.counter_expiries)
+        for key, (routing_key, values, expiry) in other.distinct_counters.items():
+            self.add_distinct_counter(routing_key, key, values, expiry)
+        for (routing_key, keys), items in other.frequencies.items():
+            self.add_frequencies(routing_key, keys, items, {})
+        for key, expiry in other.frequency_expiries.items():
+            if self.frequency_expiries.get(key, 0) < expiry:
+                self.frequency_expiries[key] = expiry
+
+
+class WriteCombiningRedisTSDB(RedisTSDB):
+    """
+    A ``RedisTSDB`` that buffers ``incr_multi``, ``record_multi`` and
+    ``record_frequency_multi`` writes in-process and flushes them in batches.
+
+    :param flush_interval: maximum number of seconds writes are buffered.
+    :param max_pending: number of buffered operations (distinct hash fields,
+        distinct counter keys and frequency tables) that triggers a flush.
+    :param background_flush: whether to flush idle buffers from a background
+        thread. Without it, buffers are only flushed on writes and at exit.
+    """
+
+    def __init__(self, flush_interval=1.0, max_pending=10000, background_flush=True, **options):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.background_flush = background_flush
+
+        self._lock = threading.Lock()
+        # (cluster, durable) -> PendingWrites
+        self._pending = {}
+        self._pending_size = 0
+        self._last_flush = time.monotonic()
+        self._pid = os.getpid()
+        self._flusher = None
+
+        atexit.register(self.flush_pending, reason="exit")
+
+        super().__init__(**options)
+
+    def _add(self, cluster_key, func, *args):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Writes buffered before a fork are flushed by the parent.
+                self._pending = {}
+                self._pending_size = 0
+                self._flusher = None
+                self._pid = os.getpid()
+
+            pending = self._pending.get(cluster_key)
+            if pending is None:
+                pending = self._pending[cluster_key] = PendingWrites()
+
+            self._pending_size -= len(pending)
+            func(pending, *args)
+            self._pending_size += len(pending)
+
+    def _after_write(self):
+        if self._pending_size >= self.max_pending:
+            self.flush_pending(reason="size")
+        elif time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush_pending(reason="interval")
+        elif self.background_flush and self._flusher is None:
+            self._start_flusher()
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(
+                target=self._run_flusher, name="tsdb-write-combining", daemon=True
+            )
+            self._flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self._pid != os.getpid():
+                return
+            if self._pending_size and time.monotonic() - self._last_flush >= self.flush_interval:
+                try:
+                    self.flush_pending(reason="background")
+                except Exception:
+                    logger.exception("tsdb.write-combining.flush-failed")
+
+    def incr_multi(self, items, timestamp=None, count=1, environment_id=None):
+        self.validate_arguments([item[0] for item in items], [environment_id])
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        for cluster_key, environment_ids in self.get_cluster_groups({None, environment_id}):
+            key_operations, key_expiries = self.get_counter_operations(
+                items, timestamp, count, environment_ids
+            )
+            self._add(cluster_key, PendingWrites.add_counters, key_operations, key_expiries)
+
+        self._after_write()
+
+    def record_multi(self, items, timestamp=None, environment_id=None):
+        self.validate_arguments([model for model, key, values in items], [environment_id])
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        ts = int(to_timestamp(timestamp))
+
+        for cluster_key, environment_ids in self.get_cluster_groups({None, environment_id}):
+            records = []
+            for model, key, values in items:
+                for rollup, max_values in self.rollups.items():
+                    expiry = self.calculate_expiry(rollup, max_values, timestamp)
+                    for environment_id in environment_ids:
+                        k = self.make_key(model, rollup, ts, key, environment_id)
+                        records.append((key, k, values, expiry))
+            self._add(cluster_key, PendingWrites.add_distinct_counters, records)
+
+        self._after_write()
+
+    def record_frequency_multi(self, requests, timestamp=None, environment_id=None):
+        self.validate_arguments([model for model, request in requests], [environment_id])
+
+        if not self.enable_frequency_sketches:
+            return
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        ts = int(to_timestamp(timestamp))
+
+        for cluster_key, environment_ids in self.get_cluster_groups({None, environment_id}):
+            tables = []
+            for model, request in requests:
+                for key, items in request.items():
+                    keys = []
+                    expirations = {}
+                    for rollup, max_values in self.rollups.items():
+                        expiry = self.calculate_expiry(rollup, max_values, timestamp)
+                        for environment_id in environment_ids:
+                            chunk = list(
+                                self.make_frequency_table_keys(
+                                    model, rollup, ts, key, environment_id
+                                )
+                            )
+                            keys.extend(chunk)
+                            for k in chunk:
+                                expirations[k] = expiry
+
+                    tables.append((key, keys, items, expirations))
+            self._add(cluster_key, PendingWrites.add_frequency_tables, tables)
+
+        self._after_write()
+
+    def flush_pending(self, reason="manual"):
+        """
+        Write all buffered operations.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            pending, self._pending = self._pending, {}
+            self._pending_size = 0
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return
+
+        with metrics.timer("tsdb.write_combining.flush", tags={"reason": reason}):
+            for (cluster, durable), writes in pending.items():
+                metrics.incr(
+                    "tsdb.write_combining.flushed",
+                    amount=len(writes),
+                    tags={"reason": reason},
+                    skip_internal=True,
+                )
+                try:
+                    self._write(cluster, writes)
+                except Exception:
+                    logger.exception("tsdb.write-combining.flush-failed")
+                    self._handle_failed_flush((cluster, durable), writes)
+
+    def _handle_failed_flush(self, cluster_key, writes):
+        cluster, durable = cluster_key
+        with self._lock:
+            current = self._pending.get(cluster_key)
+            if durable and len(writes) + (len(current) if current else 0) < self.max_pending:
+                if current is None:
+                    current = self._pending[cluster_key] = PendingWrites()
+                self._pending_size -= len(current)
+                current.merge(writes)
+                self._pending_size += len(current)
+                metrics.incr("tsdb.write_combining.requeued", amount=len(writes))
+            else:
+                metrics.incr("tsdb.write_combining.dropped", amount=len(writes))
+
+    def _write(self, cluster, writes):
+        if writes.counters:
+            with cluster.map() as client:
+                self.write_counter_operations(client, writes.counters, writes.counter_expiries)
+
+        if writes.distinct_counters:
+            with cluster.fanout() as client:
+                for k, (key, values, expiry) in writes.distinct_counters.items():
+                    c = client.target_key(key)
+                    c.pfadd(k, *values)
+                    c.expireat(k, expiry)
+
+        if writes.frequencies:
+            commands = {}
+            for (key, keys), items in writes.frequencies.items():
+                arguments = ["INCR"] + list(self.DEFAULT_SKETCH_PARAMETERS)
+                for member, score in items.items():
+                    arguments.extend((score, member))
+
+                cmds = commands.setdefault(key, [])
+                cmds.append((CountMinScript, list(keys), arguments))
+                for k in keys:
+                    cmds.append(("EXPIREAT", k, writes.frequency_expiries[k]))
+
+            cluster.execute_commands(commands)
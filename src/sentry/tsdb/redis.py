@@ -12,6 +12,7 @@ from django.utils.encoding import force_bytes
 from pkg_resources import resource_string
 
 from sentry.tsdb.base import BaseTSDB
+from sentry.tsdb.series import SeriesArray
 from sentry.utils.compat import crc32, map, zip
 from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.redis import SentryScript, check_cluster_versions, get_cluster_from_options
@@ -227,38 +228,53 @@ class RedisTSDB(BaseTSDB):
                 manager = SuppressionWrapper(manager)
 
             with manager as client:
-                # (hash_key, hash_field) -> count
-                key_operations = defaultdict(lambda: 0)
-                # (hash_key) -> "max expiration encountered"
-                key_expiries = defaultdict(lambda: 0.0)
-
-                for rollup, max_values in self.rollups.items():
-                    for item in items:
-                        if len(item) == 2:
-                            model, key = item
-                            options = {}
-                        else:
-                            model, key, options = item
-
-                        count = options.get("count", default_count)
-                        timestamp = options.get("timestamp", default_timestamp)
+                key_operations, key_expiries = self.get_counter_operations(
+                    items, default_timestamp, default_count, environment_ids
+                )
+                self.write_counter_operations(client, key_operations, key_expiries)
 
-                        expiry = self.calculate_expiry(rollup, max_values, timestamp)
+    def get_counter_operations(self, items, default_timestamp, default_count, environment_ids):
+        """
+        Returns a 2-tuple of ``{(hash_key, hash_field): count}`` and
+        ``{hash_key: expiry}`` for the counter increments of ``items`` (as
+        passed to ``incr_multi``) in all rollups and the given environments.
+        """
+        # (hash_key, hash_field) -> count
+        key_operations = defaultdict(lambda: 0)
+        # (hash_key) -> "max expiration encountered"
+        key_expiries = defaultdict(lambda: 0.0)
+
+        for rollup, max_values in self.rollups.items():
+            for item in items:
+                if len(item) == 2:
+                    model, key = item
+                    options = {}
+                else:
+                    model, key, options = item
 
-                        for environment_id in environment_ids:
-                            hash_key, hash_field = self.make_counter_key(
-                                model, rollup, timestamp, key, environment_id
-                            )
+                count = options.get("count", default_count)
+                timestamp = options.get("timestamp", default_timestamp)
+
+                expiry = self.calculate_expiry(rollup, max_values, timestamp)
+
+                for environment_id in environment_ids:
+                    hash_key, hash_field = self.make_counter_key(
+                        model, rollup, timestamp, key, environment_id
+                    )
+
+                    if key_expiries[hash_key] < expiry:
+                        key_expiries[hash_key] = expiry
 
-                            if key_expiries[hash_key] < expiry:
-                                key_expiries[hash_key] = expiry
+                    key_operations[(hash_key, hash_field)] += count
 
-                            key_operations[(hash_key, hash_field)] += count
+        return key_operations, key_expiries
 
-                for (hash_key, hash_field), count in key_operations.items():
-                    client.hincrby(hash_key, hash_field, count)
-                    if key_expiries.get(hash_key):
-                        client.expireat(hash_key, key_expiries.pop(hash_key))
+    def write_counter_operations(self, client, key_operations, key_expiries):
+        key_expiries = dict(key_expiries)
+        for (hash_key, hash_field), count in key_operations.items():
+            client.hincrby(hash_key, hash_field, count)
+            if key_expiries.get(hash_key):
+                client.expireat(hash_key, key_expiries.pop(hash_key))
 
     def get_range(
         self, model, keys, start, end, rollup=None, environment_ids=None, use_cache=False
@@ -271,6 +287,13 @@ class RedisTSDB(BaseTSDB):
         >>>          start=now - timedelta(days=1),
         >>>          end=now)
         """
+        return self.get_range_array(
+            model, keys, start, end, rollup, environment_ids, use_cache
+        ).to_points()
+
+    def get_range_array(
+        self, model, keys, start, end, rollup=None, environment_ids=None, use_cache=False
+    ):
         # redis backend doesn't support multiple envs
         if environment_ids is not None and len(environment_ids) > 1:
             raise NotImplementedError
@@ -281,25 +304,26 @@ class RedisTSDB(BaseTSDB):
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
         series = map(to_datetime, series)
 
-        results = []
+        # Keys are deduplicated, the same as they would be in a mapping.
+        keys = list(dict.fromkeys(keys))
+
         cluster, _ = self.get_cluster(environment_id)
         with cluster.map() as client:
-            for key in keys:
-                for timestamp in series:
-                    hash_key, hash_field = self.make_counter_key(
-                        model, rollup, timestamp, key, environment_id
-                    )
-                    results.append(
-                        (to_timestamp(timestamp), key, client.hget(hash_key, hash_field))
+            promises = [
+                [
+                    client.hget(
+                        *self.make_counter_key(model, rollup, timestamp, key, environment_id)
                     )
+                    for timestamp in series
+                ]
+                for key in keys
+            ]
 
-        results_by_key = defaultdict(dict)
-        for epoch, key, count in results:
-            results_by_key[key][epoch] = int(count.value or 0)
-
-        for key, points in results_by_key.items():
-            results_by_key[key] = sorted(points.items())
-        return dict(results_by_key)
+        return SeriesArray(
+            keys,
+            [to_timestamp(timestamp) for timestamp in series],
+            [[int(p.value or 0) for p in row] for row in promises],
+        )
 
     def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
         environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
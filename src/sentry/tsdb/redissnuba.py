@@ -2,6 +2,7 @@ import inspect
 import time
 
 from sentry.tsdb.base import BaseTSDB
+from sentry.tsdb.combining import WriteCombiningRedisTSDB
 from sentry.tsdb.dummy import DummyTSDB
 from sentry.tsdb.redis import RedisTSDB
 from sentry.tsdb.snuba import SnubaTSDB
@@ -25,7 +26,9 @@ def dont_do_this(callargs):
 method_specifications = {
     # method: (type, function(callargs) -> set[model])
     "get_range": (READ, single_model_argument),
+    "get_range_array": (READ, single_model_argument),
     "get_sums": (READ, single_model_argument),
+    "get_sums_array": (READ, single_model_argument),
     "get_distinct_counts_series": (READ, single_model_argument),
     "get_distinct_counts_totals": (READ, single_model_argument),
     "get_distinct_counts_union": (READ, single_model_argument),
@@ -113,11 +116,23 @@ class RedisSnubaTSDB(BaseTSDB, metaclass=RedisSnubaTSDBMeta):
 
             The default `None` will start reading from Snuba immediately and is
             equivalent to setting a past timestamp.
+
+        The ``redis`` options may contain a ``write_combining`` dictionary
+        (possibly empty) to buffer writes to models routed to Redis in-process,
+        see ``WriteCombiningRedisTSDB`` for the available options.
         """
         self.switchover_timestamp = switchover_timestamp
+
+        redis_options = dict(options.pop("redis", {}))
+        write_combining = redis_options.pop("write_combining", None)
+        if write_combining is not None:
+            redis = WriteCombiningRedisTSDB(**write_combining, **redis_options)
+        else:
+            redis = RedisTSDB(**redis_options)
+
         self.backends = {
             "dummy": DummyTSDB(),
-            "redis": RedisTSDB(**options.pop("redis", {})),
+            "redis": redis,
             "snuba": SnubaTSDB(**options.pop("snuba", {})),
         }
         super().__init__(**options)
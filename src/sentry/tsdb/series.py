@@ -0,0 +1,109 @@
+"""
+Array-backed time series.
+
+``get_range`` returns a ``{key: [(timestamp, count), ...]}`` mapping, which
+repeats every timestamp for every key and makes sums and rollups walk the
+tuples one at a time. A ``SeriesArray`` stores the same data as a keys x
+buckets matrix: a single sorted list of bucket timestamps shared by all keys
+and one row of counts per key. Zero-filling is done by allocating the rows,
+sums are taken over whole rows and rollup bucket boundaries are computed once
+for all keys instead of once per key and point.
+"""
+
+
+class SeriesArray:
+    __slots__ = ("keys", "timestamps", "rows")
+
+    def __init__(self, keys, timestamps, rows=None):
+        self.keys = list(keys)
+        self.timestamps = list(timestamps)
+        if rows is None:
+            rows = [[0] * len(self.timestamps) for _ in self.keys]
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, SeriesArray)
+            and self.keys == other.keys
+            and self.timestamps == other.timestamps
+            and self.rows == other.rows
+        )
+
+    def __repr__(self):
+        return f"<SeriesArray keys={len(self.keys)} buckets={len(self.timestamps)}>"
+
+    @classmethod
+    def from_mapping(cls, values, timestamps):
+        """
+        Create an array from a ``{key: {timestamp: count}}`` mapping, aligned
+        to ``timestamps``. Missing buckets are filled with zeroes, timestamps
+        that are not part of ``timestamps`` are dropped.
+        """
+        rows = [[points.get(ts, 0) for ts in timestamps] for points in values.values()]
+        return cls(values.keys(), timestamps, rows)
+
+    @classmethod
+    def from_points(cls, values):
+        """
+        Create an array from a ``{key: [(timestamp, count), ...]}`` mapping as
+        returned by ``get_range``. Buckets a key has no point for are filled
+        with zeroes.
+        """
+        timestamps = set()
+        for points in values.values():
+            timestamps.update(ts for ts, _ in points)
+        timestamps = sorted(timestamps)
+
+        index = {ts: idx for idx, ts in enumerate(timestamps)}
+        rows = []
+        for points in values.values():
+            row = [0] * len(timestamps)
+            for ts, count in points:
+                row[index[ts]] += count
+            rows.append(row)
+        return cls(values.keys(), timestamps, rows)
+
+    def to_points(self):
+        """
+        Return the ``{key: [(timestamp, count), ...]}`` representation.
+        """
+        timestamps = self.timestamps
+        return {key: list(zip(timestamps, row)) for key, row in zip(self.keys, self.rows)}
+
+    def sums(self):
+        """
+        Return a ``{key: total}`` mapping.
+        """
+        return {key: sum(row) for key, row in zip(self.keys, self.rows)}
+
+    def get_totals(self, keys):
+        """
+        Return a list of totals in the order of ``keys``. Keys that are not
+        part of the array have a total of zero.
+        """
+        totals = dict(zip(self.keys, map(sum, self.rows)))
+        return [totals.get(key, 0) for key in keys]
+
+    def rollup(self, seconds):
+        """
+        Return a new array with the buckets rolled up to ``seconds``.
+        """
+        timestamps = []
+        bounds = []
+        for idx, ts in enumerate(self.timestamps):
+            new_ts = ts - (ts % seconds)
+            if not timestamps or timestamps[-1] != new_ts:
+                timestamps.append(new_ts)
+                bounds.append(idx)
+        bounds.append(len(self.timestamps))
+
+        if len(timestamps) == len(self.timestamps):
+            rows = [list(row) for row in self.rows]
+        else:
+            slices = [slice(start, end) for start, end in zip(bounds, bounds[1:])]
+            rows = [[sum(row[s]) for s in slices] for row in self.rows]
+
+        return SeriesArray(self.keys, timestamps, rows)
@@ -2,9 +2,12 @@ import collections
 import itertools
 from copy import deepcopy
 
+from django.utils import timezone
+
 from sentry.constants import DataCategory
 from sentry.ingest.inbound_filters import FILTER_STAT_KEYS_TO_VALUES
 from sentry.tsdb.base import BaseTSDB, TSDBModel
+from sentry.tsdb.series import SeriesArray
 from sentry.utils import outcomes, snuba
 from sentry.utils.compat import map, zip
 from sentry.utils.dates import to_datetime
@@ -383,6 +386,43 @@ class SnubaTSDB(BaseTSDB):
         environment_ids=None,
         conditions=None,
         use_cache=False,
+    ):
+        result = self._get_range_data(
+            model, keys, start, end, rollup, environment_ids, conditions, use_cache
+        )
+        # convert
+        #    {group:{timestamp:count, ...}}
+        # into
+        #    {group: [(timestamp, count), ...]}
+        return {k: sorted(result[k].items()) for k in result}
+
+    def get_range_array(
+        self,
+        model,
+        keys,
+        start,
+        end,
+        rollup=None,
+        environment_ids=None,
+        conditions=None,
+        use_cache=False,
+    ):
+        # The series is computed twice, make sure both agree on the end.
+        if end is None:
+            end = timezone.now()
+
+        result = self._get_range_data(
+            model, keys, start, end, rollup, environment_ids, conditions, use_cache
+        )
+        # convert
+        #    {group:{timestamp:count, ...}}
+        # into a keys x buckets array. `get_data` has already zero-filled
+        # every bucket of the series.
+        _, series = self.get_optimal_rollup_series(start, end, rollup)
+        return SeriesArray.from_mapping(result, series)
+
+    def _get_range_data(
+        self, model, keys, start, end, rollup, environment_ids, conditions, use_cache
     ):
         # 10s is the only rollup under an hour that we support
         if rollup and rollup == 10 and model in self.lower_rollup_query_settings:
@@ -397,7 +437,7 @@ class SnubaTSDB(BaseTSDB):
         else:
             aggregate_function = "count()"
 
-        result = self.get_data(
+        return self.get_data(
             model,
             keys,
             start,
@@ -409,11 +449,6 @@ class SnubaTSDB(BaseTSDB):
             conditions=conditions,
             use_cache=use_cache,
         )
-        # convert
-        #    {group:{timestamp:count, ...}}
-        # into
-        #    {group: [(timestamp, count), ...]}
-        return {k: sorted(result[k].items()) for k in result}
 
     def get_distinct_counts_series(
         self, model, keys, start, end=None, rollup=None, environment_id=None
@@ -1,4 +1,6 @@
-from collections import Hashable, MutableMapping
+import threading
+import time
+from collections import Hashable, MutableMapping, OrderedDict
 
 __unset__ = object()
 
@@ -59,3 +61,78 @@ class BidirectionalMapping(MutableMapping):
 
     def inverse(self):
         return self.__inverse.copy()
+
+
+class LRUCache:
+    """\
+    A bounded, thread-safe cache that evicts the least recently used entries
+    once it holds more than ``max_size`` entries.
+
+    If ``weigh`` is provided, it is called with each value and the cache is
+    instead bounded by the sum of the returned weights (for example the size
+    of values in bytes). If ``ttl`` is provided, entries expire after that
+    many seconds.
+    """
+
+    def __init__(self, max_size, ttl=None, weigh=None, timer=time.monotonic):
+        assert max_size > 0
+        self.max_size = max_size
+        self.ttl = ttl
+        self.weigh = weigh
+        self.timer = timer
+        self.size = 0
+        self.__data = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__data)
+
+    def __contains__(self, key):
+        return self.get(key, __unset__) is not __unset__
+
+    def get(self, key, default=None):
+        with self.__lock:
+            try:
+                value, weight, expires = self.__data[key]
+            except KeyError:
+                return default
+
+            if expires is not None and expires <= self.timer():
+                self.__remove(key)
+                return default
+
+            self.__data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        weight = self.weigh(value) if self.weigh is not None else 1
+        if weight > self.max_size:
+            # Would evict everything else and still not fit.
+            self.delete(key)
+            return
+
+        expires = self.timer() + self.ttl if self.ttl is not None else None
+
+        with self.__lock:
+            if key in self.__data:
+                self.__remove(key)
+
+            self.__data[key] = (value, weight, expires)
+            self.size += weight
+
+            while self.size > self.max_size:
+                self.__remove(next(iter(self.__data)))
+
+    def delete(self, key):
+        with self.__lock:
+            if key in self.__data:
+                self.__remove(key)
+
+    def clear(self):
+        with self.__lock:
+            self.__data.clear()
+            self.size = 0
+
+    def __remove(self, key):
+        _, weight, _ = self.__data.pop(key)
+        self.size -= weight
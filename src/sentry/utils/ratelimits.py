@@ -23,24 +23,31 @@ def for_organization_member_invite(organization, email, user=None, auth=None, co
     if not features.has("organizations:invite-members-rate-limits", organization, actor=user):
         return False
 
-    limits = (
-        ratelimiter.is_limited(
-            "members:invite-by-user:{}".format(
-                md5_text(user.id if user and user.is_authenticated else str(auth)).hexdigest()
-            ),
-            **config["members:invite-by-user"],
+    requests = []
+    if user or auth:
+        requests.append(
+            (
+                "members:invite-by-user:{}".format(
+                    md5_text(user.id if user and user.is_authenticated else str(auth)).hexdigest()
+                ),
+                config["members:invite-by-user"]["limit"],
+                config["members:invite-by-user"]["window"],
+            )
         )
-        if (user or auth)
-        else None,
-        ratelimiter.is_limited(
+    requests.append(
+        (
             f"members:invite-by-org:{md5_text(organization.id).hexdigest()}",
-            **config["members:invite-by-org"],
-        ),
-        ratelimiter.is_limited(
+            config["members:invite-by-org"]["limit"],
+            config["members:invite-by-org"]["window"],
+        )
+    )
+    requests.append(
+        (
             "members:org-invite-to-email:{}-{}".format(
                 organization.id, md5_text(email.lower()).hexdigest()
             ),
-            **config["members:org-invite-to-email"],
-        ),
+            config["members:org-invite-to-email"]["limit"],
+            config["members:org-invite-to-email"]["window"],
+        )
     )
-    return any(limits)
+    return any(ratelimiter.is_limited_many(requests))
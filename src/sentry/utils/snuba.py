@@ -2,9 +2,11 @@ import functools
 import logging
 import os
 import re
+import threading
 import time
 from collections import OrderedDict, namedtuple
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from contextlib import contextmanager
 from copy import deepcopy
 from datetime import datetime, timedelta
@@ -23,6 +25,7 @@ from sentry_sdk import Hub
 from snuba_sdk.legacy import json_to_snql
 from snuba_sdk.query import Query
 
+from sentry import options
 from sentry.models import (
     Environment,
     Group,
@@ -38,6 +41,7 @@ from sentry.snuba.dataset import Dataset
 from sentry.snuba.events import Columns
 from sentry.utils import json, metrics
 from sentry.utils.compat import map
+from sentry.utils.datastructures import LRUCache
 from sentry.utils.dates import outside_retention_with_modified_start, to_timestamp
 from sentry.utils.snql import should_use_snql
 
@@ -325,6 +329,9 @@ _snuba_pool = connection_from_url(
     maxsize=10,
 )
 _query_thread_pool = ThreadPoolExecutor(max_workers=10)
+# Used to refresh stale cached query results in the background, see
+# `_apply_cache_and_build_results`.
+_revalidate_thread_pool = ThreadPoolExecutor(max_workers=2)
 
 
 epoch_naive = datetime(1970, 1, 1, tzinfo=None)
@@ -677,14 +684,26 @@ def raw_snql_query(
     return _apply_cache_and_build_results([params], referrer=referrer, use_cache=use_cache)[0]
 
 
-def get_cache_key(query: SnubaQuery) -> str:
+def get_cache_key(query: SnubaQuery, prefix: str = "sqc") -> str:
     if isinstance(query, Query):
         hashable = str(query)
     else:
         hashable = json.dumps(query, sort_keys=True)
 
     # sqc - Snuba Query Cache
-    return f"sqc:{sha1(hashable.encode('utf-8')).hexdigest()}"
+    return f"{prefix}:{sha1(hashable.encode('utf-8')).hexdigest()}"
+
+
+def _get_query_cache_key(query_params: SnubaQueryBody) -> str:
+    # Entries are stored as `[written_at, result]`, which workers that cache
+    # bare results under `sqc:` cannot read, so they get their own keys.
+    query = query_params[0]
+    if isinstance(query, Query):
+        # A tuple containing a SnQL query cannot be serialized.
+        return get_cache_key(query, prefix="sqc2")
+    # Legacy queries are keyed by the whole `(query, forward, reverse)` tuple,
+    # as they always have been. The functions serialize as "<function>".
+    return get_cache_key(query_params, prefix="sqc2")
 
 
 def bulk_raw_query(
@@ -699,6 +718,69 @@ def bulk_raw_query(
     )
 
 
+class SingleFlight:
+    """
+    Deduplicates concurrent calls for the same key within this process: the
+    first caller (the leader) does the work and publishes the result, every
+    other caller for the same key waits for that result instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: MutableMapping[str, Future] = {}
+
+    def begin(self, key: str) -> Tuple[Future, bool]:
+        """
+        Returns the future for the given key and whether the caller is the
+        leader, in which case it must call `finish` eventually.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def finish(self, key: str, result: Any = None, exception: Optional[Exception] = None) -> None:
+        with self._lock:
+            future = self._calls.pop(key)
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+_query_singleflight = SingleFlight()
+_local_query_cache: Optional[LRUCache] = None
+
+
+def _get_local_query_cache() -> Optional[LRUCache]:
+    """
+    Returns the per-process tier of the query cache, which holds serialized
+    results and is bounded by their total size in bytes.
+    """
+    global _local_query_cache
+    max_size = options.get("snuba.query-cache.local-max-size")
+    if not max_size:
+        return None
+    if _local_query_cache is None or _local_query_cache.max_size != max_size:
+        _local_query_cache = LRUCache(
+            max_size,
+            ttl=settings.SENTRY_SNUBA_CACHE_TTL_SECONDS
+            + options.get("snuba.query-cache.stale-ttl"),
+            weigh=len,
+        )
+    return _local_query_cache
+
+
+def _load_cached_result(value: str) -> Tuple[float, Any]:
+    """
+    Returns the time a cached result was written at and the result itself.
+    """
+    written_at, result = json.loads(value)
+    return written_at, result
+
+
 def _apply_cache_and_build_results(
     snuba_param_list: Sequence[SnubaQueryBody],
     referrer: Optional[str] = None,
@@ -715,27 +797,41 @@ def _apply_cache_and_build_results(
     results = []
 
     if use_cache:
-        cache_keys = [get_cache_key(query_params) for _, query_params in query_param_list]
-        cache_data = cache.get_many(cache_keys)
-        to_query: List[Tuple[int, SnubaQueryBody, Optional[str]]] = []
-        for (query_pos, query_params), cache_key in zip(query_param_list, cache_keys):
-            cached_result = cache_data.get(cache_key)
-            metric_tags = {"referrer": referrer} if referrer else None
-            if cached_result is None:
-                metrics.incr("snuba.query_cache.miss", tags=metric_tags)
-                to_query.append((query_pos, query_params, cache_key))
-            else:
-                metrics.incr("snuba.query_cache.hit", tags=metric_tags)
-                results.append((query_pos, json.loads(cached_result)))
+        to_query, waiting, leaders = _get_cached_results(
+            query_param_list, results, referrer, headers, use_snql
+        )
     else:
         to_query = [(query_pos, query_params, None) for query_pos, query_params in query_param_list]
+        waiting = []
+        leaders = set()
 
     if to_query:
-        query_results = _bulk_snuba_query(map(itemgetter(1), to_query), headers, use_snql)
-        for result, (query_pos, _, cache_key) in zip(query_results, to_query):
-            if cache_key:
-                cache.set(cache_key, json.dumps(result), settings.SENTRY_SNUBA_CACHE_TTL_SECONDS)
-            results.append((query_pos, result))
+        try:
+            query_results = _bulk_snuba_query(map(itemgetter(1), to_query), headers, use_snql)
+            for result, (query_pos, _, cache_key) in zip(query_results, to_query):
+                if cache_key:
+                    value = _cache_result(cache_key, result, referrer)
+                    if cache_key in leaders:
+                        leaders.remove(cache_key)
+                        _query_singleflight.finish(cache_key, value)
+                results.append((query_pos, result))
+        except Exception as e:
+            # Identical queries waiting for ours would fail the same way.
+            for cache_key in leaders:
+                _query_singleflight.finish(cache_key, exception=e)
+            raise
+
+    for query_pos, future in waiting:
+        try:
+            value = future.result(timeout=settings.SENTRY_SNUBA_TIMEOUT)
+        except FutureTimeoutError:
+            metrics.incr(
+                "snuba.query_cache.coalesced_timeout",
+                tags={"referrer": referrer} if referrer else None,
+            )
+            raise SnubaError("Timed out waiting for an identical query")
+        _, result = _load_cached_result(value)
+        results.append((query_pos, result))
 
     # Sort so that we get the results back in the original param list order
     results.sort()
@@ -743,6 +839,116 @@ def _apply_cache_and_build_results(
     return map(itemgetter(1), results)
 
 
+def _get_cached_results(query_param_list, results, referrer, headers, use_snql):
+    """
+    Looks up cached results (in the local tier first, then in the shared
+    cache) and appends them to `results`. Returns the queries that have to
+    be sent to Snuba and futures for queries that another thread in this
+    process is currently running.
+
+    Queries of referrers in the `snuba.query-cache.stale-referrers` option
+    are answered with stale results if available, which are then refreshed
+    in the background.
+    """
+    metric_tags = {"referrer": referrer} if referrer else None
+    now = time.time()
+    stale_ok = referrer in options.get("snuba.query-cache.stale-referrers")
+    local_cache = _get_local_query_cache()
+    singleflight = options.get("snuba.query-cache.singleflight")
+
+    cache_keys = [_get_query_cache_key(query_params) for _, query_params in query_param_list]
+    cache_data = {}
+    if local_cache is not None:
+        for cache_key in cache_keys:
+            value = local_cache.get(cache_key)
+            if value is not None:
+                cache_data[cache_key] = value
+    local_hits = len(cache_data)
+    if local_hits < len(cache_keys):
+        remote_data = cache.get_many([key for key in cache_keys if key not in cache_data])
+        if local_cache is not None:
+            for cache_key, value in remote_data.items():
+                local_cache.set(cache_key, value)
+        cache_data.update(remote_data)
+
+    to_query: List[Tuple[int, SnubaQueryBody, Optional[str]]] = []
+    waiting = []
+    leaders = set()
+    for (query_pos, query_params), cache_key in zip(query_param_list, cache_keys):
+        cached_result = cache_data.get(cache_key)
+        if cached_result is not None:
+            written_at, result = _load_cached_result(cached_result)
+            if now - written_at < settings.SENTRY_SNUBA_CACHE_TTL_SECONDS:
+                metrics.incr("snuba.query_cache.hit", tags=metric_tags)
+                results.append((query_pos, result))
+                continue
+
+            if stale_ok:
+                metrics.incr("snuba.query_cache.stale_hit", tags=metric_tags)
+                results.append((query_pos, result))
+                _revalidate_thread_pool.submit(
+                    _revalidate_cached_result, cache_key, query_params, referrer, headers, use_snql
+                )
+                continue
+
+        metrics.incr("snuba.query_cache.miss", tags=metric_tags)
+
+        if singleflight:
+            future, is_leader = _query_singleflight.begin(cache_key)
+            if not is_leader:
+                metrics.incr("snuba.query_cache.coalesced", tags=metric_tags)
+                waiting.append((query_pos, future))
+                continue
+            leaders.add(cache_key)
+
+        to_query.append((query_pos, query_params, cache_key))
+
+    return to_query, waiting, leaders
+
+
+def _cache_result(cache_key: str, result: Any, referrer: Optional[str]) -> str:
+    """
+    Writes a result to the query cache and returns its serialized form.
+    """
+    value = json.dumps([time.time(), result])
+    ttl = settings.SENTRY_SNUBA_CACHE_TTL_SECONDS
+    if referrer in options.get("snuba.query-cache.stale-referrers"):
+        # Keep the result around for longer so that it can be served while
+        # it is being refreshed.
+        ttl += options.get("snuba.query-cache.stale-ttl")
+    cache.set(cache_key, value, ttl)
+
+    local_cache = _get_local_query_cache()
+    if local_cache is not None:
+        local_cache.set(cache_key, value)
+    return value
+
+
+def _revalidate_cached_result(
+    cache_key: str,
+    query_params: SnubaQueryBody,
+    referrer: Optional[str],
+    headers: Mapping[str, str],
+    use_snql: Optional[bool],
+) -> None:
+    # Other processes may be refreshing the same result already.
+    if not cache.add(f"{cache_key}:revalidate", 1, settings.SENTRY_SNUBA_CACHE_TTL_SECONDS):
+        return
+
+    future, is_leader = _query_singleflight.begin(cache_key)
+    if not is_leader:
+        return
+
+    try:
+        with metrics.timer("snuba.query_cache.revalidate"):
+            [result] = _bulk_snuba_query([query_params], headers, use_snql)
+    except Exception as e:
+        logger.warning("snuba.query_cache.revalidate-failed", exc_info=True)
+        _query_singleflight.finish(cache_key, exception=e)
+    else:
+        _query_singleflight.finish(cache_key, _cache_result(cache_key, result, referrer))
+
+
 def _bulk_snuba_query(
     snuba_param_list: Sequence[SnubaQueryBody],
     headers: Mapping[str, str],
@@ -159,6 +159,7 @@ class JavascriptIntegrationTest(RelayStoreHelper, SnubaTestCase, TransactionTest
             release=None,
             dist=None,
             allow_scraping=True,
+            prefetched=None,
         )
 
         exception = event.interfaces["exception"]
@@ -217,6 +218,7 @@ class JavascriptIntegrationTest(RelayStoreHelper, SnubaTestCase, TransactionTest
             release=None,
             dist=None,
             allow_scraping=True,
+            prefetched=None,
         )
 
         exception = event.interfaces["exception"]
@@ -270,7 +270,12 @@ def test_untrusted_external_relays_should_not_receive_configs(
 @pytest.fixture
 def projectconfig_cache_set(monkeypatch):
     calls = []
+
+    def set_many_serialized(configs):
+        calls.append({key: json.loads(cfg) for key, cfg in configs.items()})
+
     monkeypatch.setattr("sentry.relay.projectconfig_cache.set_many", calls.append)
+    monkeypatch.setattr("sentry.relay.projectconfig_cache.set_many_serialized", set_many_serialized)
     return calls
 
 
@@ -55,18 +55,18 @@ def setup_relay(default_project):
 
 @pytest.fixture
 def call_endpoint(client, relay, private_key, default_projectkey):
-    def inner(full_config, public_keys=None):
+    def inner(full_config, public_keys=None, digests=None):
         path = reverse("sentry-api-0-relay-projectconfigs") + "?version=2"
 
         if public_keys is None:
             public_keys = [str(default_projectkey.public_key)]
 
-        if full_config is None:
-            raw_json, signature = private_key.pack({"publicKeys": public_keys})
-        else:
-            raw_json, signature = private_key.pack(
-                {"publicKeys": public_keys, "fullConfig": full_config}
-            )
+        data = {"publicKeys": public_keys}
+        if full_config is not None:
+            data["fullConfig"] = full_config
+        if digests is not None:
+            data["digests"] = digests
+        raw_json, signature = private_key.pack(data)
 
         resp = client.post(
             path,
@@ -276,7 +276,12 @@ def test_untrusted_external_relays_should_not_receive_configs(
 @pytest.fixture
 def projectconfig_cache_set(monkeypatch):
     calls = []
+
+    def set_many_serialized(configs):
+        calls.append({key: json.loads(cfg) for key, cfg in configs.items()})
+
     monkeypatch.setattr("sentry.relay.projectconfig_cache.set_many", calls.append)
+    monkeypatch.setattr("sentry.relay.projectconfig_cache.set_many_serialized", set_many_serialized)
     return calls
 
 
@@ -377,3 +382,46 @@ def test_exposes_features(call_endpoint, task_runner):
             config = config["config"]
             assert "features" in config
             assert config["features"] == ["organizations:metrics-extraction"]
+
+
+@pytest.mark.django_db
+def test_unchanged_configs_are_not_sent(call_endpoint, default_projectkey, task_runner):
+    public_key = default_projectkey.public_key
+    wrong_public_key = ProjectKey.generate_api_key()
+
+    with task_runner():
+        result, status_code = call_endpoint(
+            full_config=True, public_keys=[public_key, wrong_public_key], digests={}
+        )
+        assert status_code < 400
+
+    assert set(result["configs"]) == {public_key, wrong_public_key}
+    assert result["unchanged"] == []
+    digests = result["digests"]
+    assert set(digests) == {public_key, wrong_public_key}
+
+    with task_runner():
+        result, status_code = call_endpoint(
+            full_config=True,
+            public_keys=[public_key, wrong_public_key],
+            digests={public_key: digests[public_key], wrong_public_key: "outdated"},
+        )
+        assert status_code < 400
+
+    assert result == {
+        "configs": {wrong_public_key: {"disabled": True}},
+        "unchanged": [public_key],
+        "digests": {wrong_public_key: digests[wrong_public_key]},
+    }
+
+    # Changing the config changes its digest.
+    default_projectkey.project.update_option("sentry:origins", ["example.com"])
+
+    with task_runner():
+        result, status_code = call_endpoint(
+            full_config=True, public_keys=[public_key], digests=digests
+        )
+        assert status_code < 400
+
+    assert result["unchanged"] == []
+    assert result["digests"][public_key] != digests[public_key]
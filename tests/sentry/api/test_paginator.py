@@ -10,6 +10,7 @@ from sentry.api.paginator import (
     CombinedQuerysetPaginator,
     DateTimePaginator,
     GenericOffsetPaginator,
+    KeysetPaginator,
     OffsetPaginator,
     Paginator,
     SequencePaginator,
@@ -18,7 +19,8 @@ from sentry.api.paginator import (
 from sentry.incidents.models import AlertRule
 from sentry.models import Rule, User
 from sentry.testutils import APITestCase, TestCase
-from sentry.utils.cursors import Cursor
+from sentry.utils.compat import mock
+from sentry.utils.cursors import Cursor, StringCursor
 
 
 class PaginatorTest(TestCase):
@@ -175,6 +177,81 @@ class OffsetPaginatorTest(TestCase):
             paginator.get_result()
 
 
+class KeysetPaginatorTest(TestCase):
+    def test_simple(self):
+        res1 = self.create_user("foo@example.com")
+        res2 = self.create_user("bar@example.com")
+        res3 = self.create_user("baz@example.com")
+
+        paginator = KeysetPaginator(User.objects.all(), "id")
+        result1 = paginator.get_result(limit=1, cursor=None)
+        assert list(result1) == [res1]
+        assert result1.next
+        assert not result1.prev
+
+        result2 = paginator.get_result(limit=1, cursor=result1.next)
+        assert list(result2) == [res2]
+        assert result2.next
+        assert result2.prev
+
+        result3 = paginator.get_result(limit=1, cursor=result2.next)
+        assert list(result3) == [res3]
+        assert not result3.next
+        assert result3.prev
+
+        result4 = paginator.get_result(limit=1, cursor=result3.prev)
+        assert list(result4) == [res2]
+        assert result4.next
+        assert result4.prev
+
+        result5 = paginator.get_result(limit=1, cursor=result4.prev)
+        assert list(result5) == [res1]
+        assert result5.next
+        assert not result5.prev
+
+    def test_order_by_multiple(self):
+        res1 = self.create_user("foo@example.com", name="b")
+        res2 = self.create_user("bar@example.com", name="a")
+        res3 = self.create_user("baz@example.com", name="b")
+        res4 = self.create_user("qux@example.com", name="a")
+
+        # Ties are broken by id in the direction of the last field.
+        paginator = KeysetPaginator(User.objects.all(), ["name", "-date_joined"])
+        assert paginator.order_by == ["name", "-date_joined", "-id"]
+
+        results = []
+        cursor = None
+        while True:
+            result = paginator.get_result(limit=1, cursor=cursor)
+            results.extend(result)
+            if not result.next:
+                break
+            # Cursors survive being passed through the API.
+            cursor = StringCursor.from_string(str(result.next))
+
+        assert results == [res4, res2, res3, res1]
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(User.objects.all(), "id")
+        with self.assertRaises(BadPaginationError):
+            paginator.get_result(cursor=StringCursor("invalid", 0, 0))
+        with self.assertRaises(BadPaginationError):
+            paginator.get_result(cursor=Cursor(10, 0, 0))
+
+    def test_count_hits(self):
+        self.create_user("foo@example.com")
+        self.create_user("bar@example.com")
+
+        paginator = KeysetPaginator(User.objects.all(), "id")
+        result = paginator.get_result(limit=1, count_hits=True, max_hits=1)
+        assert (result.hits, result.max_hits) == (1, 1)
+
+        paginator = KeysetPaginator(User.objects.all(), "id", estimate_hits=True)
+        with mock.patch("sentry.api.paginator.estimate_count", return_value=5000):
+            result = paginator.get_result(limit=1, count_hits=True, max_hits=1)
+        assert (result.hits, result.max_hits) == (5000, None)
+
+
 class DateTimePaginatorTest(TestCase):
     def test_ascending(self):
         joined = timezone.now()
@@ -0,0 +1,31 @@
+import pytest
+
+from sentry.api.paginator import KeysetPaginator, OffsetPaginator
+from sentry.models import User
+
+ROWS = 5000
+PAGE_SIZE = 100
+
+
+def walk_to_page(paginator, depth):
+    # Clients reach deep pages by following `next` cursors.
+    cursor = None
+    for _ in range(depth):
+        cursor = paginator.get_result(limit=PAGE_SIZE, cursor=cursor).next
+    return cursor
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+@pytest.mark.parametrize("paginator_cls", [OffsetPaginator, KeysetPaginator])
+@pytest.mark.parametrize("depth", [0, 10, 45])
+def test_benchmark_page_depth(benchmark, paginator_cls, depth):
+    User.objects.bulk_create(
+        User(username=f"user-{idx}", email=f"user-{idx}@example.com") for idx in range(ROWS)
+    )
+
+    paginator = paginator_cls(User.objects.all(), "-id")
+    cursor = walk_to_page(paginator, depth)
+
+    result = benchmark(paginator.get_result, limit=PAGE_SIZE, cursor=cursor)
+    assert len(result) == PAGE_SIZE
@@ -73,3 +73,69 @@ class BufferTest(TestCase):
         self.buf.process(Group, columns, filters, {"last_seen": the_date}, signal_only=True)
         group.refresh_from_db()
         assert group.times_seen == prev_times_seen
+
+    def test_process_batch(self):
+        project = self.create_project()
+        group = self.create_group(project=project, times_seen=5)
+        other = self.create_group(project=project, times_seen=1)
+        unbatched = self.create_group(project=project, times_seen=5)
+        the_date = timezone.now() + timedelta(days=5)
+
+        self.buf.process(Group, {"times_seen": 2}, {"id": unbatched.id}, {"last_seen": the_date})
+
+        self.buf.process_batch(
+            Group,
+            [
+                ({"times_seen": 2}, {"id": group.id}, {"last_seen": the_date}, None),
+                ({"times_seen": 3}, {"id": other.id}, {"last_seen": the_date}, None),
+                ({"times_seen": 1}, {"message": "foo bar", "project_id": project.id}, None, None),
+            ],
+        )
+
+        group.refresh_from_db()
+        other.refresh_from_db()
+        unbatched.refresh_from_db()
+        assert group.times_seen == 7
+        assert group.last_seen == the_date
+        assert group.score == unbatched.score
+        assert other.times_seen == 4
+        assert other.last_seen == the_date
+        # rows that can't be updated by primary key go through `process`
+        assert Group.objects.get(message="foo bar").times_seen == 2
+
+    @mock.patch("sentry.buffer.base.buffer_incr_complete")
+    def test_process_batch_creates_missing_rows(self, buffer_incr_complete):
+        release_project = ReleaseProject.objects.create(
+            project=self.create_project(), release=self.create_release()
+        )
+
+        with mock.patch.object(self.buf, "_apply_incr", wraps=self.buf._apply_incr) as apply_incr:
+            self.buf.process_batch(
+                ReleaseProject,
+                [
+                    ({"new_groups": 1}, {"id": release_project.id}, None, None),
+                    ({"new_groups": 1}, {"id": release_project.id + 1000}, None, None),
+                ],
+            )
+
+        release_project.refresh_from_db()
+        assert release_project.new_groups == 1
+        apply_incr.assert_called_once_with(
+            ReleaseProject, {"new_groups": 1}, {"id": release_project.id + 1000}, None
+        )
+        buffer_incr_complete.send_robust.assert_any_call(
+            model=ReleaseProject,
+            columns={"new_groups": 1},
+            filters={"id": release_project.id + 1000},
+            extra=None,
+            created=True,
+            sender=ReleaseProject,
+        )
+        buffer_incr_complete.send_robust.assert_any_call(
+            model=ReleaseProject,
+            columns={"new_groups": 1},
+            filters={"id": release_project.id},
+            extra=None,
+            created=False,
+            sender=ReleaseProject,
+        )
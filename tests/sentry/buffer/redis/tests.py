@@ -1,10 +1,12 @@
 import pickle
 from datetime import datetime
 
+from celery.signals import worker_shutdown
 from django.utils import timezone
 from django.utils.encoding import force_text
 
-from sentry.buffer.redis import RedisBuffer
+from sentry.buffer import redis
+from sentry.buffer.redis import COMPACT_CODEC_PREFIX, RedisBuffer
 from sentry.models import Group, Project
 from sentry.testutils import TestCase
 from sentry.utils.compat import mock
@@ -45,6 +47,101 @@ class RedisBufferTest(TestCase):
         client = self.buf.cluster.get_routing_client()
         assert client.zrange("b:p", 0, -1) == []
 
+    @mock.patch("sentry.buffer.redis.process_incr")
+    def test_process_pending_adaptive_batch_size(self, process_incr):
+        self.buf.incr_batch_size = 1
+        self.buf.max_incr_batch_size = 3
+        self.buf.incr_batch_target_tasks = 2
+        with self.buf.cluster.map() as client:
+            client.zadd("b:p", {"foo": 1, "bar": 2, "baz": 3, "qux": 4, "quux": 5})
+        self.buf.process_pending()
+        assert process_incr.apply_async.mock_calls == [
+            mock.call(kwargs={"batch_keys": ["foo", "bar", "baz"]}),
+            mock.call(kwargs={"batch_keys": ["qux", "quux"]}),
+        ]
+
+    def test_get_incr_batch_size(self):
+        assert self.buf._get_incr_batch_size(1000) == self.buf.incr_batch_size
+
+        self.buf.incr_batch_size = 10
+        self.buf.max_incr_batch_size = 100
+        self.buf.incr_batch_target_tasks = 10
+        assert self.buf._get_incr_batch_size(0) == 10
+        assert self.buf._get_incr_batch_size(500) == 50
+        assert self.buf._get_incr_batch_size(100000) == 100
+
+    @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
+    @mock.patch("sentry.buffer.base.Buffer._apply_batch", return_value=[])
+    def test_process_bulk(self, apply_batch):
+        self.buf.bulk_process = True
+        now = datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        self.buf.incr(Group, {"times_seen": 1}, {"id": 1}, extra={"last_seen": now})
+        self.buf.incr(Group, {"times_seen": 2}, {"id": 2}, extra={"last_seen": now})
+        self.buf.incr(Project, {"times_seen": 1}, {"id": 3})
+
+        client = self.buf.cluster.get_routing_client()
+        keys = [key.decode("utf-8") for key in client.zrange("b:p", 0, -1)]
+        self.buf.process(batch_keys=keys)
+
+        batches = {call[1][0]: call[1][1] for call in apply_batch.mock_calls}
+        assert set(batches) == {Group, Project}
+        assert sorted(batches[Group], key=lambda item: item[1]["id"]) == [
+            ({"times_seen": 1}, {"id": 1}, {"last_seen": now}, None),
+            ({"times_seen": 2}, {"id": 2}, {"last_seen": now}, None),
+        ]
+        assert batches[Project] == [({"times_seen": 1}, {"id": 3}, {}, None)]
+        assert client.zrange("b:p", 0, -1) == []
+        assert not any(client.get(self.buf._make_lock_key(key)) for key in keys)
+
+    @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    @mock.patch("sentry.buffer.base.Buffer._apply_batch", side_effect=RuntimeError())
+    def test_process_bulk_falls_back_on_failure(self, apply_batch, process):
+        self.buf.bulk_process = True
+        self.buf.incr(Group, {"times_seen": 1}, {"id": 1})
+        self.buf.incr(Group, {"times_seen": 2}, {"id": 2})
+
+        client = self.buf.cluster.get_routing_client()
+        keys = [key.decode("utf-8") for key in client.zrange("b:p", 0, -1)]
+        self.buf.process(batch_keys=keys)
+
+        assert apply_batch.call_count == 1
+        assert sorted(process.mock_calls, key=lambda call: call[1][2]["id"]) == [
+            mock.call(Group, {"times_seen": 1}, {"id": 1}, {}, None),
+            mock.call(Group, {"times_seen": 2}, {"id": 2}, {}, None),
+        ]
+
+    @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
+    @mock.patch("sentry.buffer.base.buffer_incr_complete")
+    def test_process_bulk_signals_once_per_increment(self, buffer_incr_complete):
+        self.buf.bulk_process = True
+        group = self.create_group(times_seen=1)
+        other = self.create_group(times_seen=1)
+        self.buf.incr(Group, {"times_seen": 1}, {"id": group.id})
+        self.buf.incr(Group, {"times_seen": 2}, {"id": other.id})
+
+        apply_batch = self.buf._apply_batch
+
+        def fail_after_apply(*args, **kwargs):
+            # the writes are rolled back, so nothing may be signalled yet
+            apply_batch(*args, **kwargs)
+            assert buffer_incr_complete.send_robust.call_count == 0
+            raise RuntimeError()
+
+        client = self.buf.cluster.get_routing_client()
+        keys = [key.decode("utf-8") for key in client.zrange("b:p", 0, -1)]
+        with mock.patch.object(self.buf, "_apply_batch", side_effect=fail_after_apply):
+            self.buf.process(batch_keys=keys)
+
+        group.refresh_from_db()
+        other.refresh_from_db()
+        assert group.times_seen == 2
+        assert other.times_seen == 3
+        # only the fallback, which applied each increment, signals them
+        assert sorted(
+            call[2]["filters"]["id"] for call in buffer_incr_complete.send_robust.mock_calls
+        ) == sorted([group.id, other.id])
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.base.Buffer.process")
     def test_process_does_bubble_up_json(self, process):
@@ -86,6 +183,66 @@ class RedisBufferTest(TestCase):
         self.buf.process("foo")
         process.assert_called_once_with(Group, columns, filters, extra, signal_only)
 
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_process_does_bubble_up_compact(self, process):
+        now = datetime(2017, 5, 3, 6, 6, 6, 1234, tzinfo=timezone.utc)
+        client = self.buf.cluster.get_routing_client()
+        client.hmset(
+            "foo",
+            {
+                "e+foo": self.buf._dump_compact("bar"),
+                "e+datetime": self.buf._dump_compact(now),
+                "e+data": self.buf._dump_compact({"metadata": {"title": "foo"}}),
+                "f": self.buf._dump_compact({"pk": 1}),
+                "i+times_seen": "2",
+                "m": "sentry.models.Group",
+            },
+        )
+        columns = {"times_seen": 2}
+        filters = {"pk": 1}
+        extra = {"foo": "bar", "datetime": now, "data": {"metadata": {"title": "foo"}}}
+        signal_only = None
+        self.buf.process("foo")
+        process.assert_called_once_with(Group, columns, filters, extra, signal_only)
+
+    def test_compact_codec(self):
+        from sentry.event_manager import ScoreClause
+
+        project = Project(id=1)
+        group = Group(id=2, project=project)
+        now = datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+
+        payload = self.buf._dump_compact({"project": project, "datetime": now})
+        assert self.buf._load_field(payload) == {"project": 1, "datetime": now}
+        assert len(payload) < len(pickle.dumps({"project_id": 1, "datetime": now}))
+
+        score = self.buf._load_field(self.buf._dump_compact(ScoreClause(group)))
+        assert isinstance(score, ScoreClause)
+        assert score.group is None
+
+        for value in ("\u201d", 1, 1.5, None, True):
+            assert self.buf._load_field(self.buf._dump_compact(value)) == value
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_incr_compact_roundtrip(self, process):
+        now = datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        client = self.buf.cluster.get_routing_client()
+
+        with self.options({"buffer.write-compact-codec": True}):
+            self.buf.incr(Group, {"times_seen": 1}, {"pk": 1}, extra={"last_seen": now})
+
+        result = {force_text(k): v for k, v in client.hgetall("foo").items()}
+        assert result["f"].startswith(COMPACT_CODEC_PREFIX)
+        assert result["e+last_seen"].startswith(COMPACT_CODEC_PREFIX)
+
+        self.buf.process("foo")
+        process.assert_called_once_with(
+            Group, {"times_seen": 1}, {"pk": 1}, {"last_seen": now}, None
+        )
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
     def test_incr_saves_to_redis(self):
@@ -121,6 +278,89 @@ class RedisBufferTest(TestCase):
         pending = client.zrange("b:p", 0, -1)
         assert pending == [b"foo"]
 
+    @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
+    def test_incr_coalesced(self):
+        now = datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        later = datetime(2017, 5, 3, 6, 6, 7, tzinfo=timezone.utc)
+        self.buf.coalesce_window = 60
+        client = self.buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+        key = self.buf._make_key(model, filters)
+
+        self.buf.incr(model, {"times_seen": 1}, filters, extra={"last_seen": now})
+        self.buf.incr(model, {"times_seen": 2}, filters, extra={"last_seen": later})
+        self.buf.incr(model, {"times_seen": 1}, {"pk": 2})
+
+        # nothing is written until the coalesced increments are flushed
+        assert client.hgetall(key) == {}
+        assert client.zrange("b:p", 0, -1) == []
+
+        self.buf.flush_coalesced()
+
+        result = {force_text(k): v for k, v in client.hgetall(key).items()}
+        assert pickle.loads(result.pop("f")) == filters
+        assert pickle.loads(result.pop("e+last_seen")) == later
+        assert result == {"i+times_seen": b"3", "m": b"mock.mock.Mock"}
+        assert sorted(client.zrange("b:p", 0, -1)) == sorted(
+            [key.encode("utf-8"), self.buf._make_key(model, {"pk": 2}).encode("utf-8")]
+        )
+        assert self.buf._coalesced == {}
+        assert self.buf._coalesce_timer is None
+
+    @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
+    def test_incr_coalesced_flushes_on_size(self):
+        self.buf.coalesce_window = 60
+        self.buf.coalesce_max_keys = 2
+        client = self.buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+
+        self.buf.incr(model, {"times_seen": 1}, {"pk": 1})
+        assert client.zrange("b:p", 0, -1) == []
+
+        self.buf.incr(model, {"times_seen": 1}, {"pk": 2})
+        assert len(client.zrange("b:p", 0, -1)) == 2
+        assert self.buf._coalesced == {}
+
+    @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
+    def test_incr_coalesced_requeued_on_failure(self):
+        self.buf.coalesce_window = 60
+        client = self.buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+        key = self.buf._make_key(model, filters)
+
+        self.buf.incr(model, {"times_seen": 1}, filters)
+        with mock.patch.object(self.buf, "_write_incr", side_effect=RuntimeError()):
+            self.buf.flush_coalesced()
+        assert client.hgetall(key) == {}
+
+        self.buf.incr(model, {"times_seen": 2}, filters)
+        self.buf.flush_coalesced()
+        assert client.hget(key, "i+times_seen") == b"3"
+        assert self.buf._coalesced == {}
+
+    @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
+    def test_incr_coalesced_flushed_on_shutdown(self):
+        client = self.buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+
+        self.buf.incr(model, {"times_seen": 1}, {"pk": 1})
+        assert self.buf not in redis._coalescing_buffers
+
+        self.buf.coalesce_window = 60
+        self.buf.incr(model, {"times_seen": 1}, {"pk": 2})
+        assert self.buf in redis._coalescing_buffers
+        assert len(client.zrange("b:p", 0, -1)) == 1
+
+        worker_shutdown.send(sender=None)
+        assert len(client.zrange("b:p", 0, -1)) == 2
+        assert self.buf._coalesced == {}
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.redis.process_incr")
     @mock.patch("sentry.buffer.redis.process_pending")
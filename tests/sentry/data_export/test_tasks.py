@@ -223,6 +223,26 @@ class AssembleDownloadTest(TestCase, SnubaTestCase):
 
         assert emailer.called
 
+    @patch("sentry.data_export.models.ExportedData.email_success")
+    def test_discover_concurrent_fragments(self, emailer):
+        de = ExportedData.objects.create(
+            user=self.user,
+            organization=self.org,
+            query_type=ExportQueryType.DISCOVER,
+            query_info={"project": [self.project.id], "field": ["title"], "query": ""},
+        )
+        with self.tasks(), self.options({"data-export.fetch-concurrency": 2}):
+            assemble_download(de.id, batch_size=1)
+        de = ExportedData.objects.get(id=de.id)
+        assert de.date_finished is not None
+        file = de._get_file()
+        header, *rows = file.getfile().read().strip().split(b"\r\n")
+        assert header == b"title"
+        assert len(rows) == 3
+        assert all(row.startswith(b"<unlabeled event>") for row in rows)
+
+        assert emailer.called
+
     @patch("sentry.data_export.models.ExportedData.email_success")
     def test_discover_respects_selected_environment(self, emailer):
         de = ExportedData.objects.create(
@@ -0,0 +1,94 @@
+import os
+import time
+from tempfile import TemporaryDirectory
+from unittest import TestCase as SimpleTestCase
+
+from django.test import override_settings
+
+from sentry.db.models.manager.host_cache import SWEEP_INTERVAL, HostCache
+from sentry.models import Project
+from sentry.testutils import TestCase
+from sentry.utils.cache import cache
+from sentry.utils.compat import mock
+
+
+class HostCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.host_cache = HostCache(self.temp_dir.name, ttl=10)
+
+    def test_get_set_delete(self):
+        assert self.host_cache.get("foo") is None
+
+        self.host_cache.set("foo", {"bar": 1})
+        assert self.host_cache.get("foo") == {"bar": 1}
+        assert self.host_cache.get("foo", version="other") is None
+
+        self.host_cache.delete("foo")
+        assert self.host_cache.get("foo") is None
+        self.host_cache.delete("foo")
+
+    def test_expiry(self):
+        self.host_cache.set("foo", 1)
+        self.host_cache.set("bar", 2)
+
+        expired = time.time() - 20
+        os.utime(self.host_cache._get_path("foo", None), (expired, expired))
+        assert self.host_cache.get("foo") is None
+        assert self.host_cache.get("bar") == 2
+
+        self.host_cache.sweep()
+        assert not os.path.exists(self.host_cache._get_path("foo", None))
+        assert self.host_cache.get("bar") == 2
+
+    @mock.patch("sentry.db.models.manager.host_cache.threading.Thread")
+    def test_sweep_once_per_interval(self, thread):
+        other = HostCache(self.temp_dir.name, ttl=10)
+        self.host_cache.set("foo", 1)
+        assert not thread.called
+
+        later = time.time() + SWEEP_INTERVAL
+        with mock.patch("sentry.db.models.manager.host_cache.time.time", return_value=later):
+            self.host_cache.set("foo", 1)
+            other.set("bar", 2)
+            self.host_cache.set("baz", 3)
+
+        # Only one process of the host sweeps, and not on the writing thread.
+        thread.assert_called_once_with(target=self.host_cache.sweep, name="host-cache-sweep")
+        thread.return_value.start.assert_called_once_with()
+
+
+class ManagerHostCacheTest(TestCase):
+    def setUp(self):
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        settings_override = override_settings(SENTRY_MODEL_HOST_CACHE_PATH=temp_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_get_from_cache(self):
+        project = self.create_project()
+
+        with mock.patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            assert Project.objects.get_from_cache(id=project.id) == project
+            # Saving the project filled the host cache.
+            assert not get_many.called
+
+            project.update(name="other")
+            assert Project.objects.get_from_cache(id=project.id).name == "other"
+            assert Project.objects.get_many_from_cache([project.id])[0].name == "other"
+            assert not get_many.called
+
+        cache.clear()
+        with self.assertNumQueries(0):
+            assert Project.objects.get_from_cache(id=project.id).name == "other"
+
+    def test_delete(self):
+        project = self.create_project()
+        project_id = project.id
+        Project.objects.get_from_cache(id=project_id)
+
+        project.delete()
+        with self.assertRaises(Project.DoesNotExist):
+            Project.objects.get_from_cache(id=project_id)
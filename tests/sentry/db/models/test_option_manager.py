@@ -0,0 +1,68 @@
+import time
+
+from sentry.db.models.manager.option import OptionCacheInvalidation
+from sentry.testutils import TestCase
+from sentry.utils.compat import mock
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class OptionCacheInvalidationTest(TestCase):
+    def test_disabled(self):
+        invalidation = OptionCacheInvalidation()
+        assert not invalidation.is_active()
+
+    def test_invalidation(self):
+        subscriber = OptionCacheInvalidation()
+        publisher = OptionCacheInvalidation()
+        self.addCleanup(setattr, subscriber, "_cluster_name", None)
+
+        with self.settings(SENTRY_OPTION_CACHE_INVALIDATION_CLUSTER="default"):
+            wait_for(subscriber.is_active)
+
+            for key, value in (
+                ("sentry_projectoptions:1", "bar"),
+                ("sentry_projectoptions:2", "baz"),
+            ):
+                subscriber.set(key, {"foo": value}, subscriber.generation(key))
+            assert subscriber.get("sentry_projectoptions:1") == {"foo": "bar"}
+
+            publisher.publish("sentry_projectoptions:1")
+            wait_for(lambda: subscriber.get("sentry_projectoptions:1") is None)
+            assert subscriber.get("sentry_projectoptions:2") == {"foo": "baz"}
+
+        assert not subscriber.is_active()
+
+    def test_set_after_invalidation(self):
+        invalidation = OptionCacheInvalidation()
+        key = "sentry_projectoptions:1"
+
+        generation = invalidation.generation(key)
+        invalidation.publish(key)
+        # Values loaded before the invalidation are not stored.
+        invalidation.set(key, {"foo": "bar"}, generation)
+        assert invalidation.get(key) is None
+
+        invalidation.set(key, {"foo": "baz"}, invalidation.generation(key))
+        assert invalidation.get(key) == {"foo": "baz"}
+
+    def test_fork(self):
+        invalidation = OptionCacheInvalidation()
+        self.addCleanup(setattr, invalidation, "_cluster_name", None)
+
+        with self.settings(SENTRY_OPTION_CACHE_INVALIDATION_CLUSTER="default"):
+            wait_for(invalidation.is_active)
+            key = "sentry_projectoptions:1"
+            invalidation.set(key, {"foo": "bar"}, invalidation.generation(key))
+
+            # A forked process drops the values of its parent and subscribes
+            # on its own.
+            with mock.patch("os.getpid", return_value=invalidation._pid + 1):
+                assert not invalidation.is_active()
+                assert invalidation.get(key) is None
+                wait_for(invalidation.is_active)
@@ -0,0 +1,46 @@
+import uuid
+
+import pytest
+
+from sentry.digests.codecs import CompactNotificationCodec, CompressedPickleCodec
+from sentry.digests.notifications import Notification
+from sentry.eventstore.models import Event
+from sentry.testutils.helpers import override_options
+from sentry.utils.samples import load_data
+
+# What a busy timeline holds: `RedisBackend` keeps up to 1000 records.
+RECORDS = 1000
+
+
+def make_timeline():
+    data = load_data("python")
+    return [
+        Notification(Event(1, uuid.uuid4().hex, group_id=idx % 20, data=dict(data)), [1, 2])
+        for idx in range(RECORDS)
+    ]
+
+
+def roundtrip(codec, timeline):
+    return [codec.decode(codec.encode(notification)) for notification in timeline]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "codec", [CompressedPickleCodec(), CompactNotificationCodec()], ids=lambda c: type(c).__name__
+)
+@override_options({"digests.write-compact-codec": True})
+def test_benchmark_codec(benchmark, codec):
+    timeline = make_timeline()
+    size = sum(len(codec.encode(notification)) for notification in timeline)
+    benchmark.extra_info["bytes_per_record"] = size / RECORDS
+
+    decoded = benchmark(roundtrip, codec, timeline)
+    assert [n.event.event_id for n in decoded] == [n.event.event_id for n in timeline]
+
+
+@override_options({"digests.write-compact-codec": True})
+def test_compact_size():
+    timeline = make_timeline()
+    pickled = sum(len(CompressedPickleCodec().encode(n)) for n in timeline)
+    compact = sum(len(CompactNotificationCodec().encode(n)) for n in timeline)
+    assert compact * 10 < pickled
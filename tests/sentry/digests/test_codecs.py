@@ -0,0 +1,55 @@
+import uuid
+
+from sentry.digests.codecs import (
+    COMPACT_CODEC_PREFIX,
+    CompactNotificationCodec,
+    CompressedPickleCodec,
+)
+from sentry.digests.notifications import Notification
+from sentry.eventstore.models import Event
+from sentry.testutils.helpers import override_options
+
+
+def make_notification():
+    event = Event(1, uuid.uuid4().hex, group_id=2, data={"message": "hello"})
+    return Notification(event, [3, 4])
+
+
+@override_options({"digests.write-compact-codec": True})
+def test_roundtrip():
+    codec = CompactNotificationCodec()
+    notification = make_notification()
+
+    value = codec.encode(notification)
+    assert value.startswith(COMPACT_CODEC_PREFIX)
+
+    decoded = codec.decode(value)
+    assert decoded.rules == [3, 4]
+    assert decoded.event.project_id == 1
+    assert decoded.event.event_id == notification.event.event_id
+    assert decoded.event.group_id == 2
+    # Event data is loaded when the digest is built.
+    assert not decoded.event.data.is_bound
+
+
+def test_decode_pickle():
+    codec = CompactNotificationCodec()
+    notification = make_notification()
+    with override_options({"digests.write-compact-codec": False}):
+        value = codec.encode(notification)
+
+    assert not value.startswith(COMPACT_CODEC_PREFIX)
+    decoded = codec.decode(value)
+    assert decoded.rules == [3, 4]
+    assert decoded.event.event_id == notification.event.event_id
+    assert decoded.event.data["message"] == "hello"
+
+    # Records written before the compact codec existed.
+    decoded = codec.decode(CompressedPickleCodec().encode(notification))
+    assert decoded.event.event_id == notification.event.event_id
+
+
+@override_options({"digests.write-compact-codec": True})
+def test_other_values():
+    codec = CompactNotificationCodec()
+    assert codec.decode(codec.encode("value")) == "value"
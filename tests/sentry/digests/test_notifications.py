@@ -4,9 +4,11 @@ from functools import reduce
 from exam import fixture
 
 from sentry.digests import Record
+from sentry.digests.codecs import CompactNotificationCodec
 from sentry.digests.notifications import (
     Notification,
     event_to_record,
+    fetch_state,
     group_records,
     rewrite_record,
     sort_group_contents,
@@ -17,6 +19,8 @@ from sentry.digests.notifications import (
 from sentry.models import Rule
 from sentry.notifications.types import ActionTargetType
 from sentry.testutils import TestCase
+from sentry.testutils.helpers import override_options
+from sentry.testutils.helpers.datetime import before_now, iso_format
 
 
 class RewriteRecordTestCase(TestCase):
@@ -60,6 +64,25 @@ class RewriteRecordTestCase(TestCase):
         )
 
 
+class FetchStateTestCase(TestCase):
+    def test_binds_event_data(self):
+        event = self.store_event(
+            data={"message": "hello", "timestamp": iso_format(before_now(minutes=1))},
+            project_id=self.project.id,
+        )
+        record = event_to_record(event, [])
+
+        codec = CompactNotificationCodec()
+        with override_options({"digests.write-compact-codec": True}):
+            record = record._replace(value=codec.decode(codec.encode(record.value)))
+        assert not record.value.event.data.is_bound
+
+        state = fetch_state(self.project, [record])
+        assert state["groups"] == {event.group_id: event.group}
+        assert record.value.event.data.is_bound
+        assert record.value.event.message == "hello"
+
+
 class GroupRecordsTestCase(TestCase):
     @fixture
     def rule(self):
@@ -15,8 +15,10 @@ from sentry.event_manager import (
     EventUser,
     HashDiscarded,
     has_pending_commit_resolution,
+    save_error_events,
 )
 from sentry.eventstore.models import Event
+from sentry.grouping import grouphash_cache
 from sentry.grouping.utils import hash_from_values
 from sentry.ingest.inbound_filters import FilterStatKeys
 from sentry.models import (
@@ -40,6 +42,7 @@ from sentry.models import (
     UserReport,
 )
 from sentry.testutils import TestCase, assert_mock_called_once_with_partial
+from sentry.testutils.helpers.datetime import before_now, iso_format
 from sentry.utils.cache import cache_key_for_event
 from sentry.utils.compat import mock
 from sentry.utils.outcomes import Outcome
@@ -1371,6 +1374,194 @@ class EventManagerTest(TestCase):
             assert o.kwargs["category"] == DataCategory.ATTACHMENT
             assert o.kwargs["quantity"] == 5
 
+    def _make_error_job(self, **kwargs):
+        manager = EventManager(make_event(**kwargs))
+        manager.normalize()
+        return {
+            "data": manager.get_data(),
+            "project_id": self.project.id,
+            "raw": False,
+            "start_time": time(),
+            "cache_key": None,
+        }
+
+    def test_save_error_events_batch(self):
+        jobs = [
+            self._make_error_job(
+                message="foo", fingerprint=["a" * 32], release="1.0", environment="prod"
+            ),
+            self._make_error_job(
+                message="foo", fingerprint=["a" * 32], release="1.0", environment="prod"
+            ),
+            self._make_error_job(
+                message="bar", fingerprint=["b" * 32], release="1.0", environment="prod"
+            ),
+        ]
+
+        with self.tasks():
+            saved_jobs = save_error_events(jobs, {self.project.id: self.project})
+
+        assert saved_jobs == jobs
+        events = [job["event"] for job in jobs]
+        assert events[0].group_id == events[1].group_id
+        assert events[0].group_id != events[2].group_id
+        assert [job["is_new"] for job in jobs] == [True, False, True]
+        assert [job["is_new_group_environment"] for job in jobs] == [True, False, True]
+
+        assert Group.objects.get(id=events[0].group_id).times_seen == 2
+        assert Release.objects.filter(version="1.0").count() == 1
+        assert Environment.objects.filter(name="prod").count() == 1
+        assert jobs[0]["grouprelease"] == jobs[1]["grouprelease"]
+        assert GroupRelease.objects.filter(group_id=events[0].group_id).count() == 1
+
+        for event in events:
+            assert nodestore.get(Event.generate_node_id(self.project.id, event.event_id))
+
+    def test_save_error_events_batch_release_dates(self):
+        newer = before_now(minutes=5).replace(microsecond=0)
+        older = before_now(minutes=10).replace(microsecond=0)
+        jobs = [
+            self._make_error_job(
+                message="foo",
+                fingerprint=["a" * 32],
+                release="1.0",
+                environment="prod",
+                timestamp=iso_format(timestamp),
+            )
+            for timestamp in (newer, older)
+        ]
+
+        with self.tasks():
+            save_error_events(jobs, {self.project.id: self.project})
+
+        # Rows are created with the oldest event of the batch.
+        group_release = GroupRelease.objects.get(group_id=jobs[0]["event"].group_id)
+        assert (group_release.first_seen, group_release.last_seen) == (older, newer)
+        release_project_env = ReleaseProjectEnvironment.objects.get(project_id=self.project.id)
+        assert (release_project_env.first_seen, release_project_env.last_seen) == (older, newer)
+
+    def test_save_error_events_batch_skips_discarded_hash(self):
+        manager = EventManager(make_event(message="foo", fingerprint=["a" * 32]))
+        with self.tasks():
+            event = manager.save(self.project.id)
+
+        group = Group.objects.get(id=event.group_id)
+        tombstone = GroupTombstone.objects.create(
+            project_id=group.project_id,
+            level=group.level,
+            message=group.message,
+            culprit=group.culprit,
+            data=group.data,
+            previous_group_id=group.id,
+        )
+        GroupHash.objects.filter(group=group).update(group=None, group_tombstone_id=tombstone.id)
+
+        jobs = [
+            self._make_error_job(message="foo", fingerprint=["a" * 32]),
+            self._make_error_job(message="bar", fingerprint=["b" * 32]),
+        ]
+
+        with self.tasks():
+            saved_jobs = save_error_events(jobs, {self.project.id: self.project})
+
+        assert saved_jobs == [jobs[1]]
+        assert isinstance(jobs[0]["hash_discarded"], HashDiscarded)
+        assert jobs[1]["event"].group_id is not None
+
+    def test_grouphash_cache(self):
+        with self.options({"store.use-grouphash-cache": True}):
+            manager = EventManager(make_event(message="foo", fingerprint=["a" * 32]))
+            with self.tasks(), self.capture_on_commit_callbacks(execute=True):
+                event = manager.save(self.project.id)
+
+            with mock.patch(
+                "sentry.event_manager._find_existing_grouphash",
+                side_effect=AssertionError("grouphash lookup is not cached"),
+            ):
+                manager = EventManager(make_event(message="foo bar", fingerprint=["a" * 32]))
+                with self.tasks():
+                    event2 = manager.save(self.project.id)
+
+        assert event2.group_id == event.group_id
+        group = Group.objects.get(id=event.group_id)
+        assert group.times_seen == 2
+        assert group.data.get("metadata") == {"title": "foo bar"}
+
+    def test_grouphash_cache_invalidated_on_discard(self):
+        with self.options({"store.use-grouphash-cache": True}):
+            manager = EventManager(make_event(message="foo", fingerprint=["a" * 32]))
+            with self.tasks(), self.capture_on_commit_callbacks(execute=True):
+                event = manager.save(self.project.id)
+
+            group = Group.objects.get(id=event.group_id)
+            tombstone = GroupTombstone.objects.create(
+                project_id=group.project_id,
+                level=group.level,
+                message=group.message,
+                culprit=group.culprit,
+                data=group.data,
+                previous_group_id=group.id,
+            )
+            GroupHash.objects.filter(group=group).update(
+                group=None, group_tombstone_id=tombstone.id
+            )
+            grouphash_cache.invalidate(self.project.id)
+
+            manager = EventManager(make_event(message="foo", fingerprint=["a" * 32]))
+            with self.tasks(), pytest.raises(HashDiscarded):
+                manager.save(self.project.id)
+
+    def test_grouphash_cache_skips_groups_pending_deletion(self):
+        with self.options({"store.use-grouphash-cache": True}):
+            manager = EventManager(make_event(message="foo", fingerprint=["a" * 32]))
+            with self.tasks(), self.capture_on_commit_callbacks(execute=True):
+                event = manager.save(self.project.id)
+
+            # Only the status is updated, so the cache still maps the hash to
+            # the group.
+            Group.objects.filter(id=event.group_id).update(status=GroupStatus.PENDING_DELETION)
+            GroupHash.objects.filter(group_id=event.group_id).delete()
+
+            manager = EventManager(make_event(message="foo", fingerprint=["a" * 32]))
+            with self.tasks():
+                event2 = manager.save(self.project.id)
+
+        assert event2.group_id != event.group_id
+
+    def test_grouphash_cache_set_many_after_invalidation(self):
+        version = grouphash_cache.get_version(self.project.id)
+        grouphash_cache.invalidate(self.project.id)
+
+        # Values read before the invalidation are not cached.
+        grouphash_cache.set_many(self.project.id, {"a" * 32: 1}, version)
+        assert grouphash_cache.get_many(self.project.id, ["a" * 32]) == {}
+
+        version = grouphash_cache.get_version(self.project.id)
+        grouphash_cache.set_many(self.project.id, {"a" * 32: 1}, version)
+        assert grouphash_cache.get_many(self.project.id, ["a" * 32]) == {"a" * 32: 1}
+
+    def test_grouphash_cache_version_remembered(self):
+        version = grouphash_cache.get_version(self.project.id)
+        with mock.patch.object(grouphash_cache.cache, "get") as cache_get:
+            assert grouphash_cache.get_version(self.project.id) == version
+        assert not cache_get.called
+
+        # Invalidations are seen by the invalidating process right away.
+        grouphash_cache.invalidate(self.project.id)
+        assert grouphash_cache.get_version(self.project.id) != version
+        assert grouphash_cache.get_version(self.project.id) == grouphash_cache.get_version(
+            self.project.id, local=False
+        )
+
+    def test_grouphash_cache_invalidated_on_commit(self):
+        with self.capture_on_commit_callbacks() as callbacks:
+            grouphash_cache.invalidate_on_commit(self.project.id)
+
+        version = grouphash_cache.get_version(self.project.id)
+        assert len(callbacks) == 1
+        callbacks[0]()
+        assert grouphash_cache.get_version(self.project.id) != version
+
     def test_honors_crash_report_limit(self):
         from sentry.utils.outcomes import track_outcome
 
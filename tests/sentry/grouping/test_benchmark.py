@@ -1,22 +1,18 @@
+import copy
+
 import pytest
 
 from sentry.grouping.api import get_default_grouping_config_dict
+from sentry.grouping.component import GroupingComponent
+from sentry.grouping.enhancer import Enhancements
 from sentry.grouping.strategies.configurations import CONFIGURATIONS
+from sentry.utils.safe import get_path
 from tests.sentry.grouping import grouping_input as grouping_inputs
 
 CONFIGS = {key: get_default_grouping_config_dict(key) for key in sorted(CONFIGURATIONS.keys())}
 
 
-def benchmark_available():
-    try:
-        import pytest_benchmark  # NOQA
-    except ModuleNotFoundError:
-        return False
-    else:
-        return True
-
-
-@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.benchmark
 @pytest.mark.parametrize(
     "config_name", sorted(CONFIGURATIONS.keys()), ids=lambda x: x.replace("-", "_")
 )
@@ -37,3 +33,39 @@ def run_configuration(grouping_input, config):
     event.project = None
 
     event.get_hashes()
+
+
+ENHANCEMENT_PLATFORMS = ("native", "cocoa", "javascript")
+
+
+def get_enhancement_inputs():
+    rv = []
+    for grouping_input in sorted(grouping_inputs, key=lambda x: x.filename):
+        data = grouping_input.data
+        if data.get("platform") not in ENHANCEMENT_PLATFORMS:
+            continue
+        for exception in get_path(data, "exception", "values", filter=True, default=()):
+            frames = get_path(exception, "stacktrace", "frames", filter=True)
+            if frames:
+                rv.append((frames, data["platform"], exception))
+    return rv
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "config_name", sorted(CONFIGURATIONS.keys()), ids=lambda x: x.replace("-", "_")
+)
+def test_benchmark_enhancements(config_name, benchmark):
+    enhancements = Enhancements.loads(CONFIGS[config_name]["enhancements"])
+    inputs = get_enhancement_inputs()
+
+    def run():
+        for frames, platform, exception_data in inputs:
+            frames = copy.deepcopy(frames)
+            enhancements.apply_modifications_to_frame(frames, platform, exception_data)
+            components = [GroupingComponent(id="frame") for _ in frames]
+            enhancements.update_frame_components_contributions(
+                components, frames, platform, exception_data
+            )
+
+    benchmark(run)
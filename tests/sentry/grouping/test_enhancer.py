@@ -1,7 +1,15 @@
 import pytest
 
 from sentry.grouping.component import GroupingComponent
-from sentry.grouping.enhancer import Enhancements, InvalidEnhancerConfig, create_match_frame
+from sentry.grouping.enhancer import (
+    ENHANCEMENT_BASES,
+    Enhancements,
+    InvalidEnhancerConfig,
+    create_match_frame,
+)
+from sentry.grouping.enhancer.compiler import get_literal_prefix
+from sentry.utils.safe import get_path
+from tests.sentry.grouping import with_grouping_input
 
 
 def dump_obj(obj):
@@ -418,3 +426,50 @@ def test_sentinel_and_prefix(action, type):
     actions[0][1].update_frame_components_contributions([component], frames, 0)
     expected = True if action == "+" else False
     assert getattr(component, f"is_{type}_frame") is expected
+
+
+def test_literal_prefix():
+    assert get_literal_prefix(b"std::*") == b"std::"
+    assert get_literal_prefix(b"*::panic") == b""
+    assert get_literal_prefix(b"foo?bar") == b"foo"
+    assert get_literal_prefix(b"[Ff]oo") == b""
+    assert get_literal_prefix(b"main") == b"main"
+
+
+def test_compiled_rule_prefilters():
+    rule = Enhancements.from_config_string("family:native module:std::* -app").rules[0]
+    assert rule._compiled.families == {b"native"}
+    assert rule._compiled.prefixes == [("module", b"std::")]
+
+    rule = Enhancements.from_config_string("family:native !module:std::* -app").rules[0]
+    assert rule._compiled.prefixes == []
+
+    rule = Enhancements.from_config_string("family:all function:foo* -app").rules[0]
+    assert rule._compiled.families is None
+    assert rule._compiled.prefixes == [("function", b"foo")]
+
+
+@with_grouping_input("grouping_input")
+def test_compiled_rules_match_like_matchers(grouping_input):
+    data = grouping_input.data
+    platform = data.get("platform")
+    frames = [
+        frame
+        for exception in get_path(data, "exception", "values", filter=True, default=())
+        for frame in get_path(exception, "stacktrace", "frames", filter=True, default=())
+    ]
+    match_frames = [create_match_frame(frame, platform) for frame in frames]
+
+    for base in ENHANCEMENT_BASES.values():
+        for rule in base.iter_rules():
+            for idx in range(len(match_frames)):
+                expected = all(
+                    m.matches_frame(match_frames, idx, platform, None, {})
+                    for m in rule._compiled.matchers
+                )
+                # Evaluate twice to cover memoized results.
+                for _ in range(2):
+                    assert (
+                        rule._compiled.matches_frame(match_frames, idx, platform, None, {})
+                        == expected
+                    ), (rule.matcher_description, frames[idx])
@@ -0,0 +1,87 @@
+import os
+import zipfile
+from io import BytesIO
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from sentry.lang.javascript.bundle_store import ArtifactBundleStore
+from sentry.utils import json
+
+
+def make_bundle(files, compression=zipfile.ZIP_DEFLATED):
+    data = BytesIO()
+    with zipfile.ZipFile(data, mode="w", compression=compression) as zip_file:
+        for filename, contents in files.items():
+            zip_file.writestr(filename, contents)
+        zip_file.writestr(
+            "manifest.json",
+            json.dumps(
+                {
+                    "files": {
+                        filename: {"url": f"~/{filename}", "headers": {"x-file": filename}}
+                        for filename in files
+                    }
+                }
+            ),
+        )
+    data.seek(0)
+    return data
+
+
+class ArtifactBundleStoreTest(TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def get_stored_paths(self, store):
+        return [
+            os.path.join(dirpath, filename)
+            for dirpath, _, filenames in os.walk(store.path)
+            for filename in filenames
+        ]
+
+    def test_get(self):
+        store = ArtifactBundleStore(self.temp_dir.name, 1024 * 1024)
+        fetches = []
+
+        def fetch():
+            fetches.append(1)
+            return make_bundle({"a.js": b"a" * 1000, "b.js": b"b"})
+
+        bundle = store.get(1, None, "ident", fetch)
+        assert bundle.get_file_by_url("~/a.js") == (b"a" * 1000, {"x-file": "a.js"})
+        assert bundle.get_file_by_url("~/b.js") == (b"b", {"x-file": "b.js"})
+        with self.assertRaises(KeyError):
+            bundle.get_file_by_url("~/c.js")
+
+        assert store.get(1, None, "ident", fetch) is bundle
+        # Another process opens the bundle from disk.
+        other = ArtifactBundleStore(self.temp_dir.name, 1024 * 1024)
+        assert other.get(1, None, "ident", fetch).get_file_by_url("~/b.js")[0] == b"b"
+        assert len(fetches) == 1
+
+        assert store.get(1, 2, "ident", lambda: None) is None
+        assert len(self.get_stored_paths(store)) == 1
+
+    def test_get_other_compression(self):
+        store = ArtifactBundleStore(self.temp_dir.name, 1024 * 1024)
+        bundle = store.get(
+            1, None, "ident", lambda: make_bundle({"a.js": b"a" * 1000}, zipfile.ZIP_LZMA)
+        )
+        assert bundle.get_file_by_url("~/a.js") == (b"a" * 1000, {"x-file": "a.js"})
+
+    def test_evict(self):
+        bundle_size = len(make_bundle({"a.js": os.urandom(1000)}).getvalue())
+        store = ArtifactBundleStore(self.temp_dir.name, int(bundle_size * 2.5))
+
+        for idx, ident in enumerate(("1", "2", "3")):
+            store.get(1, None, ident, lambda: make_bundle({"a.js": os.urandom(1000)}))
+            # Make sure the bundles are ordered despite coarse timestamps.
+            path = store._get_path(1, None, ident)
+            if os.path.exists(path):
+                os.utime(path, (1000 + idx, 1000 + idx))
+
+        assert len(self.get_stored_paths(store)) == 2
+        assert not os.path.exists(store._get_path(1, None, "1"))
+        assert store.get(1, None, "1", lambda: None) is None
+        assert store.get(1, None, "3", lambda: None) is not None
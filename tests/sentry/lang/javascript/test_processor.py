@@ -1,9 +1,12 @@
+import base64
 import errno
+import os
 import re
 import unittest
 import zipfile
 from copy import deepcopy
 from io import BytesIO
+from tempfile import TemporaryDirectory
 
 import pytest
 import responses
@@ -19,6 +22,7 @@ from sentry.lang.javascript.processor import (
     UnparseableSourcemap,
     cache,
     discover_sourcemap,
+    fetch_concurrently,
     fetch_file,
     fetch_release_archive_for_url,
     fetch_release_file,
@@ -27,6 +31,7 @@ from sentry.lang.javascript.processor import (
     get_max_age,
     get_release_file_cache_key,
     get_release_file_cache_key_meta,
+    get_release_files,
     should_retry_fetch,
     trim_line,
 )
@@ -550,6 +555,54 @@ class FetchFileTest(TestCase):
         result2 = fetch_file("/example.js", release=release)
         assert result2 == result
 
+    @responses.activate
+    def test_non_url_with_release_archive_bundle_store(self):
+        compressed = BytesIO()
+        with zipfile.ZipFile(compressed, mode="w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr("example.js", b"foo" * 100)
+            zip_file.writestr("stored.js", b"bar", compress_type=zipfile.ZIP_STORED)
+            zip_file.writestr(
+                "manifest.json",
+                json.dumps(
+                    {
+                        "files": {
+                            "example.js": {
+                                "url": "/example.js",
+                                "headers": {"content-type": "application/json"},
+                            },
+                            "stored.js": {"url": "/stored.js"},
+                        }
+                    }
+                ),
+            )
+
+        release = Release.objects.create(version="1", organization_id=self.project.organization_id)
+        release.add_project(self.project)
+
+        compressed.seek(0)
+        file_ = File.objects.create(name="foo", type="release.bundle")
+        file_.putfile(compressed)
+        update_artifact_index(release, None, file_)
+
+        with TemporaryDirectory() as cache_path, self.options(
+            {
+                "releasefile.cache-path": cache_path,
+                "processing.artifact-bundle-store-size": 1024 * 1024,
+            }
+        ):
+            with pytest.raises(http.BadSource):
+                fetch_file("does-not-exist.js", release=release)
+
+            result = fetch_file("/example.js", release=release)
+            assert result.body == b"foo" * 100
+            assert result.headers == {"content-type": "application/json"}
+
+            assert fetch_file("/stored.js", release=release).body == b"bar"
+
+            # The archive was materialized once.
+            stored = [files for _, _, files in os.walk(os.path.join(cache_path, "bundles"))]
+            assert sum(len(files) for files in stored) == 1
+
     @patch("sentry.lang.javascript.processor.cache.set", side_effect=cache.set)
     @patch("sentry.lang.javascript.processor.cache.get", side_effect=cache.get)
     def test_archive_caching(self, cache_get, cache_set):
@@ -931,6 +984,22 @@ class FetchSourcemapTest(TestCase):
         with pytest.raises(UnparseableSourcemap):
             fetch_sourcemap("data:application/json;base64,xxx")
 
+    @responses.activate
+    def test_parsed_artifact_cache(self):
+        responses.add(
+            responses.GET,
+            "http://example.com/file.min.js.map",
+            body=base64.b64decode(base64_sourcemap[len("data:application/json;base64,") :]),
+            content_type="application/json",
+        )
+
+        with self.options({"processing.parsed-artifact-cache-size": 1024 * 1024}):
+            smap_view = fetch_sourcemap("http://example.com/file.min.js.map")
+            assert fetch_sourcemap("http://example.com/file.min.js.map") is smap_view
+            assert fetch_sourcemap(base64_sourcemap) is not smap_view
+
+        assert fetch_sourcemap("http://example.com/file.min.js.map") is not smap_view
+
     @responses.activate
     def test_garbage_json(self):
         responses.add(
@@ -1289,3 +1358,40 @@ class CacheSourceTest(TestCase):
         # now we have an error
         assert len(processor.cache.get_errors(abs_path)) == 1
         assert processor.cache.get_errors(abs_path)[0] == {"url": map_url, "type": "js_no_source"}
+
+    @patch("sentry.lang.javascript.processor.discover_sourcemap")
+    def test_populate_source_cache_prefetches_release_files(self, mock_discover_sourcemap):
+        mock_discover_sourcemap.return_value = None
+
+        project = self.create_project()
+        release = self.create_release(project=project, version="12.31.13")
+        filenames = ["app:///a.js", "app:///b.js", "app:///c.js"]
+        for filename in filenames:
+            self.create_release_file(release_id=release.id, name=filename)
+
+        processor = JavaScriptStacktraceProcessor(
+            data={"release": release.version}, stacktrace_infos=None, project=project
+        )
+        processor.release = release
+        processor.max_fetches = 2
+
+        with patch(
+            "sentry.lang.javascript.processor.get_release_files", wraps=get_release_files
+        ) as mock_get_release_files:
+            processor.populate_source_cache([{"abs_path": filename} for filename in filenames])
+
+        # All release files are looked up with a single query.
+        assert mock_get_release_files.call_count == 1
+
+        assert processor.cache.get("app:///a.js")
+        assert processor.cache.get("app:///b.js")
+        assert processor.cache.get("app:///c.js") is None
+        assert processor.cache.get_errors("app:///c.js") == [
+            {"type": EventError.JS_TOO_MANY_REMOTE_SOURCES}
+        ]
+        assert processor.fetch_count == 3
+
+
+def test_fetch_concurrently():
+    assert fetch_concurrently(lambda x: x * 2, [1, 2, 3, 4], 1) == [2, 4, 6, 8]
+    assert fetch_concurrently(lambda x: x * 2, [1, 2, 3, 4], 3) == [2, 4, 6, 8]
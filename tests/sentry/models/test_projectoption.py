@@ -1,5 +1,9 @@
-from sentry.models import ProjectOption
+from django.core.cache import cache
+
+from sentry.db.models.manager.option import get_all_values_bulk
+from sentry.models import OrganizationOption, ProjectOption
 from sentry.testutils import TestCase
+from sentry.utils.compat import mock
 
 
 class ProjectOptionManagerTest(TestCase):
@@ -28,3 +32,45 @@ class ProjectOptionManagerTest(TestCase):
         ProjectOption.objects.create(project=self.project, key="foo", value="bar")
         result = ProjectOption.objects.get_value_bulk([self.project], "foo")
         assert result == {self.project: "bar"}
+
+    def test_get_all_values_bulk(self):
+        project2 = self.create_project()
+        ProjectOption.objects.create(project=self.project, key="foo", value="bar")
+        ProjectOption.objects._option_cache.clear()
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            result = ProjectOption.objects.get_all_values_bulk([self.project.id, project2.id])
+        assert result == {self.project.id: {"foo": "bar"}, project2.id: {}}
+
+        # Both the local and the shared cache are populated.
+        with self.assertNumQueries(0):
+            assert ProjectOption.objects.get_value(self.project, "foo") == "bar"
+            ProjectOption.objects._option_cache.clear()
+            result = ProjectOption.objects.get_all_values_bulk([self.project.id, project2.id])
+        assert result == {self.project.id: {"foo": "bar"}, project2.id: {}}
+
+    def test_get_all_values_bulk_with_organizations(self):
+        OrganizationOption.objects.create(organization=self.organization, key="foo", value="baz")
+        ProjectOption.objects.create(project=self.project, key="foo", value="bar")
+        ProjectOption.objects._option_cache.clear()
+        cache.clear()
+
+        with mock.patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            with self.assertNumQueries(2):
+                result = get_all_values_bulk(
+                    {
+                        ProjectOption.objects: [self.project.id],
+                        OrganizationOption.objects: [self.organization.id],
+                    }
+                )
+        assert get_many.call_count == 1
+        assert result == {
+            ProjectOption.objects: {self.project.id: {"foo": "bar"}},
+            OrganizationOption.objects: {self.organization.id: {"foo": "baz"}},
+        }
+
+        with self.assertNumQueries(0):
+            assert ProjectOption.objects.get_value_bulk([self.project], "foo") == {
+                self.project: "bar"
+            }
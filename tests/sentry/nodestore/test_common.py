@@ -7,6 +7,7 @@ from contextlib import contextmanager
 import pytest
 
 from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.testutils.helpers import override_options
 from tests.sentry.nodestore.bigtable.backend.tests import (
     MockedBigtableNodeStorage,
     get_temporary_bigtable_nodestorage,
@@ -97,3 +98,16 @@ def test_set_subkeys(ns):
     ns.delete("node_1")
     assert ns.get("node_1") is None
     assert ns.get("node_1", subkey="other") is None
+
+
+def test_set_subkeys_versioned_encoding(ns):
+    ns.set_subkeys("node_1", {None: {"foo": "a"}, "other": {"foo": "b"}})
+
+    with override_options({"nodestore.write-versioned-encoding": True}):
+        ns.set_subkeys("node_2", {None: {"foo": "c"}, "other": {"foo": "d"}})
+
+    # values written in both encodings remain readable side by side
+    assert ns.get_multi(["node_1", "node_2"]) == {"node_1": {"foo": "a"}, "node_2": {"foo": "c"}}
+    assert ns.get("node_1", subkey="other") == {"foo": "b"}
+    assert ns.get("node_2", subkey="other") == {"foo": "d"}
+    assert ns.get("node_2", subkey="missing") is None
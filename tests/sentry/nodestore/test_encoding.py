@@ -0,0 +1,53 @@
+import pytest
+
+from sentry.nodestore import encoding
+from sentry.nodestore.base import NodeStorage
+from sentry.testutils.helpers import override_options
+
+
+def test_roundtrip():
+    value = encoding.encode({None: b'{"foo":"bar"}', "unprocessed": b'{"foo":"baz"}'})
+
+    assert encoding.is_versioned(value)
+    assert encoding.read_segment(value) == b'{"foo":"bar"}'
+    assert encoding.read_segment(value, subkey="unprocessed") == b'{"foo":"baz"}'
+    assert encoding.read_segment(value, subkey="missing") is None
+
+
+def test_compression():
+    payload = b'{"message":"%s"}' % (b"a" * 1000)
+    value = encoding.encode({None: payload, "tiny": b"{}"})
+
+    header = encoding.read_header(value)
+    assert header[None][0] & encoding.FLAG_ZSTD
+    assert not header["tiny"][0] & encoding.FLAG_ZSTD
+    assert len(value) < len(payload)
+    assert encoding.read_segment(value, header=header) == payload
+    assert encoding.read_segment(value, subkey="tiny", header=header) == b"{}"
+
+
+def test_legacy_is_not_versioned():
+    assert not encoding.is_versioned(b'{"foo":"bar"}\nunprocessed\n{}')
+
+
+def test_invalid():
+    with pytest.raises(encoding.InvalidNodeEncoding):
+        encoding.read_header(encoding.MAGIC)
+
+    with pytest.raises(encoding.InvalidNodeEncoding):
+        encoding.read_header(encoding.encode({None: b"{}"})[:-1])
+
+    with pytest.raises(encoding.InvalidNodeEncoding):
+        encoding.encode({None: b"{}", "": b"{}"})
+
+
+@pytest.mark.parametrize("versioned", [True, False])
+def test_decode_both_encodings(versioned):
+    ns = NodeStorage()
+    with override_options({"nodestore.write-versioned-encoding": versioned}):
+        value = ns._encode({None: {"foo": "a"}, "other": {"foo": "b"}})
+
+    assert encoding.is_versioned(value) == versioned
+    assert ns._decode(value, subkey=None) == {"foo": "a"}
+    assert ns._decode(value, subkey="other") == {"foo": "b"}
+    assert ns._decode(value, subkey="missing") is None
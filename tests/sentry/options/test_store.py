@@ -149,3 +149,68 @@ class OptionsStoreTest(TestCase):
         mocked_time.return_value = 26
         store.clean_local_cache()
         assert not store._local_cache
+
+    @patch("sentry.options.store.time")
+    def test_snapshot(self, mocked_time):
+        store, key = self.store, self.make_key(10, 10)
+
+        mocked_time.return_value = 0
+        store.set(key, "bar")
+        store.refresh_snapshot()
+        other_key = self.make_key(10, 10)
+
+        with patch.object(Option.objects, "get_queryset", side_effect=RuntimeError()):
+            with patch.object(store.cache, "get", side_effect=RuntimeError()):
+                assert store.get(key) == "bar"
+                # Options that are not stored are not looked up.
+                assert store.get(other_key) is None
+
+        # Changes made by this process are visible before the next refresh.
+        store.set(other_key, "baz")
+        with patch.object(Option.objects, "get_queryset", side_effect=RuntimeError()):
+            assert store.get(other_key) == "baz"
+        store.delete(other_key)
+        assert store.get(other_key) is None
+
+    @patch("sentry.options.store.time")
+    def test_stale_snapshot(self, mocked_time):
+        store, key = self.store, self.make_key(10, 10)
+
+        mocked_time.return_value = 0
+        store.set(key, "bar")
+        store.refresh_snapshot()
+
+        Option.objects.filter(key=key.name).update(value="lol")
+        store.cache.delete(key.cache_key)
+        store._local_cache.clear()
+
+        # Still within TTL, so don't check database
+        assert store.get(key) == "bar"
+
+        # Beyond TTL, the snapshot is only used if nothing else is available.
+        mocked_time.return_value = 15
+        assert store.get(key) == "lol"
+        store._local_cache.clear()
+        with patch.object(Option.objects, "get_queryset", side_effect=RuntimeError()):
+            with patch.object(store.cache, "get", side_effect=RuntimeError()):
+                assert store.get(key) == "bar"
+
+                mocked_time.return_value = 21
+                assert store.get(key) is None
+
+    @patch("sentry.utils.metrics.incr")
+    @patch("django.db.close_old_connections")
+    def test_snapshot_refresher(self, close_old_connections, incr):
+        store = self.store
+
+        def refresh_snapshot():
+            # Stop after the first iteration.
+            store.snapshot_interval = None
+            raise RuntimeError()
+
+        store.snapshot_interval = 0.01
+        with patch.object(store, "refresh_snapshot", side_effect=refresh_snapshot):
+            store._refresh_snapshots()
+
+        assert close_old_connections.call_count == 1
+        incr.assert_called_once_with("options.snapshot.refresh-failed")
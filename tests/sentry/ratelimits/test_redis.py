@@ -1,5 +1,6 @@
-from sentry.ratelimits.redis import RedisRateLimiter
+from sentry.ratelimits.redis import RedisGCRARateLimiter, RedisRateLimiter
 from sentry.testutils import TestCase
+from sentry.utils.compat import mock
 
 
 class RedisRateLimiterTest(TestCase):
@@ -13,3 +14,72 @@ class RedisRateLimiterTest(TestCase):
     def test_simple_key(self):
         assert not self.backend.is_limited("foo", 1)
         assert self.backend.is_limited("foo", 1)
+
+
+class RedisGCRARateLimiterTest(TestCase):
+    def setUp(self):
+        self.backend = RedisGCRARateLimiter()
+
+    def test_project_key(self):
+        assert not self.backend.is_limited("foo", 1, self.project)
+        assert self.backend.is_limited("foo", 1, self.project)
+        assert not self.backend.is_limited("foo", 1)
+
+    def test_simple_key(self):
+        assert not self.backend.is_limited("foo", 1)
+        assert self.backend.is_limited("foo", 1)
+
+    def test_zero_limit(self):
+        assert self.backend.is_limited("foo", 0)
+
+    def test_sliding_window(self):
+        with mock.patch("sentry.ratelimits.redis.time", return_value=59.5):
+            for _ in range(10):
+                assert not self.backend.is_limited("foo", 10, window=60)
+            assert self.backend.is_limited("foo", 10, window=60)
+
+        # A fixed window would start over at 60 seconds and allow another
+        # burst of 10 requests.
+        with mock.patch("sentry.ratelimits.redis.time", return_value=60.5):
+            assert self.backend.is_limited("foo", 10, window=60)
+
+        # One request per emission interval (6 seconds) becomes available.
+        with mock.patch("sentry.ratelimits.redis.time", return_value=65.5):
+            assert not self.backend.is_limited("foo", 10, window=60)
+            assert self.backend.is_limited("foo", 10, window=60)
+
+    def test_is_limited_many(self):
+        assert self.backend.is_limited_many([("foo", 1, None), ("bar", 2, None)]) == [
+            False,
+            False,
+        ]
+        assert self.backend.is_limited_many([("foo", 1, None), ("bar", 2, None)]) == [
+            True,
+            False,
+        ]
+        assert self.backend.is_limited_many([("foo", 1, None), ("bar", 2, None)]) == [
+            True,
+            True,
+        ]
+
+    def test_local_cache(self):
+        backend = RedisGCRARateLimiter(local_cache_size=10)
+        assert not backend.is_limited("foo", 1)
+        assert backend.is_limited("foo", 1)
+
+        with mock.patch("sentry.ratelimits.redis.check_gcra_limits", side_effect=AssertionError):
+            assert backend.is_limited("foo", 1)
+
+    def test_local_tokens(self):
+        backend = RedisGCRARateLimiter(local_cache_size=10, local_tokens=2)
+        assert not backend.is_limited("foo", 10)
+
+        with mock.patch("sentry.ratelimits.redis.check_gcra_limits", side_effect=AssertionError):
+            assert not backend.is_limited("foo", 10)
+            assert not backend.is_limited("foo", 10)
+
+        # The leased tokens count against the limit of other processes.
+        assert not self.backend.is_limited("foo", 10)
+        for _ in range(6):
+            assert not self.backend.is_limited("foo", 10)
+        assert self.backend.is_limited("foo", 10)
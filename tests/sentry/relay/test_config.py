@@ -1,8 +1,16 @@
+from datetime import timedelta
+
 import pytest
 
-from sentry.models import ProjectKey
-from sentry.relay.config import get_project_config
+from sentry.models import Project, ProjectKey
+from sentry.relay.config import (
+    get_project_config,
+    get_project_configs_bulk,
+    serialize_project_config,
+)
 from sentry.testutils.helpers import Feature
+from sentry.utils import json
+from sentry.utils.compat import mock
 from sentry.utils.safe import get_path
 
 PII_CONFIG = """
@@ -119,3 +127,59 @@ def test_project_config_with_span_attributes(default_project, insta_snapshot):
 
     cfg = cfg.to_dict()
     insta_snapshot(cfg["config"]["spanAttributes"])
+
+
+def _strip_volatile(cfg):
+    cfg = cfg.to_dict()
+    cfg.pop("lastFetch")
+    cfg.pop("rev")
+    cfg.pop("lastChange")
+    return cfg
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("full", [False, True], ids=["slim_config", "full_config"])
+def test_get_project_configs_bulk(default_project, factories, full):
+    project2 = factories.create_project(organization=default_project.organization)
+    project2.update_option("sentry:origins", ["example.com"])
+    keys = list(ProjectKey.objects.filter(project=default_project))
+
+    # Organizations are not bound on the projects.
+    projects = list(Project.objects.filter(id__in=[default_project.id, project2.id]).order_by("id"))
+    configs = get_project_configs_bulk(projects, [keys, None], full_config=full)
+
+    assert [_strip_volatile(cfg) for cfg in configs] == [
+        _strip_volatile(get_project_config(default_project, full_config=full, project_keys=keys)),
+        _strip_volatile(get_project_config(project2, full_config=full)),
+    ]
+
+
+@pytest.mark.django_db
+def test_get_project_configs_bulk_computes_organization_once(default_project, factories):
+    project2 = factories.create_project(organization=default_project.organization)
+
+    with mock.patch(
+        "sentry.quotas.get_event_retention", return_value=90
+    ) as get_event_retention, Feature("organizations:performance-ops-breakdown"):
+        configs = get_project_configs_bulk([default_project, project2], full_config=True)
+
+    assert get_event_retention.call_count == 1
+    for cfg in configs:
+        assert cfg.config["eventRetention"] == 90
+        assert "breakdownsV2" in cfg.config
+
+
+@pytest.mark.django_db
+def test_serialize_project_config(default_project):
+    cfg = get_project_config(default_project, full_config=True).to_dict()
+    serialized, digest = serialize_project_config(cfg)
+    assert json.loads(serialized) == json.loads(json.dumps(cfg))
+
+    # The digest does not change with every fetch.
+    cfg2 = dict(cfg, lastFetch=cfg["lastFetch"] + timedelta(seconds=1), rev="other")
+    assert serialize_project_config(cfg2)[1] == digest
+
+    cfg2["slug"] = "other"
+    assert serialize_project_config(cfg2)[1] != digest
+
+    assert serialize_project_config({"disabled": True}) == ('{"disabled":true}', mock.ANY)
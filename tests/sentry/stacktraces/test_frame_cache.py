@@ -0,0 +1,69 @@
+from django.core.cache import cache
+
+from sentry.stacktraces.frame_cache import FrameCache
+from sentry.testutils import TestCase
+from sentry.utils.compat import mock
+
+
+class FrameCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_get_and_set_many(self):
+        frame_cache = FrameCache()
+        assert frame_cache.get_many({"Native": ["pf:a", "pf:b"], "JavaScript": ["pf:a"]}) == {
+            ("Native", "pf:a"): None,
+            ("Native", "pf:b"): None,
+            ("JavaScript", "pf:a"): None,
+        }
+
+        frame_cache.set_many({"Native": {"pf:a": [1]}, "JavaScript": {"pf:a": [2]}})
+        assert frame_cache.get_many({"Native": ["pf:a", "pf:b"], "JavaScript": ["pf:a"]}) == {
+            ("Native", "pf:a"): [1],
+            ("Native", "pf:b"): None,
+            ("JavaScript", "pf:a"): [2],
+        }
+
+    def test_single_round_trip(self):
+        frame_cache = FrameCache()
+        frame_cache.set_many({"Native": {"pf:a": 1, "pf:b": 2}})
+
+        with mock.patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            assert frame_cache.get_many({"Native": ["pf:a", "pf:b", "pf:c"]}) == {
+                ("Native", "pf:a"): 1,
+                ("Native", "pf:b"): 2,
+                ("Native", "pf:c"): None,
+            }
+        # Versions are remembered from `set_many`.
+        assert get_many.call_count == 1
+
+    def test_invalidate(self):
+        frame_cache = FrameCache()
+        frame_cache.set_many({"Native": {"pf:a": 1}, "JavaScript": {"pf:a": 2}})
+
+        assert frame_cache.invalidate("Native") == 2
+        assert frame_cache.get_many({"Native": ["pf:a"], "JavaScript": ["pf:a"]}) == {
+            ("Native", "pf:a"): None,
+            ("JavaScript", "pf:a"): 2,
+        }
+
+        # Other processes pick up the new version.
+        assert FrameCache().get_versions(["Native", "JavaScript"]) == {
+            "Native": 2,
+            "JavaScript": 1,
+        }
+
+    def test_local_tier(self):
+        with self.options({"processing.frame-cache-local-size": 10000}):
+            frame_cache = FrameCache()
+            frame_cache.set_many({"Native": {"pf:a": {"function": "main"}}})
+            cache.clear()
+
+            value = frame_cache.get_many({"Native": ["pf:a"]})[("Native", "pf:a")]
+            assert value == {"function": "main"}
+
+            # Values are copied out of the local tier.
+            value["function"] = "other"
+            assert frame_cache.get_many({"Native": ["pf:a"]}) == {
+                ("Native", "pf:a"): {"function": "main"}
+            }
@@ -22,6 +22,9 @@ def redis_cache(monkeypatch):
 
     cache = RedisProjectConfigCache()
     monkeypatch.setattr("sentry.relay.projectconfig_cache.set_many", cache.set_many)
+    monkeypatch.setattr(
+        "sentry.relay.projectconfig_cache.set_many_serialized", cache.set_many_serialized
+    )
     monkeypatch.setattr("sentry.relay.projectconfig_cache.delete_many", cache.delete_many)
     monkeypatch.setattr("sentry.relay.projectconfig_cache.get", cache.get)
 
@@ -133,6 +136,9 @@ def test_invalidate(
     redis_cache.set_many({default_project.id: cfg})
     assert redis_cache.get(default_project.id) == cfg
 
+    redis_cache.set_many_serialized({default_project.id: '{"foo":"baz"}'})
+    assert redis_cache.get(default_project.id) == {"foo": "baz"}
+
     if not entire_organization:
         kwargs = {"project_id": default_project.id}
     else:
@@ -180,7 +186,7 @@ def test_project_get_option_does_not_reload(default_project, task_runner, monkey
     ProjectOption.objects._option_cache.clear()
 
     with task_runner():
-        with patch("sentry.models.projectoption.cache.get", return_value=None):
+        with patch("sentry.db.models.manager.option.cache.get", return_value=None):
             with patch(
                 "sentry.models.projectoption.schedule_update_config_cache"
             ) as update_config_cache:
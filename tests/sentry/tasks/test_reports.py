@@ -12,11 +12,14 @@ from sentry.constants import DataCategory
 from sentry.models import GroupStatus, Project, UserOption
 from sentry.tasks.reports import (
     DISABLED_ORGANIZATIONS_USER_OPTION_KEY,
+    DailyProjectTotals,
     DummyReportBackend,
     Report,
     Skipped,
     build_message,
+    build_organization_reports,
     build_project_issue_summaries,
+    build_project_report,
     build_project_series,
     change,
     clean_series,
@@ -363,6 +366,37 @@ class ReportTestCase(TestCase, SnubaTestCase):
             map(lambda x: x[1] == (2, 0), response)
         ), "must show two issues resolved in one rollup window"
 
+    def test_daily_project_totals(self):
+        stop = floor_to_utc_day(timezone.now()) - timedelta(days=1)
+        start = stop - timedelta(days=7)
+        tsdb.incr(tsdb.models.project, self.project.id, stop - timedelta(days=2), count=3)
+
+        with self.options({"reports.cache-daily-totals": True}):
+            series = DailyProjectTotals([self.project]).get_range(self.project.id, start, stop)
+            assert len(series) == 8
+            assert series[-3] == (to_timestamp(stop - timedelta(days=2)), 3)
+
+            # All days are over, so the second report is built from the cache.
+            with mock.patch.object(tsdb, "get_range") as get_range:
+                totals = DailyProjectTotals([self.project])
+                assert totals.get_range(self.project.id, start, stop) == series
+                assert totals.get_sum(self.project.id, start, stop) == 3
+            assert not get_range.called
+
+    def test_build_organization_reports(self):
+        now = floor_to_utc_day(timezone.now())
+        interval = (now - timedelta(days=7), now)
+        projects = [self.project, self.create_project(organization=self.organization)]
+        for idx, project in enumerate(projects):
+            tsdb.incr(tsdb.models.project, project.id, now - timedelta(days=idx + 1))
+
+        reports = build_organization_reports(interval, projects)
+        assert reports == {
+            project.id: build_project_report(interval, project) for project in projects
+        }
+        assert reports[projects[0].id].series[-1][1] == (0, 1)
+        assert reports[projects[1].id].series[-2][1] == (0, 1)
+
 
 class ReportAcceptanceTest(OutcomesSnubaTest, SnubaTestCase):
     @mock.patch("sentry.tasks.reports.backend", DummyReportBackend())
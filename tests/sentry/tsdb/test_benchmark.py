@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from sentry.tsdb.base import TSDBModel
+from sentry.tsdb.snuba import SnubaTSDB
+from sentry.utils.compat import mock
+
+# What the issue stream asks for: a page of groups with hourly stats.
+GROUPS = 100
+HOURS = 90
+
+
+def make_result(tsdb, group_ids, start, end):
+    _, series = tsdb.get_optimal_rollup_series(start, end, 3600)
+    return {
+        group_id: {ts: (group_id + idx) % 7 for idx, ts in enumerate(series)}
+        for group_id in group_ids
+    }
+
+
+class ReferenceSnubaTSDB(SnubaTSDB):
+    """
+    `get_sums` and `rollup` as they were implemented on top of the points
+    returned by `get_range`, before `SeriesArray`.
+    """
+
+    def get_sums(self, model, keys, start, end, rollup=None, environment_id=None, use_cache=False):
+        range_set = self.get_range(
+            model,
+            keys,
+            start,
+            end,
+            rollup,
+            environment_ids=[environment_id] if environment_id is not None else None,
+            use_cache=use_cache,
+        )
+        return {key: sum(p for _, p in points) for (key, points) in range_set.items()}
+
+    def rollup(self, values, rollup):
+        normalize_ts_to_epoch = self.normalize_ts_to_epoch
+        result = {}
+        for key, points in values.items():
+            result[key] = []
+            last_new_ts = None
+            for (ts, count) in points:
+                new_ts = normalize_ts_to_epoch(ts, rollup)
+                if new_ts == last_new_ts:
+                    result[key][-1][1] += count
+                else:
+                    result[key].append([new_ts, count])
+                    last_new_ts = new_ts
+        return result
+
+
+def query_stream_stats(tsdb, group_ids, start, end):
+    # `StreamGroupSerializer.query_tsdb`, plus the rollup and sums of the
+    # group details and issue alert paths.
+    stats = tsdb.get_range(TSDBModel.group, group_ids, start, end, rollup=3600)
+    rollup = tsdb.rollup(stats, 3600 * 24)
+    sums = tsdb.get_sums(TSDBModel.group, group_ids, start, end, rollup=3600)
+    return stats, rollup, sums
+
+
+def run_stream_stats(tsdb_cls, run=None):
+    tsdb = tsdb_cls()
+    end = datetime(2021, 6, 1, tzinfo=pytz.UTC)
+    start = end - timedelta(hours=HOURS)
+    group_ids = list(range(GROUPS))
+    result = make_result(tsdb, group_ids, start, end)
+
+    def get_data(*args, **kwargs):
+        return {group_id: dict(points) for group_id, points in result.items()}
+
+    with mock.patch.object(tsdb, "get_data", side_effect=get_data):
+        if run is None:
+            return query_stream_stats(tsdb, group_ids, start, end)
+        return run(query_stream_stats, tsdb, group_ids, start, end)
+
+
+def test_stream_stats_match_reference():
+    assert run_stream_stats(SnubaTSDB) == run_stream_stats(ReferenceSnubaTSDB)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("tsdb_cls", [ReferenceSnubaTSDB, SnubaTSDB], ids=["reference", "array"])
+def test_benchmark_stream_stats(tsdb_cls, benchmark):
+    benchmark.group = "tsdb-stream-stats"
+    stats, _, _ = run_stream_stats(tsdb_cls, benchmark)
+
+    assert len(stats) == GROUPS
+    assert all(len(points) == HOURS + 1 for points in stats.values())
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytz
+
+from sentry.testutils import TestCase
+from sentry.tsdb.base import ONE_HOUR, ONE_MINUTE, TSDBModel
+from sentry.tsdb.combining import WriteCombiningRedisTSDB
+from sentry.tsdb.redis import RedisTSDB
+from sentry.tsdb.redissnuba import RedisSnubaTSDB
+from sentry.utils.dates import to_timestamp
+
+ROLLUPS = ((10, 30), (ONE_MINUTE, 120), (ONE_HOUR, 24))
+
+
+class WriteCombiningRedisTSDBTest(TestCase):
+    def setUp(self):
+        self.db = WriteCombiningRedisTSDB(
+            flush_interval=3600,
+            max_pending=1000,
+            background_flush=False,
+            rollups=ROLLUPS,
+            enable_frequency_sketches=True,
+            hosts={0: {"db": 9}},
+        )
+
+    def tearDown(self):
+        with self.db.cluster.all() as client:
+            client.flushdb()
+
+    def test_counters(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=1)
+        epoch = int(to_timestamp(now)) // ONE_HOUR * ONE_HOUR
+
+        self.db.incr_multi([(TSDBModel.project, 1), (TSDBModel.group, 2)], now)
+        self.db.incr_multi([(TSDBModel.project, 1)], now, count=2, environment_id=1)
+
+        assert self.db.get_sums(TSDBModel.project, [1], now, now, rollup=ONE_HOUR) == {1: 0}
+
+        self.db.flush_pending()
+
+        assert self.db.get_range(TSDBModel.project, [1], now, now, rollup=ONE_HOUR) == {
+            1: [(epoch, 3)]
+        }
+        assert self.db.get_range(
+            TSDBModel.project, [1], now, now, rollup=ONE_HOUR, environment_ids=[1]
+        ) == {1: [(epoch, 2)]}
+        assert self.db.get_sums(TSDBModel.group, [2], now, now, rollup=ONE_HOUR) == {2: 1}
+
+    def test_distinct_counters(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=1)
+
+        self.db.record_multi([(TSDBModel.users_affected_by_group, 1, ["foo", "bar"])], now)
+        self.db.record_multi([(TSDBModel.users_affected_by_group, 1, ["bar", "baz"])], now)
+        self.db.flush_pending()
+
+        assert self.db.get_distinct_counts_totals(
+            TSDBModel.users_affected_by_group, [1], now, now, rollup=ONE_HOUR
+        ) == {1: 3}
+
+    def test_frequencies(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=1)
+        model = TSDBModel.frequent_issues_by_project
+
+        self.db.record_frequency_multi([(model, {"organization:1": {"project:1": 1}})], now)
+        self.db.record_frequency_multi(
+            [(model, {"organization:1": {"project:1": 2, "project:2": 1}})], now
+        )
+        self.db.flush_pending()
+
+        assert self.db.get_frequency_totals(
+            model, {"organization:1": ["project:1", "project:2"]}, now, now, rollup=ONE_HOUR
+        ) == {"organization:1": {"project:1": 3.0, "project:2": 1.0}}
+
+    def test_flushes_when_full(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=1)
+        self.db.max_pending = 3
+
+        self.db.incr_multi([(TSDBModel.project, 1)], now)
+        assert self.db.get_sums(TSDBModel.project, [1], now, now, rollup=ONE_HOUR) == {1: 1}
+
+    def test_requeues_failed_flushes(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=1)
+
+        self.db.incr_multi([(TSDBModel.project, 1)], now)
+
+        write = self.db._write
+        self.db._write = lambda *a, **kw: 1 / 0
+        try:
+            self.db.flush_pending()
+        finally:
+            self.db._write = write
+
+        assert self.db._pending_size > 0
+        self.db.flush_pending()
+        assert self.db.get_sums(TSDBModel.project, [1], now, now, rollup=ONE_HOUR) == {1: 1}
+
+
+def test_redissnuba_write_combining():
+    db = RedisSnubaTSDB(redis={"write_combining": {"background_flush": False}})
+    assert isinstance(db.backends["redis"], WriteCombiningRedisTSDB)
+
+    db = RedisSnubaTSDB()
+    assert type(db.backends["redis"]) is RedisTSDB
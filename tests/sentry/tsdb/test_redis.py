@@ -135,6 +135,14 @@ class RedisTSDBTest(TestCase):
         results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1], environment_id=0)
         assert results == {1: 0, 2: 0}
 
+        results = self.db.get_range_array(TSDBModel.project, [1, 2], dts[0], dts[-1])
+        assert results.keys == [1, 2]
+        assert results.timestamps == [timestamp(dt) for dt in dts]
+        assert results.rows == [[1, 3, 1, 4], [0, 0, 0, 4]]
+
+        results = self.db.get_sums_array(TSDBModel.project, [2, 3, 1], dts[0], dts[-1])
+        assert results == [4, 0, 9]
+
         self.db.merge(TSDBModel.project, 1, [2], now, environment_ids=[0, 1, 2])
 
         results = self.db.get_range(TSDBModel.project, [1], dts[0], dts[-1])
@@ -0,0 +1,39 @@
+from sentry.tsdb.series import SeriesArray
+
+
+def test_from_points():
+    series = SeriesArray.from_points({1: [(10, 1), (20, 2)], 2: [(20, 3), (30, 4)]})
+    assert series.keys == [1, 2]
+    assert series.timestamps == [10, 20, 30]
+    assert series.rows == [[1, 2, 0], [0, 3, 4]]
+    assert series.to_points() == {1: [(10, 1), (20, 2), (30, 0)], 2: [(10, 0), (20, 3), (30, 4)]}
+
+
+def test_from_mapping():
+    series = SeriesArray.from_mapping({1: {10: 1, 30: 3}, 2: {}}, [10, 20, 30])
+    assert series.rows == [[1, 0, 3], [0, 0, 0]]
+
+
+def test_sums():
+    series = SeriesArray([1, 2], [10, 20], [[1, 2], [3, 4]])
+    assert series.sums() == {1: 3, 2: 7}
+    assert series.get_totals([2, 3, 1]) == [7, 0, 3]
+
+
+def test_rollup():
+    series = SeriesArray(
+        [1, 2],
+        [1368889980, 1368890040, 1368893640],
+        [[5, 10, 7], [1, 1, 1]],
+    )
+    rolled_up = series.rollup(3600)
+    assert rolled_up.timestamps == [1368889200, 1368892800]
+    assert rolled_up.rows == [[15, 7], [2, 1]]
+
+    assert series.rollup(60) == series
+
+
+def test_empty():
+    series = SeriesArray([], [10, 20])
+    assert series.to_points() == {}
+    assert series.sums() == {}
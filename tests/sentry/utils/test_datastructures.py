@@ -1,6 +1,6 @@
 import pytest
 
-from sentry.utils.datastructures import BidirectionalMapping
+from sentry.utils.datastructures import BidirectionalMapping, LRUCache
 
 
 def test_bidirectional_mapping():
@@ -30,3 +30,56 @@ def test_bidirectional_mapping():
     del value["c"]
 
     assert len(value) == len(value.inverse()) == 2
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    # "b" is now the least recently used entry
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get("b", "default") == "default"
+    assert len(cache) == 2
+
+    cache.delete("a")
+    assert "a" not in cache
+    assert len(cache) == 1
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lru_cache_weigh():
+    cache = LRUCache(10, weigh=len)
+
+    cache.set("a", b"aaaa")
+    cache.set("b", b"bbbb")
+    assert cache.size == 8
+
+    cache.set("c", b"cccc")
+    assert "a" not in cache
+    assert cache.size == 8
+
+    # values larger than the cache are never stored
+    cache.set("b", b"x" * 11)
+    assert "b" not in cache
+    assert cache.size == 4
+
+
+def test_lru_cache_ttl():
+    now = [0]
+    cache = LRUCache(10, ttl=5, timer=lambda: now[0])
+
+    cache.set("a", 1)
+    now[0] = 4
+    assert cache.get("a") == 1
+
+    now[0] = 5
+    assert cache.get("a") is None
+    assert len(cache) == 0
@@ -1,17 +1,21 @@
+import threading
 import unittest
 from datetime import datetime, timedelta
 
 import pytest
 import pytz
+from django.core.cache import cache
 from django.utils import timezone
 
 from sentry.models import GroupRelease, Project, Release
 from sentry.testutils import TestCase
+from sentry.utils import snuba
 from sentry.utils.compat import mock
 from sentry.utils.snuba import (
     Dataset,
     SnubaQueryParams,
     UnqualifiedQueryError,
+    _apply_cache_and_build_results,
     _prepare_query_params,
     get_json_type,
     get_query_params_to_update_for_projects,
@@ -354,3 +358,106 @@ class QuantizeTimeTest(unittest.TestCase):
                 break
 
         assert i != j
+
+
+class QueryCacheTest(TestCase):
+    def make_query(self, value):
+        return ({"selected_columns": [value]}, lambda x: x, lambda x: x)
+
+    def run_query(self, value, referrer="test"):
+        return list(
+            _apply_cache_and_build_results(
+                [self.make_query(value)], referrer=referrer, use_cache=True
+            )
+        )[0]
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_cache(self, bulk_snuba_query):
+        bulk_snuba_query.return_value = [{"data": [1]}]
+        assert self.run_query("cache") == {"data": [1]}
+        assert self.run_query("cache") == {"data": [1]}
+        assert bulk_snuba_query.call_count == 1
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_cache_key(self, bulk_snuba_query):
+        bulk_snuba_query.return_value = [{"data": [1]}]
+        self.run_query("cache-key")
+        # Legacy queries are keyed by the `(query, forward, reverse)` tuple.
+        assert cache.get(snuba.get_cache_key(self.make_query("cache-key"), prefix="sqc2"))
+        # Workers that store bare results under `sqc:` must not see the new format.
+        assert cache.get(snuba.get_cache_key(self.make_query("cache-key"))) is None
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_local_cache(self, bulk_snuba_query):
+        bulk_snuba_query.return_value = [{"data": [1]}]
+        with self.options({"snuba.query-cache.local-max-size": 1000}):
+            assert self.run_query("local-cache") == {"data": [1]}
+            cache.clear()
+            assert self.run_query("local-cache") == {"data": [1]}
+        assert bulk_snuba_query.call_count == 1
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_singleflight(self, bulk_snuba_query):
+        started = threading.Event()
+        finish = threading.Event()
+
+        def slow_query(*args, **kwargs):
+            started.set()
+            finish.wait(5)
+            return [{"data": [1]}]
+
+        bulk_snuba_query.side_effect = slow_query
+        results = []
+
+        with self.options({"snuba.query-cache.singleflight": True}):
+            leader = threading.Thread(target=lambda: results.append(self.run_query("singleflight")))
+            leader.start()
+            assert started.wait(5)
+
+            follower = threading.Thread(
+                target=lambda: results.append(self.run_query("singleflight"))
+            )
+            follower.start()
+            finish.set()
+            leader.join()
+            follower.join()
+
+        assert results == [{"data": [1]}, {"data": [1]}]
+        assert bulk_snuba_query.call_count == 1
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_singleflight_timeout(self, bulk_snuba_query):
+        bulk_snuba_query.return_value = [{"data": [1]}]
+        cache_key = snuba._get_query_cache_key(self.make_query("singleflight-timeout"))
+        _, is_leader = snuba._query_singleflight.begin(cache_key)
+        assert is_leader
+        try:
+            with self.options({"snuba.query-cache.singleflight": True}), self.settings(
+                SENTRY_SNUBA_TIMEOUT=0.01
+            ):
+                with pytest.raises(snuba.SnubaError):
+                    self.run_query("singleflight-timeout")
+        finally:
+            snuba._query_singleflight.finish(cache_key)
+        assert bulk_snuba_query.call_count == 0
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_stale_while_revalidate(self, bulk_snuba_query):
+        bulk_snuba_query.return_value = [{"data": [1]}]
+        with self.options(
+            {"snuba.query-cache.stale-referrers": ["test"], "snuba.query-cache.stale-ttl": 300}
+        ), mock.patch.object(
+            snuba._revalidate_thread_pool, "submit", side_effect=lambda f, *args: f(*args)
+        ):
+            with mock.patch("sentry.utils.snuba.time.time", return_value=1000.0):
+                assert self.run_query("stale") == {"data": [1]}
+
+            bulk_snuba_query.return_value = [{"data": [2]}]
+            with mock.patch("sentry.utils.snuba.time.time", return_value=1100.0):
+                # The stale result is returned and refreshed in the background.
+                assert self.run_query("stale") == {"data": [1]}
+                assert bulk_snuba_query.call_count == 2
+                assert self.run_query("stale") == {"data": [2]}
+
+                # Other referrers do not accept stale results.
+                assert self.run_query("stale", referrer="other") == {"data": [2]}